@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +12,47 @@ class Settings:
 
     AWS_REGION: str = os.getenv("AWS_REGION", "ap-south-1")
     DYNAMODB_TABLE_NAME: str = os.getenv("DYNAMODB_TABLE_NAME", "order-processing-local")
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "dynamodb")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "order-processing.db")
+    DYNAMODB_CLIENT: str = os.getenv("DYNAMODB_CLIENT", "boto3")
+    DYNAMODB_ENDPOINT_URL: Optional[str] = os.getenv("DYNAMODB_ENDPOINT_URL")
+    DYNAMODB_ASYNC_MAX_CONNECTIONS: int = int(os.getenv("DYNAMODB_ASYNC_MAX_CONNECTIONS", "200"))
+
+    AWS_MAX_POOL_CONNECTIONS: int = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+    AWS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AWS_CONNECT_TIMEOUT_SECONDS", "2"))
+    AWS_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_READ_TIMEOUT_SECONDS", "10"))
+    AWS_TCP_KEEPALIVE: bool = os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+    AWS_MAX_ATTEMPTS: int = int(os.getenv("AWS_MAX_ATTEMPTS", "3"))
     SNS_TOPIC_ARN: str = os.getenv("SNS_TOPIC_ARN", "arn:aws:sns:ap-south-1:278273886744:order-events")
+    SNS_BACKEND: str = os.getenv("SNS_BACKEND", "local" if STORAGE_BACKEND in ("memory", "sqlite") else "aws")
+    SNS_PUBLISH_LINGER_MS: float = float(os.getenv("SNS_PUBLISH_LINGER_MS", "5"))
+    SNS_PUBLISH_CONCURRENCY: int = int(os.getenv("SNS_PUBLISH_CONCURRENCY", "4"))
+    SNS_EVENT_ENCODING: str = os.getenv("SNS_EVENT_ENCODING", "json")
+    SNS_SPOOL_PATH: str = os.getenv("SNS_SPOOL_PATH", "")
+    SNS_SPOOL_MIN_BACKOFF_SECONDS: float = float(os.getenv("SNS_SPOOL_MIN_BACKOFF_SECONDS", "1"))
+    SNS_SPOOL_MAX_BACKOFF_SECONDS: float = float(os.getenv("SNS_SPOOL_MAX_BACKOFF_SECONDS", "60"))
+    ORDER_EVENT_DELIVERY: str = os.getenv("ORDER_EVENT_DELIVERY", "direct")
+    ORDER_EVENT_SNAPSHOTS: bool = os.getenv("ORDER_EVENT_SNAPSHOTS", "false").lower() == "true"
+    ORDER_EVENT_SNAPSHOT_MAX_BYTES: int = int(os.getenv("ORDER_EVENT_SNAPSHOT_MAX_BYTES", "16384"))
+    OUTBOX_SHARD_COUNT: int = int(os.getenv("OUTBOX_SHARD_COUNT", "8"))
+    OUTBOX_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_SWEEP_INTERVAL_SECONDS", "10"))
+    OUTBOX_SWEEP_AGE_SECONDS: int = int(os.getenv("OUTBOX_SWEEP_AGE_SECONDS", "30"))
+
+    CURSOR_SECRET_KEY: str = os.getenv("CURSOR_SECRET_KEY", JWT_SECRET_KEY)
+    DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    QUERY_FANOUT_CONCURRENCY: int = int(os.getenv("QUERY_FANOUT_CONCURRENCY", "8"))
+    MAX_BATCH_GET_ORDERS: int = int(os.getenv("MAX_BATCH_GET_ORDERS", "500"))
+    MAX_BULK_ORDERS: int = int(os.getenv("MAX_BULK_ORDERS", "1000"))
+    BULK_WRITE_CONCURRENCY: int = int(os.getenv("BULK_WRITE_CONCURRENCY", "4"))
+    STATUS_SHARD_COUNT: int = int(os.getenv("STATUS_SHARD_COUNT", "1"))
+    STATS_COUNTER_SHARDS: int = int(os.getenv("STATS_COUNTER_SHARDS", "8"))
+
+    ORDER_CACHE_MAX_SIZE: int = int(os.getenv("ORDER_CACHE_MAX_SIZE", "10000"))
+    ORDER_CACHE_TTL_SECONDS: float = float(os.getenv("ORDER_CACHE_TTL_SECONDS", "5"))
+    CACHE_INVALIDATION_BACKEND: str = os.getenv("CACHE_INVALIDATION_BACKEND", "local")
+    CACHE_INVALIDATION_WAIT_SECONDS: int = int(os.getenv("CACHE_INVALIDATION_WAIT_SECONDS", "20"))
+    ORDER_ARCHIVE_PATH: str = os.getenv("ORDER_ARCHIVE_PATH", "")
+    ORDER_ARCHIVE_AFTER_DAYS: int = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, status
+from app.serverful.dependencies.auth import require_admin
+from app.serverful.utils.metrics import metrics
+
+
+admin_metrics_router = APIRouter(
+    dependencies=[Depends(require_admin)]
+)
+
+
+@admin_metrics_router.get("/admin/metrics", status_code=status.HTTP_200_OK)
+async def get_metrics() -> dict:
+    """Current process counters and gauges"""
+    return metrics.snapshot()
@@ -1,17 +1,39 @@
-from fastapi import APIRouter, Depends, status
-from app.serverful.models.dto import UpdateFulfilmentRequest, GenericResponse
-from app.serverful.models.models import OrderStatus, Order
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from app.serverful.models.dto import BatchGetOrdersRequest, UpdateFulfilmentRequest, GenericResponse
+from app.serverful.models.models import OrderStatus, OrderSummary, Order
 from app.serverful.dependencies.auth import require_staff
 from app.serverful.dependencies.dependencies import OrderServiceInstance
-from typing import List
-from pydantic import BaseModel
+from app.serverful.config.config import settings
+from typing import AsyncIterator, Dict, List, Optional, Union
+from datetime import date
+from pydantic import BaseModel, Field
 
 class OrderListResponse(BaseModel):
     orders: List[Order]
     total_count: int
+    next_cursor: Optional[str] = None
+
+class OrderSummaryListResponse(BaseModel):
+    orders: List[OrderSummary]
+    total_count: int
+    next_cursor: Optional[str] = None
+
+class BatchGetOrdersResponse(BaseModel):
+    orders: List[Order]
+    missing_order_ids: List[str]
+
+class OrderStatsResponse(BaseModel):
+    counts: Dict[OrderStatus, int]
+    # Named day internally: a field called date would shadow the type in its own annotation
+    day: Optional[date] = Field(default=None, serialization_alias="date")
 
 staff_router = APIRouter(dependencies=[Depends(require_staff)])
 
+async def _ndjson_lines(pages: AsyncIterator[List[Order]]) -> AsyncIterator[str]:
+    async for orders in pages:
+        yield "".join(f"{order.model_dump_json()}\n" for order in orders)
+
 @staff_router.patch("/orders/{order_id}/fulfilment", response_model=GenericResponse, status_code=status.HTTP_200_OK)
 async def update_fulfilment(
     order_id: str,
@@ -37,13 +59,37 @@ async def update_fulfilment(
     
     return GenericResponse(message=f"Fulfilment {action_verb_map[action]} successfully")
 
-@staff_router.get("/orders/all", response_model=OrderListResponse, status_code=status.HTTP_200_OK)
+@staff_router.get(
+    "/orders/all",
+    response_model=Union[OrderListResponse, OrderSummaryListResponse],
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
 async def get_all_orders(
     order_service: OrderServiceInstance,
-) -> OrderListResponse:
-    """Get all orders across all users"""
-    orders = await order_service.get_orders_by_status(None)
-    return OrderListResponse(orders=orders, total_count=len(orders))
+    limit: int = Query(default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+) -> Union[OrderListResponse, OrderSummaryListResponse, StreamingResponse]:
+    """Get a page of orders across all users, newest first, or stream every order as NDJSON"""
+    if format == "ndjson":
+        pages = order_service.stream_all_orders(settings.MAX_PAGE_SIZE)
+        return StreamingResponse(_ndjson_lines(pages), media_type="application/x-ndjson")
+    
+    summary = view == "summary"
+    orders, next_cursor = await order_service.get_all_orders(limit, cursor, summary=summary)
+    response_model = OrderSummaryListResponse if summary else OrderListResponse
+    return response_model(orders=orders, total_count=len(orders), next_cursor=next_cursor)
+
+@staff_router.post("/orders/batch-get", response_model=BatchGetOrdersResponse, status_code=status.HTTP_200_OK)
+async def batch_get_orders(
+    batch_request: BatchGetOrdersRequest,
+    order_service: OrderServiceInstance,
+) -> BatchGetOrdersResponse:
+    """Get several orders by ID in one request"""
+    orders, missing_order_ids = await order_service.get_orders_by_ids(batch_request.order_ids)
+    return BatchGetOrdersResponse(orders=orders, missing_order_ids=missing_order_ids)
 
 @staff_router.get("/orders/order/{order_id}", response_model=Order, status_code=status.HTTP_200_OK)
 async def get_order_by_id(
@@ -53,11 +99,29 @@ async def get_order_by_id(
     """Get order details by order ID without user ID"""
     return await order_service.get_order_by_id(order_id)
 
-@staff_router.get("/orders/{order_status}", response_model=OrderListResponse, status_code=status.HTTP_200_OK)
+@staff_router.get("/orders/stats", response_model=OrderStatsResponse, status_code=status.HTTP_200_OK)
+async def get_order_stats(
+    order_service: OrderServiceInstance,
+    day: Optional[date] = Query(default=None, alias="date"),
+) -> OrderStatsResponse:
+    """Get the number of orders in each status, overall or among orders created on a UTC date"""
+    counts = await order_service.get_order_stats(day)
+    return OrderStatsResponse(counts=counts, day=day)
+
+@staff_router.get("/orders/{order_status}", response_model=Union[OrderListResponse, OrderSummaryListResponse], status_code=status.HTTP_200_OK)
 async def get_all_orders_by_status(
     order_status: OrderStatus,
     order_service: OrderServiceInstance,
-) -> OrderListResponse:
-    """Get all orders filtered by status"""
-    orders = await order_service.get_orders_by_status(order_status)
-    return OrderListResponse(orders=orders, total_count=len(orders))
+    limit: int = Query(default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+) -> Union[OrderListResponse, OrderSummaryListResponse]:
+    """Get a page of orders filtered by status, optionally limited to orders created within a UTC date range"""
+    summary = view == "summary"
+    orders, next_cursor = await order_service.get_orders_by_status(
+        order_status, limit, cursor, summary=summary, date_from=date_from, date_to=date_to
+    )
+    response_model = OrderSummaryListResponse if summary else OrderListResponse
+    return response_model(orders=orders, total_count=len(orders), next_cursor=next_cursor)
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, Request, status
-from app.serverful.models.dto import CreateOrderRequest, ProcessPaymentRequest, GenericResponse
-from app.serverful.models.models import Order
+from fastapi import APIRouter, Depends, Query, Request, status
+from app.serverful.models.dto import BulkCreateOrdersRequest, BulkCreateOrdersResponse, CreateOrderRequest, ProcessPaymentRequest, GenericResponse
+from app.serverful.models.models import OrderSummary, Order
 from app.serverful.dependencies.auth import require_user
 from app.serverful.dependencies.dependencies import OrderServiceInstance
-from typing import List
+from app.serverful.config.config import settings
+from typing import List, Optional, Union
 from pydantic import BaseModel
 
 class OrderListResponse(BaseModel):
     orders: List[Order]
     total_count: int
+    next_cursor: Optional[str] = None
+
+class OrderSummaryListResponse(BaseModel):
+    orders: List[OrderSummary]
+    total_count: int
+    next_cursor: Optional[str] = None
 
 order_router = APIRouter(dependencies=[Depends(require_user)])
 
@@ -23,15 +30,32 @@ async def create_order(
     await order_service.create_order(user_id, order_request)
     return GenericResponse(message="Order created successfully")
 
-@order_router.get("/orders", response_model=OrderListResponse, status_code=status.HTTP_200_OK)
+@order_router.post("/orders/bulk", response_model=BulkCreateOrdersResponse, status_code=status.HTTP_200_OK)
+async def create_orders_bulk(
+    request: Request,
+    bulk_request: BulkCreateOrdersRequest,
+    order_service: OrderServiceInstance,
+) -> BulkCreateOrdersResponse:
+    """Create many orders for the authenticated user in one request, reporting the outcome of each"""
+    user_id = request.state.current_user["user_id"]
+    results = await order_service.create_orders(user_id, bulk_request.orders)
+    created_count = sum(1 for result in results if result.status == "created")
+    return BulkCreateOrdersResponse(results=results, created_count=created_count, failed_count=len(results) - created_count)
+
+@order_router.get("/orders", response_model=Union[OrderListResponse, OrderSummaryListResponse], status_code=status.HTTP_200_OK)
 async def get_user_orders(
     request: Request,
     order_service: OrderServiceInstance,
-) -> OrderListResponse:
-    """Get all orders for the authenticated user"""
+    limit: int = Query(default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+) -> Union[OrderListResponse, OrderSummaryListResponse]:
+    """Get a page of orders for the authenticated user"""
     user_id = request.state.current_user["user_id"]
-    orders = await order_service.get_user_orders(user_id)
-    return OrderListResponse(orders=orders, total_count=len(orders))
+    summary = view == "summary"
+    orders, next_cursor = await order_service.get_user_orders(user_id, limit, cursor, summary=summary)
+    response_model = OrderSummaryListResponse if summary else OrderListResponse
+    return response_model(orders=orders, total_count=len(orders), next_cursor=next_cursor)
 
 @order_router.get("/orders/{order_id}", response_model=Order, status_code=status.HTTP_200_OK)
 async def get_order_by_id(
@@ -1,51 +1,150 @@
+import sqlite3
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import boto3
+import httpx
+from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
 from app.serverful.config.config import settings
 from app.serverful.repositories.user_repository import UserRepository
 from app.serverful.repositories.order_repository import OrderRepository
+from app.serverful.repositories.order_archive import LocalOrderArchive
+from app.serverful.repositories.async_dynamodb import create_async_dynamodb_resource, low_level_client
+from app.serverful.repositories.local_storage import create_local_dynamodb_resource
 from app.serverful.services.auth_service import AuthService
 from app.serverful.services.user_service import UserService
 from app.serverful.services.order_service import OrderService
 from app.serverful.services.sns_service import SnsService
+from app.serverful.services.local_sns import LocalSnsClient
+from app.serverful.services.event_spool import EventSpool
+from app.serverful.services.outbox_relay import OutboxRelay
+from app.serverful.services.invalidation_service import LocalInvalidationBus, SnsInvalidationBus
+from app.serverful.utils.cache import TTLCache
+from app.serverful.utils.io_utils import IOExecutor, configure_io_executor
+from app.serverful.utils.metrics import metrics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # One worker per pooled connection, so a blocked call never waits on the pool inside a thread
+    io_executor = IOExecutor(max_workers=settings.AWS_MAX_POOL_CONNECTIONS)
+    configure_io_executor(io_executor)
+    metrics.register_gauge("aws_io_queue_depth", lambda: io_executor.queue_depth)
+    metrics.register_gauge("aws_io_connections_in_use", lambda: io_executor.in_use)
+    
+    boto_config = Config(
+        max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.AWS_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.AWS_READ_TIMEOUT_SECONDS,
+        tcp_keepalive=settings.AWS_TCP_KEEPALIVE,
+        retries={"max_attempts": settings.AWS_MAX_ATTEMPTS, "mode": "standard"}
+    )
+    
     try:
-        dynamodb_resource = boto3.resource(
-            "dynamodb",
-            region_name=settings.AWS_REGION
-        )
-        
-        table = dynamodb_resource.Table(settings.DYNAMODB_TABLE_NAME)
-        table.load()
+        if settings.STORAGE_BACKEND in ("memory", "sqlite"):
+            # Same key patterns as the DynamoDB table, kept in this process or a local SQLite file
+            dynamodb_resource = create_local_dynamodb_resource(settings.STORAGE_BACKEND, settings.SQLITE_PATH)
+        elif settings.DYNAMODB_CLIENT == "async":
+            dynamodb_resource = create_async_dynamodb_resource(
+                region=settings.AWS_REGION,
+                credentials=boto3.Session().get_credentials(),
+                endpoint_url=settings.DYNAMODB_ENDPOINT_URL,
+                max_connections=settings.DYNAMODB_ASYNC_MAX_CONNECTIONS,
+                connect_timeout=settings.AWS_CONNECT_TIMEOUT_SECONDS,
+                read_timeout=settings.AWS_READ_TIMEOUT_SECONDS,
+                max_attempts=settings.AWS_MAX_ATTEMPTS
+            )
+            metrics.register_gauge(
+                "dynamodb_async_in_flight",
+                lambda: dynamodb_resource.meta.client.in_flight + dynamodb_resource.raw_client.in_flight
+            )
+            await dynamodb_resource.Table(settings.DYNAMODB_TABLE_NAME).load()
+        else:
+            dynamodb_resource = boto3.resource(
+                "dynamodb",
+                region_name=settings.AWS_REGION,
+                endpoint_url=settings.DYNAMODB_ENDPOINT_URL,
+                config=boto_config
+            )
+            
+            table = dynamodb_resource.Table(settings.DYNAMODB_TABLE_NAME)
+            await io_executor.run(table.load)
         
-    except (ClientError, BotoCoreError) as e:
+    except (ClientError, BotoCoreError, httpx.HTTPError, sqlite3.Error) as e:
         raise RuntimeError(f"Failed to connect to DynamoDB: {str(e)}")
     
-    try:
-        sns_client = boto3.client(
-            "sns",
-            region_name=settings.AWS_REGION
-        )
-        sns_client.get_topic_attributes(TopicArn=settings.SNS_TOPIC_ARN)
-        
-    except (ClientError, BotoCoreError) as e:
-        raise RuntimeError(f"Failed to connect to SNS: {str(e)}")
+    if settings.SNS_BACKEND == "local":
+        # Events stay in this process, so the local storage backends run without AWS credentials
+        sns_client = LocalSnsClient()
+    else:
+        try:
+            sns_client = boto3.client(
+                "sns",
+                region_name=settings.AWS_REGION,
+                config=boto_config
+            )
+            await io_executor.run(sns_client.get_topic_attributes, TopicArn=settings.SNS_TOPIC_ARN)
+            
+        except (ClientError, BotoCoreError) as e:
+            raise RuntimeError(f"Failed to connect to SNS: {str(e)}")
+    
+    # Both repositories read through one low-level client so they share its connection pool
+    raw_dynamodb_client = low_level_client(dynamodb_resource)
     
     user_repo = UserRepository(
         dynamodb_resource=dynamodb_resource,
-        table_name=settings.DYNAMODB_TABLE_NAME
+        table_name=settings.DYNAMODB_TABLE_NAME,
+        raw_client=raw_dynamodb_client
     )
     
+    order_cache = None
+    if settings.ORDER_CACHE_TTL_SECONDS > 0:
+        order_cache = TTLCache("order", settings.ORDER_CACHE_MAX_SIZE, settings.ORDER_CACHE_TTL_SECONDS)
+        metrics.register_gauge("order_cache_size", lambda: len(order_cache))
+    
     order_repo = OrderRepository(
         dynamodb_resource=dynamodb_resource,
-        table_name=settings.DYNAMODB_TABLE_NAME
+        table_name=settings.DYNAMODB_TABLE_NAME,
+        status_shards=settings.STATUS_SHARD_COUNT,
+        cache=order_cache,
+        raw_client=raw_dynamodb_client,
+        archive=LocalOrderArchive(settings.ORDER_ARCHIVE_PATH) if settings.ORDER_ARCHIVE_PATH else None,
+        event_snapshots=settings.ORDER_EVENT_SNAPSHOTS
     )
+    metrics.register_gauge("order_reads_in_flight", lambda: order_repo.single_flight.in_flight)
+    
+    # Outbox delivery already keeps unpublished events in the table, so the spool only backs direct publishing
+    spool = None
+    if settings.ORDER_EVENT_DELIVERY != "outbox" and settings.SNS_SPOOL_PATH:
+        spool = EventSpool(settings.SNS_SPOOL_PATH, settings.SNS_SPOOL_MIN_BACKOFF_SECONDS, settings.SNS_SPOOL_MAX_BACKOFF_SECONDS)
+        metrics.register_gauge("sns_spool_depth", lambda: spool.depth)
+    sns_service = SnsService(sns_client=sns_client, spool=spool)
+    await sns_service.start()
+    metrics.register_gauge("sns_publish_queue_depth", lambda: sns_service.queue_depth)
+    
+    outbox_relay = None
+    if settings.ORDER_EVENT_DELIVERY == "outbox":
+        outbox_relay = OutboxRelay(order_repo, sns_service, settings.OUTBOX_SWEEP_INTERVAL_SECONDS, settings.OUTBOX_SWEEP_AGE_SECONDS)
+        order_repo.outbox_listener = outbox_relay.submit
+        await outbox_relay.start()
+        metrics.register_gauge("outbox_queue_depth", lambda: outbox_relay.queue_depth)
+    
+    # Cross-task invalidation rides on the real topic; with the local stand-in only this process needs evicting
+    if settings.CACHE_INVALIDATION_BACKEND == "sns" and settings.SNS_BACKEND != "local":
+        sqs_client = boto3.client(
+            "sqs",
+            region_name=settings.AWS_REGION,
+            config=boto_config.merge(Config(read_timeout=settings.CACHE_INVALIDATION_WAIT_SECONDS + 10))
+        )
+        invalidation_bus = SnsInvalidationBus(sns_client, sqs_client, settings.SNS_TOPIC_ARN, settings.CACHE_INVALIDATION_WAIT_SECONDS)
+    else:
+        invalidation_bus = LocalInvalidationBus()
+    invalidation_bus.subscribe(lambda order_id, user_id: order_repo.invalidate(order_id))
     
-    sns_service = SnsService(sns_client=sns_client)
+    try:
+        await invalidation_bus.start()
+    except (ClientError, BotoCoreError) as e:
+        raise RuntimeError(f"Failed to subscribe to order events for cache invalidation: {str(e)}")
     
     auth_service = AuthService(user_repository=user_repo)
     
@@ -54,7 +153,10 @@ async def lifespan(app: FastAPI):
     order_service = OrderService(
         order_repository=order_repo,
         user_repository=user_repo,
-        sns_service=sns_service
+        sns_service=sns_service,
+        invalidation_bus=invalidation_bus,
+        use_outbox=outbox_relay is not None,
+        event_snapshots=settings.ORDER_EVENT_SNAPSHOTS
     )
     
     app.state.dynamodb_resource = dynamodb_resource
@@ -62,8 +164,21 @@ async def lifespan(app: FastAPI):
     app.state.user_repo = user_repo
     app.state.order_repo = order_repo
     app.state.sns_service = sns_service
+    app.state.outbox_relay = outbox_relay
+    app.state.invalidation_bus = invalidation_bus
     app.state.auth_service = auth_service
     app.state.user_service = user_service
     app.state.order_service = order_service
     
     yield
+    
+    if outbox_relay:
+        await outbox_relay.stop()
+    await sns_service.stop()
+    await invalidation_bus.stop()
+    
+    if settings.STORAGE_BACKEND in ("memory", "sqlite") or settings.DYNAMODB_CLIENT == "async":
+        await dynamodb_resource.close()
+    
+    configure_io_executor(None)
+    io_executor.shutdown()
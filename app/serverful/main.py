@@ -5,6 +5,7 @@ from app.serverful.controllers.auth_controllers import auth_router
 from app.serverful.controllers.admin_auth_controllers import admin_auth_router
 from app.serverful.controllers.customer_order_controllers import order_router
 from app.serverful.controllers.admin_order_controllers import staff_router
+from app.serverful.controllers.admin_metrics_controllers import admin_metrics_router
 from app.serverful.utils.exception_handlers import (
     application_error_handler,
     validation_exception_handler,
@@ -26,4 +27,5 @@ app.add_exception_handler(Exception, general_exception_handler)
 app.include_router(auth_router, tags=["Authentication"])
 app.include_router(admin_auth_router, tags=["Admin - User Management"])
 app.include_router(order_router, tags=["Customer Orders"])
-app.include_router(staff_router, prefix="/staff", tags=["Staff Orders"])
\ No newline at end of file
+app.include_router(staff_router, prefix="/staff", tags=["Staff Orders"])
+app.include_router(admin_metrics_router, tags=["Admin - Metrics"])
\ No newline at end of file
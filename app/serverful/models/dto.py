@@ -3,6 +3,7 @@ from typing import List, Optional
 from decimal import Decimal
 from enum import Enum
 from app.serverful.models.models import OrderStatus
+from app.serverful.config.config import settings
 
 
 class PaymentStatus(str, Enum):
@@ -92,6 +93,23 @@ class CreateOrderRequest(BaseModel):
         return items
 
 
+class BulkCreateOrdersRequest(BaseModel):
+    orders: List[CreateOrderRequest] = Field(min_length=1, max_length=settings.MAX_BULK_ORDERS)
+
+
+class BulkOrderResult(BaseModel):
+    index: int
+    order_id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BulkCreateOrdersResponse(BaseModel):
+    results: List[BulkOrderResult]
+    created_count: int
+    failed_count: int
+
+
 class ProcessPaymentRequest(BaseModel):
     payment_method: str = Field(min_length=1, max_length=50)
     payment_status: PaymentStatus
@@ -127,6 +145,10 @@ class GenericResponse(BaseModel):
     message: str
 
 
+class BatchGetOrdersRequest(BaseModel):
+    order_ids: List[str] = Field(min_length=1, max_length=settings.MAX_BATCH_GET_ORDERS)
+
+
 class UpdateFulfilmentRequest(BaseModel):
     action: str = Field(pattern="^(start|complete|cancel)$")
 
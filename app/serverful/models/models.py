@@ -86,10 +86,47 @@ class Order(BaseModel):
         return total_value
 
 
+class OrderSummary(BaseModel):
+    order_id: str
+    user_id: str
+    status: OrderStatus
+    total_amount: Decimal
+    created_at: int = 0
+    updated_at: int = 0
+
+
+class OrderSnapshot(BaseModel):
+    """The parts of an order a notification consumer renders, as of the event."""
+    order_status: OrderStatus
+    items: List[OrderItem]
+    total_amount: Decimal
+    delivery_address: str
+    payment_details: Optional[PaymentDetails] = None
+
+    @classmethod
+    def of(cls, order: Order) -> "OrderSnapshot":
+        return cls.model_construct(
+            order_status=order.status,
+            items=order.items,
+            total_amount=order.total_amount,
+            delivery_address=order.delivery_address,
+            payment_details=order.payment_details
+        )
+
+
+class EventRecipient(BaseModel):
+    first_name: str
+    last_name: str
+    email: str
+
+
 class NotificationEvent(BaseModel):
     event_id: str = ""
     event_type: NotificationEventType
     order_id: str = Field(min_length=1, max_length=100)
     user_id: str = Field(min_length=1, max_length=100)
     occurred_at: int = Field(gt=0)
-    metadata: dict = {} 
\ No newline at end of file
+    metadata: dict = {}
+    # Enriched events carry what consumers would otherwise read back from the table
+    order: Optional[OrderSnapshot] = None
+    recipient: Optional[EventRecipient] = None
\ No newline at end of file
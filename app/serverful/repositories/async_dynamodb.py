@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+import boto3
+import httpx
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.exceptions import ClientError
+from app.serverful.repositories.attribute_codec import deserialize_response, serialize_request
+from app.serverful.repositories.local_storage import LocalDynamoDBResource
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_ERRORS = {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded", "InternalServerError"}
+
+
+class AsyncDynamoDBClient:
+    """DynamoDB JSON API client that signs requests with SigV4 and sends them over a shared httpx pool.
+
+    Accepts and returns plain Python values, like the client behind a boto3 Table resource;
+    with typed=False it passes AttributeValue maps through untouched, like a low-level boto3 client.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        region: str,
+        credentials,
+        endpoint_url: Optional[str] = None,
+        max_attempts: int = 3,
+        typed: bool = True
+    ) -> None:
+        self.http_client = http_client
+        self.region = region
+        self.credentials = credentials
+        self.endpoint_url = endpoint_url or f"https://dynamodb.{region}.amazonaws.com"
+        self.max_attempts = max_attempts
+        self.typed = typed
+        self.in_flight = 0
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("Query", kwargs)
+
+    async def scan(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("Scan", kwargs)
+
+    async def get_item(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("GetItem", kwargs)
+
+    async def batch_get_item(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("BatchGetItem", kwargs)
+
+    async def batch_write_item(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("BatchWriteItem", kwargs)
+
+    async def transact_write_items(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("TransactWriteItems", kwargs)
+
+    async def describe_table(self, **kwargs) -> Dict[str, Any]:
+        return await self._call("DescribeTable", kwargs)
+
+    async def _call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(serialize_request(params) if self.typed else params).encode("utf-8")
+
+        for attempt in range(1, self.max_attempts + 1):
+            self.in_flight += 1
+            try:
+                response = await self.http_client.post(self.endpoint_url, content=body, headers=self._signed_headers(operation, body))
+            except httpx.TransportError as e:
+                if attempt == self.max_attempts:
+                    raise
+                logger.warning(f"DynamoDB {operation} transport error, retrying: {str(e)}")
+                await asyncio.sleep(0.05 * 2 ** attempt)
+                continue
+            finally:
+                self.in_flight -= 1
+
+            payload = _json_body(response)
+            if response.status_code == 200 and payload is not None:
+                return deserialize_response(payload) if self.typed else payload
+
+            # A proxy or load balancer in the way can answer with an HTML or truncated body instead of DynamoDB's JSON
+            error = self._client_error(operation, response.status_code, payload if payload is not None else {"__type": f"HTTP{response.status_code}"})
+            retryable = response.status_code >= 500 or response.status_code == 200 or error.response["Error"]["Code"] in _RETRYABLE_ERRORS
+            if not retryable or attempt == self.max_attempts:
+                raise error
+            await asyncio.sleep(0.05 * 2 ** attempt)
+
+    def _signed_headers(self, operation: str, body: bytes) -> Dict[str, str]:
+        request = AWSRequest(
+            method="POST",
+            url=self.endpoint_url,
+            data=body,
+            headers={
+                "Content-Type": "application/x-amz-json-1.0",
+                "X-Amz-Target": f"DynamoDB_20120810.{operation}"
+            }
+        )
+        SigV4Auth(self.credentials.get_frozen_credentials(), "dynamodb", self.region).add_auth(request)
+        return dict(request.headers.items())
+
+    def _client_error(self, operation: str, status_code: int, payload: Dict[str, Any]) -> ClientError:
+        error_response = {
+            "Error": {
+                "Code": payload.get("__type", "UnknownError").split("#")[-1],
+                "Message": payload.get("message") or payload.get("Message", "")
+            },
+            "ResponseMetadata": {"HTTPStatusCode": status_code}
+        }
+        if "CancellationReasons" in payload:
+            error_response["CancellationReasons"] = payload["CancellationReasons"]
+        return ClientError(error_response, operation)
+
+
+def _json_body(response: httpx.Response) -> Optional[Dict[str, Any]]:
+    if not response.content:
+        return {}
+    try:
+        payload = response.json()
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class AsyncTable:
+
+    def __init__(self, client: AsyncDynamoDBClient, table_name: str) -> None:
+        self.client = client
+        self.table_name = table_name
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        return await self.client.query(TableName=self.table_name, **kwargs)
+
+    async def scan(self, **kwargs) -> Dict[str, Any]:
+        return await self.client.scan(TableName=self.table_name, **kwargs)
+
+    async def get_item(self, **kwargs) -> Dict[str, Any]:
+        return await self.client.get_item(TableName=self.table_name, **kwargs)
+
+    async def load(self) -> None:
+        await self.client.describe_table(TableName=self.table_name)
+
+
+class AsyncDynamoDBResource:
+    """Stand-in for a boto3 DynamoDB resource whose Table and meta.client calls are coroutines"""
+
+    def __init__(self, client: AsyncDynamoDBClient) -> None:
+        self.meta = SimpleNamespace(client=client)
+        self.raw_client = AsyncDynamoDBClient(
+            client.http_client, client.region, client.credentials, client.endpoint_url, client.max_attempts, typed=False
+        )
+
+    def Table(self, table_name: str) -> AsyncTable:
+        return AsyncTable(self.meta.client, table_name)
+
+    async def batch_get_item(self, **kwargs) -> Dict[str, Any]:
+        return await self.meta.client.batch_get_item(**kwargs)
+
+    async def close(self) -> None:
+        await self.meta.client.http_client.aclose()
+
+
+def low_level_client(dynamodb_resource):
+    """Client for the same endpoint as dynamodb_resource that returns raw AttributeValue maps."""
+    if isinstance(dynamodb_resource, (AsyncDynamoDBResource, LocalDynamoDBResource)):
+        return dynamodb_resource.raw_client
+    # A resource's own meta.client has the Table type conversions registered on it, so build a separate one
+    meta = dynamodb_resource.meta.client.meta
+    return boto3.client("dynamodb", region_name=meta.region_name, endpoint_url=meta.endpoint_url, config=meta.config)
+
+
+def create_async_dynamodb_resource(
+    region: str,
+    credentials,
+    endpoint_url: Optional[str] = None,
+    max_connections: int = 100,
+    connect_timeout: float = 2.0,
+    read_timeout: float = 10.0,
+    max_attempts: int = 3
+) -> AsyncDynamoDBResource:
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+    )
+    return AsyncDynamoDBResource(AsyncDynamoDBClient(http_client, region, credentials, endpoint_url, max_attempts))
@@ -0,0 +1,210 @@
+"""Single-pass conversion between raw DynamoDB AttributeValue maps and the domain models.
+
+The Table resource deserializes every attribute generically (numbers become Decimal, maps are walked
+recursively) before the repositories walk the result again to build models. The decoders here know the
+order and user item shapes, read each attribute straight from its type tag and build models directly.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from pydantic import BaseModel
+from app.serverful.models.models import (
+    EventRecipient, NotificationEvent, NotificationEventType, Order, OrderItem, OrderSnapshot, OrderStatus, OrderSummary, PaymentDetails,
+    StatusChange, User
+)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_STATUSES = {status.value: status for status in OrderStatus}
+_EVENT_TYPES = {event_type.value: event_type for event_type in NotificationEventType}
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+# Request and response members that hold a single attribute map, a list of them,
+# or (for BatchGetItem) a per-table list of them.
+_ATTRIBUTE_MAP_FIELDS = {"Item", "Key", "ExclusiveStartKey", "ExpressionAttributeValues", "LastEvaluatedKey", "Attributes"}
+_ATTRIBUTE_MAP_LIST_FIELDS = {"Items", "Keys"}
+
+
+def _convert_attributes(value: Any, convert: Callable[[Any], Any]) -> Any:
+    if isinstance(value, list):
+        return [_convert_attributes(entry, convert) for entry in value]
+    if not isinstance(value, dict):
+        return value
+
+    converted = {}
+    for name, member in value.items():
+        if name in _ATTRIBUTE_MAP_FIELDS and isinstance(member, dict):
+            converted[name] = {attr: convert(attr_value) for attr, attr_value in member.items()}
+        elif name in _ATTRIBUTE_MAP_LIST_FIELDS and isinstance(member, list):
+            converted[name] = [{attr: convert(attr_value) for attr, attr_value in entry.items()} for entry in member]
+        elif name == "Responses" and isinstance(member, dict):
+            converted[name] = {
+                table: [{attr: convert(attr_value) for attr, attr_value in entry.items()} for entry in entries]
+                for table, entries in member.items()
+            }
+        else:
+            converted[name] = _convert_attributes(member, convert)
+    return converted
+
+
+def serialize_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Request parameters with plain Python values turned into AttributeValue maps, as a Table resource sends them."""
+    return _convert_attributes(params, _serializer.serialize)
+
+
+def deserialize_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Response with AttributeValue maps turned back into plain Python values, as a Table resource returns them."""
+    return _convert_attributes(payload, _deserializer.deserialize)
+
+
+def trusted(model: Type[ModelT], **values: Any) -> ModelT:
+    """Build a model from already-validated values without running validators.
+
+    Equivalent to model.model_construct(**values) when every field is supplied, but skips its per-field default scan.
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """AttributeValue for the scalar types used in keys and expression values."""
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    raise TypeError(f"Unsupported key or expression value type: {type(value).__name__}")
+
+
+def encode_map(values: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {name: encode_value(value) for name, value in values.items()}
+
+
+def decode_key(key: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Plain form of a LastEvaluatedKey; table and index keys are strings."""
+    return {name: value["S"] if "S" in value else Decimal(value["N"]) for name, value in key.items()}
+
+
+def sort_key(item: Dict[str, Dict[str, Any]]) -> str:
+    return item["SK"]["S"]
+
+
+def _optional_int(value: Optional[Dict[str, Any]]) -> Optional[int]:
+    return int(value["N"]) if value and "N" in value else None
+
+
+def decode_status_change(item: Dict[str, Dict[str, Any]]) -> StatusChange:
+    return trusted(
+        StatusChange,
+        from_status=_STATUSES[item["from_status"]["S"]],
+        to_status=_STATUSES[item["to_status"]["S"]],
+        changed_at=int(item["changed_at"]["N"]),
+        changed_by=item["changed_by"]["S"]
+    )
+
+
+def decode_order(item: Dict[str, Dict[str, Any]], history_items: Optional[List[Dict[str, Any]]] = None) -> Order:
+    """Order from its ORDERS#, DETAILS or STATUS# item plus any HIST# items, oldest first."""
+    items = []
+    for entry in item["items"]["L"]:
+        line = entry["M"]
+        items.append(trusted(
+            OrderItem,
+            product_id=line["product_id"]["S"],
+            product_name=line["product_name"]["S"],
+            quantity=int(line["quantity"]["N"]),
+            unit_price=Decimal(line["unit_price"]["S"]),
+            subtotal=Decimal(line["subtotal"]["S"])
+        ))
+
+    payment_details = None
+    payment = item.get("payment_details", {}).get("M")
+    if payment:
+        payment_details = trusted(
+            PaymentDetails,
+            payment_method=payment["payment_method"]["S"],
+            transaction_id=payment["transaction_id"]["S"],
+            payment_status=payment["payment_status"]["S"],
+            processed_at=_optional_int(payment.get("processed_at"))
+        )
+
+    # Orders written before history moved to HIST# items keep it inline
+    legacy_history = item.get("status_history", {}).get("L", [])
+    status_history = [decode_status_change(change["M"]) for change in legacy_history]
+    status_history.extend(decode_status_change(change) for change in history_items or [])
+
+    return trusted(
+        Order,
+        order_id=item["order_id"]["S"],
+        user_id=item["user_id"]["S"],
+        delivery_address=item["delivery_address"]["S"],
+        status=_STATUSES[item["order_status"]["S"]],
+        items=items,
+        total_amount=Decimal(item["total_amount"]["S"]),
+        payment_details=payment_details,
+        status_history=status_history,
+        created_at=int(item["created_at"]["N"]),
+        updated_at=int(item["updated_at"]["N"])
+    )
+
+
+def decode_order_summary(item: Dict[str, Dict[str, Any]]) -> OrderSummary:
+    return trusted(
+        OrderSummary,
+        order_id=item["order_id"]["S"],
+        user_id=item["user_id"]["S"],
+        status=_STATUSES[item["order_status"]["S"]],
+        total_amount=Decimal(item["total_amount"]["S"]),
+        created_at=int(item["created_at"]["N"]),
+        updated_at=int(item["updated_at"]["N"])
+    )
+
+
+def decode_status_counts(items: List[Dict[str, Dict[str, Any]]]) -> Dict[OrderStatus, int]:
+    """Sum per-status counters across counter shard items; statuses never counted are zero."""
+    counts = {status: 0 for status in OrderStatus}
+    for item in items:
+        for status in OrderStatus:
+            if status.value in item:
+                counts[status] += int(item[status.value]["N"])
+    return counts
+
+
+def decode_outbox_event(item: Dict[str, Dict[str, Any]]) -> NotificationEvent:
+    metadata = item.get("metadata")
+    order = item.get("order")
+    recipient = item.get("recipient")
+    return trusted(
+        NotificationEvent,
+        event_id=item["event_id"]["S"],
+        event_type=_EVENT_TYPES[item["event_type"]["S"]],
+        order_id=item["order_id"]["S"],
+        user_id=item["user_id"]["S"],
+        occurred_at=int(item["occurred_at"]["N"]),
+        metadata=_deserializer.deserialize(metadata) if metadata else {},
+        order=OrderSnapshot.model_validate(_deserializer.deserialize(order)) if order else None,
+        recipient=EventRecipient.model_validate(_deserializer.deserialize(recipient)) if recipient else None
+    )
+
+
+def decode_user(item: Dict[str, Dict[str, Any]]) -> User:
+    return trusted(
+        User,
+        user_id=item["user_id"]["S"],
+        first_name=item["first_name"]["S"],
+        last_name=item["last_name"]["S"],
+        email=item["email"]["S"],
+        password=item["password"]["S"],
+        role=item["role"]["S"] if "role" in item else "user",
+        created_at=_optional_int(item.get("created_at")) or 0,
+        updated_at=_optional_int(item.get("updated_at")) or 0
+    )
@@ -0,0 +1,507 @@
+"""DynamoDB stand-ins that keep the table in process memory or in a SQLite file.
+
+They accept the subset of the DynamoDB API the repositories issue: the PK/SK key patterns, the key condition,
+condition, update and projection expressions they build, Limit/ExclusiveStartKey paging and all-or-nothing
+transactions. The repositories therefore run unchanged for local load tests and single-node deployments.
+"""
+import bisect
+import json
+import re
+import sqlite3
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from app.serverful.repositories.attribute_codec import deserialize_response, serialize_request
+
+MAX_TRANSACT_ITEMS = 100
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_REQUESTS = 25
+
+Item = Dict[str, Dict[str, Any]]
+# (low, low_inclusive, high, high_inclusive); None leaves that side open
+SortKeyRange = Tuple[Optional[str], bool, Optional[str], bool]
+
+_FULL_RANGE: SortKeyRange = (None, True, None, True)
+_KEY_CONDITION = re.compile(r"^PK = (:\w+)(?: AND (.+))?$")
+_SORT_COMPARISON = re.compile(r"^SK (=|<=|<|>=|>) (:\w+)$")
+_SORT_BETWEEN = re.compile(r"^SK BETWEEN (:\w+) AND (:\w+)$")
+_SORT_BEGINS_WITH = re.compile(r"^begins_with\(SK, (:\w+)\)$")
+_ATTRIBUTE_FUNCTION = re.compile(r"^(attribute_exists|attribute_not_exists)\(([#\w]+)\)$")
+_COMPARISON = re.compile(r"^([#\w]+) (=|<>) (:\w+)$")
+_UPDATE_ACTION = re.compile(r"\b(SET|ADD|REMOVE)\b")
+
+
+def _client_error(operation: str, code: str, message: str, cancellation_reasons: Optional[List[Dict[str, str]]] = None) -> ClientError:
+    error_response: Dict[str, Any] = {"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": 400}}
+    if cancellation_reasons is not None:
+        error_response["CancellationReasons"] = cancellation_reasons
+    return ClientError(error_response, operation)
+
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with prefix, or None when there is none."""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    next_code = ord(prefix[-1]) + 1
+    # Surrogates cannot be encoded, so step over them
+    return prefix[:-1] + chr(0xE000 if 0xD800 <= next_code < 0xE000 else next_code)
+
+
+def _in_range(sk: str, sort_range: SortKeyRange) -> bool:
+    low, low_inclusive, high, high_inclusive = sort_range
+    if low is not None and (sk < low or (sk == low and not low_inclusive)):
+        return False
+    return high is None or sk < high or (sk == high and high_inclusive)
+
+
+class MemoryItemStore:
+    """Items per table and partition, with each partition's sort keys kept ordered for range reads"""
+
+    def __init__(self) -> None:
+        # table -> pk -> (ordered sort keys, items by sort key)
+        self._tables: Dict[str, Dict[str, Tuple[List[str], Dict[str, Item]]]] = {}
+
+    def get(self, table: str, pk: str, sk: str) -> Optional[Item]:
+        partition = self._tables.get(table, {}).get(pk)
+        return partition[1].get(sk) if partition else None
+
+    def query(
+        self, table: str, pk: str, sort_range: SortKeyRange, forward: bool, after: Optional[str], limit: Optional[int]
+    ) -> Iterator[Item]:
+        partition = self._tables.get(table, {}).get(pk)
+        if not partition:
+            return
+        sort_keys, items = partition
+        low, low_inclusive, high, high_inclusive = sort_range
+        start = 0 if low is None else (bisect.bisect_left if low_inclusive else bisect.bisect_right)(sort_keys, low)
+        end = len(sort_keys) if high is None else (bisect.bisect_right if high_inclusive else bisect.bisect_left)(sort_keys, high)
+        if after is not None:
+            if forward:
+                start = max(start, bisect.bisect_right(sort_keys, after))
+            else:
+                end = min(end, bisect.bisect_left(sort_keys, after))
+        indexes = range(start, end) if forward else range(end - 1, start - 1, -1)
+        for index in indexes[:limit]:
+            yield items[sort_keys[index]]
+
+    def scan(self, table: str, after: Optional[Tuple[str, str]], limit: Optional[int]) -> Iterator[Item]:
+        partitions = self._tables.get(table, {})
+        returned = 0
+        for pk in sorted(partitions):
+            if after is not None and pk < after[0]:
+                continue
+            sort_keys, items = partitions[pk]
+            start = bisect.bisect_right(sort_keys, after[1]) if after is not None and pk == after[0] else 0
+            for sk in sort_keys[start:]:
+                if limit is not None and returned >= limit:
+                    return
+                returned += 1
+                yield items[sk]
+
+    def write(self, puts: List[Tuple[str, Item]], deletes: List[Tuple[str, str, str]]) -> None:
+        for table, pk, sk in deletes:
+            partitions = self._tables.get(table, {})
+            partition = partitions.get(pk)
+            if partition and partition[1].pop(sk, None) is not None:
+                sort_keys = partition[0]
+                del sort_keys[bisect.bisect_left(sort_keys, sk)]
+                if not sort_keys:
+                    del partitions[pk]
+        for table, item in puts:
+            pk, sk = item["PK"]["S"], item["SK"]["S"]
+            sort_keys, items = self._tables.setdefault(table, {}).setdefault(pk, ([], {}))
+            if sk not in items:
+                bisect.insort(sort_keys, sk)
+            items[sk] = item
+
+    def count(self, table: str) -> int:
+        return sum(len(sort_keys) for sort_keys, _ in self._tables.get(table, {}).values())
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteItemStore:
+    """Items as JSON rows keyed by (table, pk, sk); SQLite compares TEXT bytewise, matching DynamoDB's sort order"""
+
+    def __init__(self, path: str) -> None:
+        # Calls are serialized by LocalDynamoDB's lock, so one connection is shared by the executor threads
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "table_name TEXT NOT NULL, pk TEXT NOT NULL, sk TEXT NOT NULL, item TEXT NOT NULL, "
+            "PRIMARY KEY (table_name, pk, sk)) WITHOUT ROWID"
+        )
+
+    def get(self, table: str, pk: str, sk: str) -> Optional[Item]:
+        row = self._connection.execute(
+            "SELECT item FROM items WHERE table_name = ? AND pk = ? AND sk = ?", (table, pk, sk)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self, table: str, pk: str, sort_range: SortKeyRange, forward: bool, after: Optional[str], limit: Optional[int]
+    ) -> Iterator[Item]:
+        low, low_inclusive, high, high_inclusive = sort_range
+        clauses, args = ["table_name = ?", "pk = ?"], [table, pk]
+        if low is not None:
+            clauses.append("sk >= ?" if low_inclusive else "sk > ?")
+            args.append(low)
+        if high is not None:
+            clauses.append("sk <= ?" if high_inclusive else "sk < ?")
+            args.append(high)
+        if after is not None:
+            clauses.append("sk > ?" if forward else "sk < ?")
+            args.append(after)
+        sql = f"SELECT item FROM items WHERE {' AND '.join(clauses)} ORDER BY sk {'ASC' if forward else 'DESC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        for (item,) in self._connection.execute(sql, args):
+            yield json.loads(item)
+
+    def scan(self, table: str, after: Optional[Tuple[str, str]], limit: Optional[int]) -> Iterator[Item]:
+        sql, args = "SELECT item FROM items WHERE table_name = ?", [table]
+        if after is not None:
+            sql += " AND (pk > ? OR (pk = ? AND sk > ?))"
+            args.extend([after[0], after[0], after[1]])
+        sql += " ORDER BY pk, sk"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        for (item,) in self._connection.execute(sql, args):
+            yield json.loads(item)
+
+    def write(self, puts: List[Tuple[str, Item]], deletes: List[Tuple[str, str, str]]) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany("DELETE FROM items WHERE table_name = ? AND pk = ? AND sk = ?", deletes)
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO items (table_name, pk, sk, item) VALUES (?, ?, ?, ?)",
+                [(table, item["PK"]["S"], item["SK"]["S"], json.dumps(item, separators=(",", ":"))) for table, item in puts]
+            )
+
+    def count(self, table: str) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM items WHERE table_name = ?", (table,)).fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class LocalDynamoDB:
+    """Evaluates DynamoDB JSON API requests (raw AttributeValue maps in and out) against an item store"""
+
+    def __init__(self, store) -> None:
+        self.store = store
+        self._lock = threading.Lock()
+        self._operations = {
+            "Query": self._query,
+            "Scan": self._scan,
+            "GetItem": self._get_item,
+            "BatchGetItem": self._batch_get_item,
+            "BatchWriteItem": self._batch_write_item,
+            "TransactWriteItems": self._transact_write_items,
+            "DescribeTable": self._describe_table
+        }
+
+    def call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return self._operations[operation](params)
+
+    def close(self) -> None:
+        with self._lock:
+            self.store.close()
+
+    def _query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        values = params.get("ExpressionAttributeValues", {})
+        match = _KEY_CONDITION.match(params.get("KeyConditionExpression", ""))
+        if not match:
+            raise _client_error("Query", "ValidationException", f"Unsupported key condition: {params.get('KeyConditionExpression')}")
+        sort_range = self._sort_range(match.group(2), values)
+        start_key = params.get("ExclusiveStartKey")
+        items = list(self.store.query(
+            params["TableName"],
+            values[match.group(1)]["S"],
+            sort_range,
+            params.get("ScanIndexForward", True),
+            start_key["SK"]["S"] if start_key else None,
+            params.get("Limit")
+        ))
+        return self._page("Query", params, items)
+
+    def _scan(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        start_key = params.get("ExclusiveStartKey")
+        after = (start_key["PK"]["S"], start_key["SK"]["S"]) if start_key else None
+        items = list(self.store.scan(params["TableName"], after, params.get("Limit")))
+        return self._page("Scan", params, items)
+
+    def _page(self, operation: str, params: Dict[str, Any], items: List[Item]) -> Dict[str, Any]:
+        # Like DynamoDB, Limit counts items read before the filter, and a full page always reports where it stopped
+        scanned_count = len(items)
+        last_key = {"PK": items[-1]["PK"], "SK": items[-1]["SK"]} if items and scanned_count == params.get("Limit") else None
+        if params.get("FilterExpression"):
+            items = [item for item in items if self._condition_holds(operation, params["FilterExpression"], item, params)]
+        items = self._project(items, params)
+        response = {"Items": items, "Count": len(items), "ScannedCount": scanned_count}
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def _get_item(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key = params["Key"]
+        item = self.store.get(params["TableName"], key["PK"]["S"], key["SK"]["S"])
+        return {"Item": self._project([item], params)[0]} if item else {}
+
+    def _batch_get_item(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_items = params["RequestItems"]
+        if sum(len(request["Keys"]) for request in request_items.values()) > MAX_BATCH_GET_KEYS:
+            raise _client_error("BatchGetItem", "ValidationException", "Too many items requested for the BatchGetItem call")
+        responses = {}
+        for table, request in request_items.items():
+            items = [self.store.get(table, key["PK"]["S"], key["SK"]["S"]) for key in request["Keys"]]
+            responses[table] = self._project([item for item in items if item], request)
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def _batch_write_item(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_items = params["RequestItems"]
+        if sum(len(requests) for requests in request_items.values()) > MAX_BATCH_WRITE_REQUESTS:
+            raise _client_error("BatchWriteItem", "ValidationException", f"Member must have length less than or equal to {MAX_BATCH_WRITE_REQUESTS}")
+        puts, deletes = [], []
+        for table, requests in request_items.items():
+            for request in requests:
+                if "PutRequest" in request:
+                    puts.append((table, dict(request["PutRequest"]["Item"])))
+                else:
+                    key = request["DeleteRequest"]["Key"]
+                    deletes.append((table, key["PK"]["S"], key["SK"]["S"]))
+        self.store.write(puts, deletes)
+        return {"UnprocessedItems": {}}
+
+    def _describe_table(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"Table": {"TableName": params["TableName"], "TableStatus": "ACTIVE", "ItemCount": self.store.count(params["TableName"])}}
+
+    def _transact_write_items(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        actions = params["TransactItems"]
+        if len(actions) > MAX_TRANSACT_ITEMS:
+            raise _client_error("TransactWriteItems", "ValidationException", f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}")
+
+        puts, deletes, reasons, targets = [], [], [], set()
+        for action in actions:
+            (kind, body), = action.items()
+            table = body["TableName"]
+            key = body["Item"] if kind == "Put" else body["Key"]
+            target = (table, key["PK"]["S"], key["SK"]["S"])
+            if target in targets:
+                raise _client_error("TransactWriteItems", "ValidationException", "Transaction request cannot include multiple operations on one item")
+            targets.add(target)
+
+            current = self.store.get(*target)
+            if "ConditionExpression" in body and not self._condition_holds("TransactWriteItems", body["ConditionExpression"], current or {}, body):
+                reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+                continue
+            reasons.append({"Code": "None"})
+
+            if kind == "Put":
+                puts.append((table, dict(body["Item"])))
+            elif kind == "Delete":
+                deletes.append(target)
+            elif kind == "Update":
+                puts.append((table, self._updated(body, current or {"PK": key["PK"], "SK": key["SK"]})))
+
+        if any(reason["Code"] != "None" for reason in reasons):
+            summary = ", ".join(reason["Code"] for reason in reasons)
+            raise _client_error(
+                "TransactWriteItems",
+                "TransactionCanceledException",
+                f"Transaction cancelled, please refer cancellation reasons for specific reasons [{summary}]",
+                reasons
+            )
+        self.store.write(puts, deletes)
+        return {}
+
+    def _sort_range(self, condition: Optional[str], values: Dict[str, Any]) -> SortKeyRange:
+        if not condition:
+            return _FULL_RANGE
+        match = _SORT_COMPARISON.match(condition)
+        if match:
+            operator, value = match.group(1), values[match.group(2)]["S"]
+            return {
+                "=": (value, True, value, True),
+                "<": (None, True, value, False),
+                "<=": (None, True, value, True),
+                ">": (value, False, None, True),
+                ">=": (value, True, None, True)
+            }[operator]
+        match = _SORT_BETWEEN.match(condition)
+        if match:
+            return values[match.group(1)]["S"], True, values[match.group(2)]["S"], True
+        match = _SORT_BEGINS_WITH.match(condition)
+        if match:
+            prefix = values[match.group(1)]["S"]
+            return prefix, True, _prefix_end(prefix), False
+        raise _client_error("Query", "ValidationException", f"Unsupported sort key condition: {condition}")
+
+    def _condition_holds(self, operation: str, expression: str, item: Item, params: Dict[str, Any]) -> bool:
+        names = params.get("ExpressionAttributeNames", {})
+        values = params.get("ExpressionAttributeValues", {})
+        for clause in expression.split(" AND "):
+            clause = clause.strip()
+            match = _ATTRIBUTE_FUNCTION.match(clause)
+            if match:
+                exists = names.get(match.group(2), match.group(2)) in item
+                if exists != (match.group(1) == "attribute_exists"):
+                    return False
+                continue
+            match = _COMPARISON.match(clause)
+            if not match:
+                raise _client_error(operation, "ValidationException", f"Unsupported condition: {clause}")
+            current = item.get(names.get(match.group(1), match.group(1)))
+            equal = current is not None and self._equal(current, values[match.group(3)])
+            if equal != (match.group(2) == "="):
+                return False
+        return True
+
+    def _updated(self, body: Dict[str, Any], current: Item) -> Item:
+        names = body.get("ExpressionAttributeNames", {})
+        values = body.get("ExpressionAttributeValues", {})
+        item = dict(current)
+        parts = _UPDATE_ACTION.split(body["UpdateExpression"])
+        for action, clauses in zip(parts[1::2], parts[2::2]):
+            for clause in (clause.strip() for clause in clauses.split(",")):
+                if action == "SET":
+                    name, placeholder = (part.strip() for part in clause.split("="))
+                    item[names.get(name, name)] = values[placeholder]
+                elif action == "ADD":
+                    name, placeholder = clause.split()
+                    name = names.get(name, name)
+                    delta = values[placeholder]
+                    if "N" not in delta:
+                        raise _client_error("TransactWriteItems", "ValidationException", "Only numeric ADD is supported")
+                    base = Decimal(item[name]["N"]) if name in item else Decimal(0)
+                    item[name] = {"N": str(base + Decimal(delta["N"]))}
+                else:
+                    item.pop(names.get(clause, clause), None)
+        return item
+
+    def _project(self, items: List[Item], params: Dict[str, Any]) -> List[Item]:
+        projection = params.get("ProjectionExpression")
+        if not projection:
+            return items
+        names = params.get("ExpressionAttributeNames", {})
+        attributes = [names.get(name.strip(), name.strip()) for name in projection.split(",")]
+        return [{name: item[name] for name in attributes if name in item} for item in items]
+
+    @staticmethod
+    def _equal(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+        if "N" in left and "N" in right:
+            return Decimal(left["N"]) == Decimal(right["N"])
+        return left == right
+
+
+class LocalDynamoDBClient:
+    """Client over a LocalDynamoDB with the same calling convention as AsyncDynamoDBClient.
+
+    Calls are blocking, so run_io moves them onto the I/O executor; with typed=False AttributeValue maps pass through untouched.
+    """
+
+    def __init__(self, engine: LocalDynamoDB, typed: bool = True) -> None:
+        self.engine = engine
+        self.typed = typed
+
+    def query(self, **kwargs) -> Dict[str, Any]:
+        return self._call("Query", kwargs)
+
+    def scan(self, **kwargs) -> Dict[str, Any]:
+        return self._call("Scan", kwargs)
+
+    def get_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("GetItem", kwargs)
+
+    def batch_get_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("BatchGetItem", kwargs)
+
+    def batch_write_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("BatchWriteItem", kwargs)
+
+    def transact_write_items(self, **kwargs) -> Dict[str, Any]:
+        return self._call("TransactWriteItems", kwargs)
+
+    def describe_table(self, **kwargs) -> Dict[str, Any]:
+        return self._call("DescribeTable", kwargs)
+
+    def _call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.engine.call(operation, serialize_request(params) if self.typed else params)
+        return deserialize_response(response) if self.typed else response
+
+
+class InlineLocalDynamoDBClient(LocalDynamoDBClient):
+    """Coroutine flavour for the in-memory store: its calls never block, so run_io awaits them on the loop without a thread hop"""
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        return self._call("Query", kwargs)
+
+    async def scan(self, **kwargs) -> Dict[str, Any]:
+        return self._call("Scan", kwargs)
+
+    async def get_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("GetItem", kwargs)
+
+    async def batch_get_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("BatchGetItem", kwargs)
+
+    async def batch_write_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call("BatchWriteItem", kwargs)
+
+    async def transact_write_items(self, **kwargs) -> Dict[str, Any]:
+        return self._call("TransactWriteItems", kwargs)
+
+    async def describe_table(self, **kwargs) -> Dict[str, Any]:
+        return self._call("DescribeTable", kwargs)
+
+
+class LocalTable:
+
+    def __init__(self, client: LocalDynamoDBClient, table_name: str) -> None:
+        self.client = client
+        self.table_name = table_name
+
+    def query(self, **kwargs):
+        return self.client.query(TableName=self.table_name, **kwargs)
+
+    def scan(self, **kwargs):
+        return self.client.scan(TableName=self.table_name, **kwargs)
+
+    def get_item(self, **kwargs):
+        return self.client.get_item(TableName=self.table_name, **kwargs)
+
+
+class LocalDynamoDBResource:
+    """Stand-in for a boto3 DynamoDB resource backed by a LocalDynamoDB"""
+
+    def __init__(self, engine: LocalDynamoDB, inline: bool = False) -> None:
+        client_class = InlineLocalDynamoDBClient if inline else LocalDynamoDBClient
+        self.engine = engine
+        self.meta = SimpleNamespace(client=client_class(engine))
+        self.raw_client = client_class(engine, typed=False)
+
+    def Table(self, table_name: str) -> LocalTable:
+        return LocalTable(self.meta.client, table_name)
+
+    def batch_get_item(self, **kwargs):
+        return self.meta.client.batch_get_item(**kwargs)
+
+    async def close(self) -> None:
+        self.engine.close()
+
+
+def create_local_dynamodb_resource(backend: str, sqlite_path: str = "") -> LocalDynamoDBResource:
+    if backend == "memory":
+        return LocalDynamoDBResource(LocalDynamoDB(MemoryItemStore()), inline=True)
+    if backend == "sqlite":
+        return LocalDynamoDBResource(LocalDynamoDB(SqliteItemStore(sqlite_path)))
+    raise ValueError(f"Unknown local storage backend: {backend}")
@@ -0,0 +1,42 @@
+import gzip
+import os
+import tempfile
+from typing import Optional
+from app.serverful.models.models import Order
+
+
+class LocalOrderArchive:
+    """Cold tier for orders moved out of DynamoDB: one gzip-compressed JSON object per order.
+
+    Objects are keyed like an object store (orders/<prefix>/<order_id>.json.gz) under root,
+    so the layout carries over unchanged to a bucket. Calls block; run them through run_io.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def put(self, order: Order) -> None:
+        path = self._path(order.order_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary name first so a crash never leaves a truncated object behind
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+                compressed.write(order.model_dump_json().encode("utf-8"))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, order_id: str) -> Optional[Order]:
+        # Lookups come straight from request paths; anything that is not a plain name cannot be an archived order
+        if not order_id or order_id.startswith(".") or os.path.basename(order_id) != order_id:
+            return None
+        try:
+            with gzip.open(self._path(order_id), "rb") as compressed:
+                return Order.model_validate_json(compressed.read())
+        except FileNotFoundError:
+            return None
+
+    def _path(self, order_id: str) -> str:
+        return os.path.join(self.root, "orders", order_id[:2], f"{order_id}.json.gz")
@@ -1,19 +1,200 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 import asyncio
-from datetime import datetime, timezone
-from decimal import Decimal
-from app.serverful.models.models import Order, OrderItem, PaymentDetails, StatusChange, OrderStatus
+import heapq
+import json
+import random
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import date, datetime, timezone
+from app.serverful.models.models import EventRecipient, NotificationEvent, NotificationEventType, Order, OrderSnapshot, OrderSummary, PaymentDetails, StatusChange, OrderStatus
+from app.serverful.repositories.async_dynamodb import low_level_client
+from app.serverful.repositories.attribute_codec import decode_key, decode_order, decode_order_summary, decode_outbox_event, decode_status_counts, encode_map, sort_key
+from app.serverful.repositories.order_archive import LocalOrderArchive
+from botocore.exceptions import ClientError
+from app.serverful.config.config import settings
+from app.serverful.utils.cache import TTLCache
+from app.serverful.utils.errors import ApplicationError, ErrorCode
+from app.serverful.utils.io_utils import run_io
+from app.serverful.utils.metrics import metrics
+from app.serverful.utils.single_flight import SingleFlight
+from app.serverful.utils.time_utils import current_timestamp
+
+# Attributes list views need; PK and SK stay in so merged pages can be ordered and resumed
+SUMMARY_PROJECTION = "PK, SK, order_id, user_id, order_status, total_amount, created_at, updated_at"
+
+MAX_TRANSACT_ITEMS = 100
+TRANSACT_CONFLICT_RETRIES = 3
+
+STATS_PK = "STATS#STATUS"
+OUTBOX_PAGE_SIZE = 100
+
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_GET_MAX_RETRIES = 8
+BATCH_WRITE_CHUNK_SIZE = 25
+BATCH_WRITE_MAX_RETRIES = 8
+
+
+def status_partition_key(status: OrderStatus, order_id: str, shard_count: int) -> str:
+    """Partition key for an order in a status partition; one shard keeps the unsuffixed STATUS#<status> key."""
+    if shard_count <= 1:
+        return f"STATUS#{status.value}"
+    return f"STATUS#{status.value}#{zlib.crc32(order_id.encode('utf-8')) % shard_count}"
+
+
+def stats_key(day: Optional[str], shard: int, shard_count: int) -> Dict[str, str]:
+    """Key of a status counter item: TOTAL or DAY#<yyyy-mm-dd> under STATS#STATUS, suffixed with the shard when counters are sharded.
+
+    The shard goes in the partition key so counter writes spread over partitions, not just over items.
+    """
+    pk = STATS_PK if shard_count <= 1 else f"{STATS_PK}#{shard}"
+    return {"PK": pk, "SK": f"DAY#{day}" if day else "TOTAL"}
+
+
+def outbox_partition_key(order_id: str, shard_count: int) -> str:
+    """Partition key for an order's pending events; one shard keeps the unsuffixed OUTBOX key."""
+    if shard_count <= 1:
+        return "OUTBOX"
+    return f"OUTBOX#{zlib.crc32(order_id.encode('utf-8')) % shard_count}"
+
+
+def outbox_partition_keys(shard_count: int) -> List[str]:
+    if shard_count <= 1:
+        return ["OUTBOX"]
+    return [f"OUTBOX#{shard}" for shard in range(shard_count)]
+
+
+def _created_day(order: Order) -> str:
+    return datetime.fromtimestamp(order.created_at, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _is_transaction_conflict(error: ClientError) -> bool:
+    reasons = [reason.get("Code") for reason in error.response.get("CancellationReasons", [])]
+    return (
+        error.response["Error"]["Code"] == "TransactionCanceledException"
+        and "TransactionConflict" in reasons
+        and "ConditionalCheckFailed" not in reasons
+    )
+
+
+def _copy_order(order: Optional[Order]) -> Optional[Order]:
+    return order.model_copy(deep=True) if order is not None else None
+
+
+def status_partition_keys(status: OrderStatus, shard_count: int) -> List[str]:
+    if shard_count <= 1:
+        return [f"STATUS#{status.value}"]
+    return [f"STATUS#{status.value}#{shard}" for shard in range(shard_count)]
 
 
 class OrderRepository:
 
-    def __init__(self, dynamodb_resource, table_name):
+    def __init__(
+        self,
+        dynamodb_resource,
+        table_name,
+        status_shards: Optional[int] = None,
+        cache: Optional[TTLCache] = None,
+        raw_client=None,
+        archive: Optional[LocalOrderArchive] = None,
+        stats_shards: Optional[int] = None,
+        outbox_shards: Optional[int] = None,
+        event_snapshots: bool = False
+    ):
         self.dynamodb_resource = dynamodb_resource
         self.table = dynamodb_resource.Table(table_name)
         self.client = dynamodb_resource.meta.client
+        # Writes go through the resource's client; reads use a low-level client and decode raw attributes themselves
+        self.raw_client = raw_client if raw_client is not None else low_level_client(dynamodb_resource)
+        self.status_shards = status_shards or settings.STATUS_SHARD_COUNT
+        self.stats_shards = stats_shards or settings.STATS_COUNTER_SHARDS
+        self.outbox_shards = outbox_shards or settings.OUTBOX_SHARD_COUNT
+        # Outbox events carry the order snapshot and recipient so consumers need not read them back
+        self.event_snapshots = event_snapshots
+        # Called with the events of every committed write that carried outbox items
+        self.outbox_listener: Optional[Callable[[List[NotificationEvent]], None]] = None
+        self.cache = cache
+        self.archive = archive
+        self.single_flight = SingleFlight("order_reads")
+        # Per-order invalidation generation, tracked only while a load for that order is in flight
+        self._generations: Dict[str, int] = {}
+        self._loads: Counter = Counter()
 
-    async def create(self, order: Order) -> None:
-        date_prefix = datetime.fromtimestamp(order.created_at, timezone.utc).strftime("%Y-%m-%d")
+    async def create(
+        self,
+        order: Order,
+        event_type: Optional[NotificationEventType] = None,
+        recipient: Optional[EventRecipient] = None
+    ) -> None:
+        """Write the order; with event_type, its event is written to the outbox in the same transaction."""
+        events = [self._order_event(event_type, order, recipient)] if event_type else []
+        await self._transact(self._create_actions(order), events, self._created_deltas([order]))
+        self.invalidate(order.order_id)
+
+    async def create_many(
+        self,
+        orders: List[Order],
+        event_type: Optional[NotificationEventType] = None,
+        recipient: Optional[EventRecipient] = None
+    ) -> List[Optional[Exception]]:
+        """Write orders packed into as few transactions as possible; returns the error for each order, or None."""
+        chunks = self._transaction_chunks(orders, 4 if event_type else 3)
+        semaphore = asyncio.Semaphore(settings.BULK_WRITE_CONCURRENCY)
+        
+        async def write_chunk(chunk: List[Order]) -> List[Optional[Exception]]:
+            async with semaphore:
+                try:
+                    await self._transact(
+                        [action for order in chunk for action in self._create_actions(order)],
+                        [self._order_event(event_type, order, recipient) for order in chunk] if event_type else [],
+                        self._created_deltas(chunk)
+                    )
+                    return [None] * len(chunk)
+                except ClientError as e:
+                    if len(chunk) == 1:
+                        return [e]
+                
+                # A cancelled transaction drops every order in it, so retry them alone to isolate the failing ones
+                return list(await asyncio.gather(*(self._create_one(order, event_type, recipient) for order in chunk)))
+        
+        results = await asyncio.gather(*(write_chunk(chunk) for chunk in chunks))
+        return [error for chunk_errors in results for error in chunk_errors]
+
+    def _transaction_chunks(self, orders: List[Order], actions_per_order: int = 3) -> List[List[Order]]:
+        # Each order takes three Puts, plus one for its outbox event; every transaction also carries
+        # a TOTAL counter update and one per creation day
+        orders_per_transaction = (MAX_TRANSACT_ITEMS - 2) // actions_per_order
+        chunks: List[List[Order]] = []
+        days: set = set()
+        for order in orders:
+            day = _created_day(order)
+            # Orders from many different days each add a counter update, so those chunks close early
+            if (
+                not chunks
+                or len(chunks[-1]) == orders_per_transaction
+                or actions_per_order * (len(chunks[-1]) + 1) + 1 + len(days | {day}) > MAX_TRANSACT_ITEMS
+            ):
+                chunks.append([])
+                days = set()
+            chunks[-1].append(order)
+            days.add(day)
+        return chunks
+
+    async def _create_one(
+        self,
+        order: Order,
+        event_type: Optional[NotificationEventType] = None,
+        recipient: Optional[EventRecipient] = None
+    ) -> Optional[Exception]:
+        try:
+            await self.create(order, event_type, recipient)
+        except ClientError as e:
+            return e
+        return None
+
+    def _create_actions(self, order: Order) -> List[Dict[str, Any]]:
+        date_prefix = _created_day(order)
         
         base_item = {
             "order_id": order.order_id,
@@ -29,8 +210,7 @@ class OrderRepository:
             } for item in order.items],
             "total_amount": str(order.total_amount),
             "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "status_history": []
+            "updated_at": order.updated_at
         }
         
         if order.payment_details:
@@ -41,24 +221,63 @@ class OrderRepository:
                 "processed_at": order.payment_details.processed_at
             }
         
-        item_by_status = {"PK": f"STATUS#{order.status.value}", "SK": f"{date_prefix}#ORDER#{order.order_id}", **base_item}
+        item_by_status = {"PK": status_partition_key(order.status, order.order_id, self.status_shards), "SK": f"{date_prefix}#ORDER#{order.order_id}", **base_item}
         item_by_user = {"PK": f"ORDERS#{order.user_id}", "SK": f"ORDER#{order.order_id}", **base_item}
         item_by_order_id = {"PK": f"ORDER#{order.order_id}", "SK": "DETAILS", **base_item}
         
-        def do_transaction():
-            self.client.transact_write_items(
-                TransactItems=[
-                    {"Put": {"TableName": self.table.table_name, "Item": item_by_status}},
-                    {"Put": {"TableName": self.table.table_name, "Item": item_by_user}},
-                    {"Put": {"TableName": self.table.table_name, "Item": item_by_order_id}}
-                ]
-            )
+        return [
+            {"Put": {"TableName": self.table.table_name, "Item": item_by_status}},
+            {"Put": {"TableName": self.table.table_name, "Item": item_by_user}},
+            {"Put": {"TableName": self.table.table_name, "Item": item_by_order_id}}
+        ]
+
+    async def get_by_user_and_order(self, user_id: str, order_id: str, include_history: bool = False) -> Optional[Order]:
+        cached = self._get_cached(order_id, include_history)
+        if cached is not None:
+            # Cache entries are keyed by order alone, so only the owner's lookups may be answered from them
+            return cached if cached.user_id == user_id else None
         
-        await asyncio.to_thread(do_transaction)
+        async def load() -> Optional[Order]:
+            generation = self._begin_load(order_id)
+            try:
+                order = await self._load_by_user_and_order(user_id, order_id, include_history)
+                if order is None:
+                    order = await self._load_archived(order_id, include_history)
+                    order = order if order is not None and order.user_id == user_id else None
+                self._set_cached(order, include_history, generation)
+                return order
+            finally:
+                self._end_load(order_id)
+        
+        return await self.single_flight.do(("order", order_id, include_history, user_id), load, copy=_copy_order)
+
+    async def get_by_order_id(self, order_id: str, include_history: bool = False) -> Optional[Order]:
+        cached = self._get_cached(order_id, include_history)
+        if cached is not None:
+            return cached
+        
+        async def load() -> Optional[Order]:
+            generation = self._begin_load(order_id)
+            try:
+                order = await self._load_by_order_id(order_id, include_history) or await self._load_archived(order_id, include_history)
+                self._set_cached(order, include_history, generation)
+                return order
+            finally:
+                self._end_load(order_id)
+        
+        return await self.single_flight.do(("order", order_id, include_history), load, copy=_copy_order)
+
+    def invalidate(self, order_id: str) -> None:
+        # Loads already in flight may have read the old image; bumping the generation stops them caching it
+        if order_id in self._generations:
+            self._generations[order_id] += 1
+        self.single_flight.forget(lambda key: key[0] == "order" and key[1] == order_id)
+        if self.cache is not None:
+            self.cache.invalidate((order_id, False))
+            self.cache.invalidate((order_id, True))
 
-    async def get_by_user_and_order(self, user_id: str, order_id: str) -> Optional[Order]:
-        response = await asyncio.to_thread(
-            self.table.query,
+    async def _load_by_user_and_order(self, user_id: str, order_id: str, include_history: bool) -> Optional[Order]:
+        query = self._query(
             KeyConditionExpression="PK = :pk AND SK = :sk",
             ExpressionAttributeValues={
                 ":pk": f"ORDERS#{user_id}",
@@ -66,59 +285,204 @@ class OrderRepository:
             }
         )
         
+        if not include_history:
+            response = await query
+            items = response.get("Items", [])
+            return decode_order(items[0]) if items else None
+        
+        response, history_items = await asyncio.gather(query, self._get_history_items(order_id))
+        
         items = response.get("Items", [])
-        return self._unmarshal_order(items[0]) if items else None
+        return decode_order(items[0], history_items) if items else None
 
-    async def get_by_order_id(self, order_id: str) -> Optional[Order]:
-        response = await asyncio.to_thread(
-            self.table.query,
-            KeyConditionExpression="PK = :pk AND SK = :sk",
-            ExpressionAttributeValues={
-                ":pk": f"ORDER#{order_id}",
-                ":sk": "DETAILS"
-            }
-        )
+    async def _load_by_order_id(self, order_id: str, include_history: bool) -> Optional[Order]:
+        if include_history:
+            # DETAILS sorts before HIST#, so one query returns the order followed by its history in time order
+            response = await self._query(
+                KeyConditionExpression="PK = :pk",
+                ExpressionAttributeValues={
+                    ":pk": f"ORDER#{order_id}"
+                }
+            )
+        else:
+            response = await self._query(
+                KeyConditionExpression="PK = :pk AND SK = :sk",
+                ExpressionAttributeValues={
+                    ":pk": f"ORDER#{order_id}",
+                    ":sk": "DETAILS"
+                }
+            )
         
         items = response.get("Items", [])
-        return self._unmarshal_order(items[0]) if items else None
+        if not items or (include_history and sort_key(items[0]) != "DETAILS"):
+            return None
+        
+        return decode_order(items[0], items[1:])
+
+    async def _load_archived(self, order_id: str, include_history: bool) -> Optional[Order]:
+        if self.archive is None:
+            return None
+        order = await run_io(self.archive.get, order_id)
+        if order is not None:
+            metrics.increment("order_archive_reads")
+            if not include_history:
+                order.status_history = []
+        return order
+
+    def _get_cached(self, order_id: str, include_history: bool) -> Optional[Order]:
+        if self.cache is None:
+            return None
+        order = self.cache.get((order_id, include_history))
+        return order.model_copy(deep=True) if order is not None else None
+
+    def _begin_load(self, order_id: str) -> int:
+        self._loads[order_id] += 1
+        return self._generations.setdefault(order_id, 0)
+
+    def _end_load(self, order_id: str) -> None:
+        self._loads[order_id] -= 1
+        if not self._loads[order_id]:
+            del self._loads[order_id]
+            del self._generations[order_id]
+
+    def _set_cached(self, order: Optional[Order], include_history: bool, generation: int) -> None:
+        if self.cache is None or order is None:
+            return
+        if self._generations.get(order.order_id) != generation:
+            metrics.increment("order_cache_stale_loads_skipped")
+            return
+        self.cache.set((order.order_id, include_history), order.model_copy(deep=True))
+
+    async def get_many(self, order_ids: List[str]) -> List[Order]:
+        """Fetch DETAILS for each order id with BatchGetItem; missing orders are left out, the rest keep request order."""
+        unique_ids = list(dict.fromkeys(order_ids))
+        chunks = [unique_ids[i:i + BATCH_GET_CHUNK_SIZE] for i in range(0, len(unique_ids), BATCH_GET_CHUNK_SIZE)]
+        semaphore = asyncio.Semaphore(settings.QUERY_FANOUT_CONCURRENCY)
+        
+        async def get_chunk(chunk: List[str]) -> List[dict]:
+            async with semaphore:
+                return await self._batch_get([encode_map({"PK": f"ORDER#{order_id}", "SK": "DETAILS"}) for order_id in chunk])
+        
+        found = {}
+        for items in await asyncio.gather(*(get_chunk(chunk) for chunk in chunks)):
+            for item in items:
+                order = decode_order(item)
+                found[order.order_id] = order
+        
+        return [found[order_id] for order_id in unique_ids if order_id in found]
 
-    async def get_by_user(self, user_id: str) -> List[Order]:
-        response = await asyncio.to_thread(
-            self.table.query,
+    async def get_by_user(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[Order, OrderSummary]], Optional[Dict[str, Any]]]:
+        response = await self._query(
+            **self._page_kwargs(limit, start_key, summary),
             KeyConditionExpression="PK = :pk",
             ExpressionAttributeValues={
                 ":pk": f"ORDERS#{user_id}"
             }
         )
         
+        unmarshal = decode_order_summary if summary else decode_order
         items = response.get("Items", [])
-        return [self._unmarshal_order(item) for item in items]
+        return [unmarshal(item) for item in items], response.get("LastEvaluatedKey")
 
-    async def get_by_status(self, status: OrderStatus) -> List[Order]:
-        response = await asyncio.to_thread(
-            self.table.query,
-            KeyConditionExpression="PK = :pk",
-            ExpressionAttributeValues={
-                ":pk": f"STATUS#{status.value}"
-            },
-            ScanIndexForward=False
+    async def get_by_status(
+        self,
+        status: OrderStatus,
+        limit: Optional[int] = None,
+        cursor_state: Optional[Dict[str, Any]] = None,
+        summary: bool = False,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Tuple[List[Union[Order, OrderSummary]], Optional[Dict[str, Any]]]:
+        """Page through orders in a status, optionally only those created between date_from and date_to inclusive (UTC)."""
+        partition_keys = status_partition_keys(status, self.status_shards)
+        key = ("status", status.value, limit, json.dumps(cursor_state, sort_keys=True, default=str), summary, date_from, date_to)
+        return await self.single_flight.do(
+            key, lambda: self._merge_partitions(partition_keys, limit, cursor_state, summary, date_from, date_to)
         )
+
+    async def get_all(
+        self,
+        limit: int,
+        cursor_state: Optional[Dict[str, Any]] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[Order, OrderSummary]], Optional[Dict[str, Any]]]:
+        partition_keys = [pk for status in OrderStatus for pk in status_partition_keys(status, self.status_shards)]
+        return await self._merge_partitions(partition_keys, limit, cursor_state, summary)
+
+    async def iter_all(self, page_size: int) -> AsyncIterator[List[Order]]:
+        cursor_state = None
+        while True:
+            orders, cursor_state = await self.get_all(page_size, cursor_state)
+            if orders:
+                yield orders
+            if cursor_state is None:
+                return
+
+    async def transition(
+        self,
+        order_id: str,
+        expected_from: List[OrderStatus],
+        to: OrderStatus,
+        changed_by: str,
+        user_id: Optional[str] = None,
+        payment_details: Optional[PaymentDetails] = None,
+        include_history: bool = False,
+        event_type: Optional[NotificationEventType] = None,
+        recipient: Optional[EventRecipient] = None
+    ) -> Order:
+        """Move an order from one of expected_from to `to` and return the new image.
+
+        Passing user_id reads the customer's copy, so orders owned by someone else are not found.
+        With event_type, the change's event is written to the outbox in the same transaction.
+        """
+        key = {"PK": f"ORDERS#{user_id}", "SK": f"ORDER#{order_id}"} if user_id else {"PK": f"ORDER#{order_id}", "SK": "DETAILS"}
+        read = run_io(self.raw_client.get_item, TableName=self.table.table_name, Key=encode_map(key), ConsistentRead=True)
+        if include_history:
+            response, history_items = await asyncio.gather(read, self._get_history_items(order_id))
+        else:
+            response, history_items = await read, []
         
-        items = response.get("Items", [])
-        return [self._unmarshal_order(item) for item in items]
+        item = response.get("Item")
+        if not item:
+            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
+        
+        order = decode_order(item, history_items)
+        old_status = order.status
+        if old_status not in expected_from:
+            raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
+        
+        now = current_timestamp()
+        order.status = to
+        order.updated_at = now
+        order.status_history.append(StatusChange(from_status=old_status, to_status=to, changed_at=now, changed_by=changed_by))
+        if payment_details:
+            order.payment_details = payment_details
+        
+        try:
+            await self.update_status(order, old_status, self._order_event(event_type, order, recipient) if event_type else None)
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
+            raise
+        
+        return order
 
-    async def get_all(self) -> List[Order]:
-        all_orders = []
-        for status in OrderStatus:
-            orders = await self.get_by_status(status)
-            all_orders.extend(orders)
-        return all_orders
+    async def update_status(self, order: Order, old_status: OrderStatus, event: Optional[NotificationEvent] = None) -> None:
+        """Move the order to its new status; order.status_history[-1] is the change being recorded.
 
-    async def update_status(self, order: Order, old_status: OrderStatus) -> None:
-        date_prefix = datetime.fromtimestamp(order.created_at, timezone.utc).strftime("%Y-%m-%d")
+        The write is conditioned on DETAILS still holding old_status, so a concurrent transition
+        cancels the transaction instead of leaving a stale STATUS# copy behind.
+        """
+        date_prefix = _created_day(order)
         
         new_item_by_status = {
-            "PK": f"STATUS#{order.status.value}",
+            "PK": status_partition_key(order.status, order.order_id, self.status_shards),
             "SK": f"{date_prefix}#ORDER#{order.order_id}",
             "order_id": order.order_id,
             "user_id": order.user_id,
@@ -133,13 +497,7 @@ class OrderRepository:
             } for item in order.items],
             "total_amount": str(order.total_amount),
             "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "status_history": [{
-                "from_status": sc.from_status.value,
-                "to_status": sc.to_status.value,
-                "changed_at": sc.changed_at,
-                "changed_by": sc.changed_by
-            } for sc in order.status_history]
+            "updated_at": order.updated_at
         }
         
         if order.payment_details:
@@ -152,18 +510,11 @@ class OrderRepository:
         
         update_expression_parts = [
             "order_status = :order_status",
-            "updated_at = :updated_at",
-            "status_history = :status_history"
+            "updated_at = :updated_at"
         ]
         expression_values = {
             ":order_status": order.status.value,
-            ":updated_at": order.updated_at,
-            ":status_history": [{
-                "from_status": sc.from_status.value,
-                "to_status": sc.to_status.value,
-                "changed_at": sc.changed_at,
-                "changed_by": sc.changed_by
-            } for sc in order.status_history]
+            ":updated_at": order.updated_at
         }
         
         if order.payment_details:
@@ -177,81 +528,358 @@ class OrderRepository:
         
         update_expression = "SET " + ", ".join(update_expression_parts)
         
-        def do_transaction():
-            self.client.transact_write_items(
-                TransactItems=[
-                    {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"STATUS#{old_status.value}", "SK": f"{date_prefix}#ORDER#{order.order_id}"}}},
-                    {"Put": {"TableName": self.table.table_name, "Item": new_item_by_status}},
-                    {"Update": {
-                        "TableName": self.table.table_name,
-                        "Key": {"PK": f"ORDERS#{order.user_id}", "SK": f"ORDER#{order.order_id}"},
-                        "UpdateExpression": update_expression,
-                        "ExpressionAttributeValues": expression_values
-                    }},
-                    {"Update": {
-                        "TableName": self.table.table_name,
-                        "Key": {"PK": f"ORDER#{order.order_id}", "SK": "DETAILS"},
-                        "UpdateExpression": update_expression,
-                        "ExpressionAttributeValues": expression_values
-                    }}
-                ]
-            )
+        # A transaction may touch each item once; a same-status change (a repeated failed payment) just overwrites the copy
+        transact_items = [] if old_status == order.status else [
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": status_partition_key(old_status, order.order_id, self.status_shards), "SK": f"{date_prefix}#ORDER#{order.order_id}"}}}
+        ]
+        transact_items += [
+            {"Put": {"TableName": self.table.table_name, "Item": new_item_by_status}},
+            {"Update": {
+                "TableName": self.table.table_name,
+                "Key": {"PK": f"ORDERS#{order.user_id}", "SK": f"ORDER#{order.order_id}"},
+                "UpdateExpression": update_expression,
+                "ExpressionAttributeValues": expression_values
+            }},
+            {"Update": {
+                "TableName": self.table.table_name,
+                "Key": {"PK": f"ORDER#{order.order_id}", "SK": "DETAILS"},
+                "UpdateExpression": update_expression,
+                "ConditionExpression": "order_status = :old_status",
+                "ExpressionAttributeValues": {**expression_values, ":old_status": old_status.value}
+            }}
+        ]
+        
+        if order.status_history:
+            transact_items.append({"Put": {"TableName": self.table.table_name, "Item": self._history_item(order.order_id, order.status_history[-1])}})
         
-        await asyncio.to_thread(do_transaction)
+        # Built step by step so a same-status change cancels out instead of counting the order twice
+        changes = Counter()
+        changes[old_status] -= 1
+        changes[order.status] += 1
+        try:
+            await self._transact(transact_items, [event] if event else [], {date_prefix: changes})
+        finally:
+            self.invalidate(order.order_id)
+
+    async def remove_archived(self, order: Order) -> None:
+        """Delete every item of an order that has been copied to the archive, history included.
+
+        Conditioned on DETAILS still holding the archived status so a concurrent change is never lost.
+        """
+        date_prefix = _created_day(order)
+        history_keys = [decode_key({"PK": item["PK"], "SK": item["SK"]}) for item in await self._get_history_items(order.order_id)]
+        
+        await self._transact([
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": status_partition_key(order.status, order.order_id, self.status_shards), "SK": f"{date_prefix}#ORDER#{order.order_id}"}}},
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"ORDERS#{order.user_id}", "SK": f"ORDER#{order.order_id}"}}},
+            {"Delete": {
+                "TableName": self.table.table_name,
+                "Key": {"PK": f"ORDER#{order.order_id}", "SK": "DETAILS"},
+                "ConditionExpression": "order_status = :status",
+                "ExpressionAttributeValues": {":status": order.status.value}
+            }},
+            *({"Delete": {"TableName": self.table.table_name, "Key": key}} for key in history_keys)
+        ], stats={date_prefix: Counter({order.status: -1})})
+        self.invalidate(order.order_id)
 
     async def delete(self, user_id: str, order_id: str, status: OrderStatus) -> None:
-        order = await self.get_by_order_id(order_id)
+        # Only orders still in the table are deleted and uncounted; archived copies are left alone
+        order = await self._load_by_order_id(order_id, include_history=False)
         if not order:
             return
         
-        date_prefix = datetime.fromtimestamp(order.created_at, timezone.utc).strftime("%Y-%m-%d")
+        date_prefix = _created_day(order)
         
-        def do_transaction():
-            self.client.transact_write_items(
-                TransactItems=[
-                    {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"STATUS#{status.value}", "SK": f"{date_prefix}#ORDER#{order_id}"}}},
-                    {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"ORDERS#{user_id}", "SK": f"ORDER#{order_id}"}}},
-                    {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"ORDER#{order_id}", "SK": "DETAILS"}}}
-                ]
-            )
+        await self._transact([
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": status_partition_key(status, order_id, self.status_shards), "SK": f"{date_prefix}#ORDER#{order_id}"}}},
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"ORDERS#{user_id}", "SK": f"ORDER#{order_id}"}}},
+            {"Delete": {"TableName": self.table.table_name, "Key": {"PK": f"ORDER#{order_id}", "SK": "DETAILS"}}}
+        ], stats={date_prefix: Counter({status: -1})})
+        self.invalidate(order_id)
+
+    async def get_status_counts(self, day: Optional[date] = None) -> Dict[OrderStatus, int]:
+        """Orders currently in each status, overall or among orders created on day (UTC)."""
+        keys = [
+            encode_map(stats_key(day.isoformat() if day else None, shard, self.stats_shards))
+            for shard in range(self.stats_shards)
+        ]
+        if len(keys) == 1:
+            response = await run_io(self.raw_client.get_item, TableName=self.table.table_name, Key=keys[0])
+            items = [response["Item"]] if response.get("Item") else []
+        else:
+            items = await self._batch_get(keys)
+        return decode_status_counts(items)
+
+    def _created_deltas(self, orders: List[Order]) -> Dict[str, Counter]:
+        deltas: Dict[str, Counter] = {}
+        for order in orders:
+            deltas.setdefault(_created_day(order), Counter())[order.status] += 1
+        return deltas
+
+    def _stats_actions(self, deltas: Dict[str, Counter]) -> List[Dict[str, Any]]:
+        """Counter updates for the TOTAL item and each creation day's item, given per-day status count changes."""
+        # Any shard will do since reads sum them; a random one keeps concurrent transactions off the same items
+        shard = random.randrange(self.stats_shards)
+        total = Counter()
+        for changes in deltas.values():
+            total.update(changes)
         
-        await asyncio.to_thread(do_transaction)
-
-    def _unmarshal_order(self, item: dict) -> Order:
-        items = [OrderItem(
-            product_id=i["product_id"],
-            product_name=i["product_name"],
-            quantity=i["quantity"],
-            unit_price=Decimal(i["unit_price"]),
-            subtotal=Decimal(i["subtotal"])
-        ) for i in item.get("items", [])]
-        
-        payment_details = None
-        if "payment_details" in item and item["payment_details"]:
-            pd = item["payment_details"]
-            payment_details = PaymentDetails(
-                payment_method=pd["payment_method"],
-                transaction_id=pd["transaction_id"],
-                payment_status=pd["payment_status"],
-                processed_at=pd.get("processed_at")
-            )
+        actions = []
+        for day, changes in [(None, total), *deltas.items()]:
+            changes = [(status, delta) for status, delta in changes.items() if delta]
+            if not changes:
+                continue
+            actions.append({"Update": {
+                "TableName": self.table.table_name,
+                "Key": stats_key(day, shard, self.stats_shards),
+                "UpdateExpression": "ADD " + ", ".join(f"#s{index} :d{index}" for index in range(len(changes))),
+                "ExpressionAttributeNames": {f"#s{index}": status.value for index, (status, _) in enumerate(changes)},
+                "ExpressionAttributeValues": {f":d{index}": delta for index, (_, delta) in enumerate(changes)}
+            }})
+        return actions
+
+    async def _transact(
+        self,
+        transact_items: List[Dict[str, Any]],
+        events: Sequence[NotificationEvent] = (),
+        stats: Optional[Dict[str, Counter]] = None
+    ) -> None:
+        """Write the items, outbox events and counter changes in one transaction, retrying transaction conflicts."""
+        outbox_items = [{"Put": {"TableName": self.table.table_name, "Item": self._outbox_item(event)}} for event in events]
+        # Concurrent writes can still collide on a counter shard; each retry draws a fresh shard
+        for attempt in range(TRANSACT_CONFLICT_RETRIES + 1):
+            try:
+                await run_io(self.client.transact_write_items, TransactItems=[*transact_items, *self._stats_actions(stats or {}), *outbox_items])
+                if events and self.outbox_listener is not None:
+                    self.outbox_listener(list(events))
+                return
+            except ClientError as e:
+                if attempt == TRANSACT_CONFLICT_RETRIES or not _is_transaction_conflict(e):
+                    raise
+            metrics.increment("order_transaction_conflicts")
+            await asyncio.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+
+    async def get_outbox_events(
+        self,
+        partition_key: str,
+        occurred_before: int,
+        limit: int = OUTBOX_PAGE_SIZE,
+        start_after: Optional[NotificationEvent] = None
+    ) -> List[NotificationEvent]:
+        """Oldest pending events in one outbox partition that occurred before the given timestamp, after start_after if given."""
+        query_kwargs = {}
+        if start_after is not None:
+            query_kwargs["ExclusiveStartKey"] = self._outbox_key(start_after)
+        response = await self._query(
+            KeyConditionExpression="PK = :pk AND SK < :sk",
+            ExpressionAttributeValues={":pk": partition_key, ":sk": f"{occurred_before:010d}#"},
+            Limit=limit,
+            **query_kwargs
+        )
+        return [decode_outbox_event(item) for item in response.get("Items", [])]
+
+    async def delete_outbox_events(self, events: List[NotificationEvent]) -> None:
+        """Remove delivered events from the outbox; events already removed are ignored."""
+        # The deletes are independent, so BatchWriteItem does them at half the write capacity of a transaction
+        requests = [{"DeleteRequest": {"Key": self._outbox_key(event)}} for event in events]
+        await asyncio.gather(*(
+            self._batch_write(requests[i:i + BATCH_WRITE_CHUNK_SIZE])
+            for i in range(0, len(requests), BATCH_WRITE_CHUNK_SIZE)
+        ))
+
+    def _order_event(self, event_type: NotificationEventType, order: Order, recipient: Optional[EventRecipient]) -> NotificationEvent:
+        return NotificationEvent(
+            event_id=str(uuid.uuid4()),
+            event_type=event_type,
+            order_id=order.order_id,
+            user_id=order.user_id,
+            occurred_at=order.updated_at,
+            order=OrderSnapshot.of(order) if self.event_snapshots else None,
+            recipient=recipient if self.event_snapshots else None
+        )
+
+    def _outbox_key(self, event: NotificationEvent) -> Dict[str, str]:
+        return {"PK": outbox_partition_key(event.order_id, self.outbox_shards), "SK": f"{event.occurred_at:010d}#{event.event_id}"}
+
+    def _outbox_item(self, event: NotificationEvent) -> Dict[str, Any]:
+        item = {
+            **self._outbox_key(event),
+            "event_id": event.event_id,
+            "event_type": event.event_type.value,
+            "order_id": event.order_id,
+            "user_id": event.user_id,
+            "occurred_at": event.occurred_at
+        }
+        if event.metadata:
+            item["metadata"] = event.metadata
+        if event.order:
+            item["order"] = event.order.model_dump(mode="json")
+        if event.recipient:
+            item["recipient"] = event.recipient.model_dump()
+        return item
+
+    async def _merge_partitions(
+        self,
+        partition_keys: List[str],
+        limit: Optional[int],
+        cursor_state: Optional[Dict[str, Any]],
+        summary: bool = False,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Tuple[List[Union[Order, OrderSummary]], Optional[Dict[str, Any]]]:
+        """Merge one newest-first page across partitions.
+
+        Each partition is first asked for its share of the page, ceil(limit / partitions), and only the partitions
+        holding back the merge are read again, for their share of what is still missing. A page therefore reads
+        about limit + partitions items rather than limit from every partition; items read but not emitted are
+        read again by the next page.
+        """
+        # cursor_state maps each partition still being read to its next start key;
+        # partitions missing from it have been fully consumed by earlier pages.
+        state = cursor_state if cursor_state is not None else {pk: None for pk in partition_keys}
+        pending = [pk for pk in partition_keys if pk in state]
+        semaphore = asyncio.Semaphore(settings.QUERY_FANOUT_CONCURRENCY)
+        key_condition, range_values = self._date_key_condition(date_from, date_to)
+        buffered: Dict[str, List[dict]] = {pk: [] for pk in pending}
+        next_keys = {pk: state[pk] for pk in pending}
+        truncated = set(pending)
+        
+        async def query_partition(pk: str, partition_limit: Optional[int]) -> None:
+            async with semaphore:
+                response = await self._query(
+                    **self._page_kwargs(partition_limit, next_keys[pk], summary),
+                    KeyConditionExpression=key_condition,
+                    ExpressionAttributeValues={":pk": pk, **range_values},
+                    ScanIndexForward=False
+                )
+            items = response.get("Items", [])
+            buffered[pk].extend(items)
+            metrics.increment("partition_items_read", len(items))
+            next_keys[pk] = response.get("LastEvaluatedKey")
+            if not next_keys[pk]:
+                truncated.discard(pk)
+        
+        to_read, missing = pending, limit
+        while True:
+            share = -(-missing // len(to_read)) if missing else None
+            await asyncio.gather(*(query_partition(pk, share) for pk in to_read))
+            page, blocked_at = self._merge_buffered(buffered, truncated, limit)
+            if not limit or len(page) >= limit or not truncated:
+                break
+            # Partitions cut short at or above the first item held back may still hold newer items
+            to_read = [
+                pk for pk in pending
+                if pk in truncated and (blocked_at is None or not buffered[pk] or sort_key(buffered[pk][-1]) >= blocked_at)
+            ]
+            missing = limit - len(page)
+        
+        consumed = Counter(pk for pk, _ in page)
+        last_consumed = {pk: item for pk, item in page}
+        next_state = {}
+        for pk in pending:
+            if consumed[pk] < len(buffered[pk]):
+                last_item = last_consumed.get(pk)
+                next_state[pk] = {"PK": pk, "SK": sort_key(last_item)} if last_item else state[pk]
+            elif next_keys[pk]:
+                next_state[pk] = next_keys[pk]
         
-        status_history = [StatusChange(
-            from_status=OrderStatus(sc["from_status"]),
-            to_status=OrderStatus(sc["to_status"]),
-            changed_at=sc["changed_at"],
-            changed_by=sc["changed_by"]
-        ) for sc in item.get("status_history", [])]
-        
-        return Order(
-            order_id=item["order_id"],
-            user_id=item["user_id"],
-            delivery_address=item["delivery_address"],
-            status=OrderStatus(item["order_status"]),
-            items=items,
-            total_amount=Decimal(item["total_amount"]),
-            payment_details=payment_details,
-            status_history=status_history,
-            created_at=item["created_at"],
-            updated_at=item["updated_at"]
-        )
\ No newline at end of file
+        unmarshal = decode_order_summary if summary else decode_order
+        return [unmarshal(item) for _, item in page], next_state or None
+
+    def _merge_buffered(
+        self,
+        buffered: Dict[str, List[dict]],
+        truncated: Set[str],
+        limit: Optional[int]
+    ) -> Tuple[List[Tuple[str, dict]], Optional[str]]:
+        """Newest-first merge of the items read so far; also returns the sort key of the first item held back, if any."""
+        # A partition cut short may still hold items newer than what other partitions returned,
+        # so nothing older than its last item is emitted; one with nothing buffered holds back everything.
+        if any(not buffered[pk] for pk in truncated):
+            return [], None
+        watermark = max((sort_key(buffered[pk][-1]) for pk in truncated), default=None)
+        streams = [[(sort_key(item), pk, item) for item in items] for pk, items in buffered.items()]
+        page = []
+        for item_sort_key, pk, item in heapq.merge(*streams, key=lambda entry: entry[0], reverse=True):
+            if (limit and len(page) >= limit) or (watermark is not None and item_sort_key < watermark):
+                return page, item_sort_key
+            page.append((pk, item))
+        return page, None
+
+    def _date_key_condition(self, date_from: Optional[date], date_to: Optional[date]) -> Tuple[str, Dict[str, str]]:
+        # STATUS# sort keys are "yyyy-mm-dd#ORDER#<id>"; "~" sorts after every character used in an order ID
+        if date_from and date_to:
+            return "PK = :pk AND SK BETWEEN :sk_from AND :sk_to", {":sk_from": f"{date_from.isoformat()}#", ":sk_to": f"{date_to.isoformat()}#~"}
+        if date_from:
+            return "PK = :pk AND SK >= :sk_from", {":sk_from": f"{date_from.isoformat()}#"}
+        if date_to:
+            return "PK = :pk AND SK <= :sk_to", {":sk_to": f"{date_to.isoformat()}#~"}
+        return "PK = :pk", {}
+
+    def _page_kwargs(self, limit: Optional[int], start_key: Optional[Dict[str, Any]], summary: bool = False) -> Dict[str, Any]:
+        page_kwargs: Dict[str, Any] = {}
+        if limit:
+            page_kwargs["Limit"] = limit
+        if start_key:
+            page_kwargs["ExclusiveStartKey"] = start_key
+        if summary:
+            page_kwargs["ProjectionExpression"] = SUMMARY_PROJECTION
+        return page_kwargs
+
+    async def _batch_get(self, keys: List[Dict[str, Any]]) -> List[dict]:
+        table_name = self.table.table_name
+        request_items = {table_name: {"Keys": keys}}
+        items = []
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = await run_io(self.raw_client.batch_get_item, RequestItems=request_items)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            request_items = response.get("UnprocessedKeys") or {}
+            if not request_items:
+                return items
+            # Unprocessed keys mean the table is throttling this batch; back off before asking again
+            await asyncio.sleep(min(0.05 * 2 ** attempt, 1.0))
+        
+        raise ApplicationError(ErrorCode.INTERNAL_ERROR, details="BatchGetItem left keys unprocessed after retries")
+
+    async def _batch_write(self, requests: List[Dict[str, Any]]) -> None:
+        request_items = {self.table.table_name: requests}
+        for attempt in range(BATCH_WRITE_MAX_RETRIES + 1):
+            response = await run_io(self.client.batch_write_item, RequestItems=request_items)
+            request_items = response.get("UnprocessedItems") or {}
+            if not request_items:
+                return
+            await asyncio.sleep(min(0.05 * 2 ** attempt, 1.0))
+        
+        raise ApplicationError(ErrorCode.INTERNAL_ERROR, details="BatchWriteItem left items unprocessed after retries")
+
+    async def _query(self, **kwargs) -> Dict[str, Any]:
+        """Query through the low-level client; Items stay raw AttributeValue maps and LastEvaluatedKey comes back plain."""
+        kwargs["ExpressionAttributeValues"] = encode_map(kwargs["ExpressionAttributeValues"])
+        if "ExclusiveStartKey" in kwargs:
+            kwargs["ExclusiveStartKey"] = encode_map(kwargs["ExclusiveStartKey"])
+        
+        response = await run_io(self.raw_client.query, TableName=self.table.table_name, **kwargs)
+        if "LastEvaluatedKey" in response:
+            response["LastEvaluatedKey"] = decode_key(response["LastEvaluatedKey"])
+        return response
+
+    async def _get_history_items(self, order_id: str) -> List[dict]:
+        response = await self._query(
+            KeyConditionExpression="PK = :pk AND begins_with(SK, :sk)",
+            ExpressionAttributeValues={
+                ":pk": f"ORDER#{order_id}",
+                ":sk": "HIST#"
+            }
+        )
+        return response.get("Items", [])
+
+    def _history_item(self, order_id: str, status_change: StatusChange) -> Dict[str, Any]:
+        # Nanosecond suffix keeps changes made within the same second distinct and in order
+        return {
+            "PK": f"ORDER#{order_id}",
+            "SK": f"HIST#{status_change.changed_at:010d}#{time.time_ns():019d}",
+            "from_status": status_change.from_status.value,
+            "to_status": status_change.to_status.value,
+            "changed_at": status_change.changed_at,
+            "changed_by": status_change.changed_by
+        }
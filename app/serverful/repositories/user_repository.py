@@ -1,11 +1,14 @@
-import asyncio
+from app.serverful.repositories.async_dynamodb import low_level_client
+from app.serverful.repositories.attribute_codec import decode_user, encode_map
+from app.serverful.utils.io_utils import run_io
 
 
 class UserRepository:
-    def __init__(self, dynamodb_resource, table_name):
+    def __init__(self, dynamodb_resource, table_name, raw_client=None):
         self.dynamodb_resource = dynamodb_resource
         self.table = dynamodb_resource.Table(table_name)
         self.client = dynamodb_resource.meta.client
+        self.raw_client = raw_client if raw_client is not None else low_level_client(dynamodb_resource)
 
     async def create(self, user):
         item_by_email = {
@@ -34,34 +37,33 @@ class UserRepository:
             "updated_at": user.updated_at
         }
         
-        def do_transaction():
-            self.client.transact_write_items(
-                TransactItems=[
-                    {
-                        "Put": {
-                            "TableName": self.table.table_name,
-                            "Item": item_by_email,
-                            "ConditionExpression": "attribute_not_exists(PK)"
-                        }
-                    },
-                    {
-                        "Put": {
-                            "TableName": self.table.table_name,
-                            "Item": item_by_id
-                        }
+        await run_io(
+            self.client.transact_write_items,
+            TransactItems=[
+                {
+                    "Put": {
+                        "TableName": self.table.table_name,
+                        "Item": item_by_email,
+                        "ConditionExpression": "attribute_not_exists(PK)"
                     }
-                ]
-            )
-        
-        await asyncio.to_thread(do_transaction)
+                },
+                {
+                    "Put": {
+                        "TableName": self.table.table_name,
+                        "Item": item_by_id
+                    }
+                }
+            ]
+        )
 
     async def get_by_email(self, email):
-        response = await asyncio.to_thread(
-            self.table.query,
+        response = await run_io(
+            self.raw_client.query,
+            TableName=self.table.table_name,
             KeyConditionExpression="PK = :pk",
-            ExpressionAttributeValues={
+            ExpressionAttributeValues=encode_map({
                 ":pk": f"EMAIL#{email}"
-            }
+            })
         )
         
         items = response.get("Items", [])
@@ -69,16 +71,17 @@ class UserRepository:
         if not items:
             return None
         
-        return self._unmarshal_user(items[0])
+        return decode_user(items[0])
 
     async def get_by_id(self, user_id):
-        response = await asyncio.to_thread(
-            self.table.query,
+        response = await run_io(
+            self.raw_client.query,
+            TableName=self.table.table_name,
             KeyConditionExpression="PK = :pk AND SK = :sk",
-            ExpressionAttributeValues={
+            ExpressionAttributeValues=encode_map({
                 ":pk": f"USER#{user_id}",
                 ":sk": "PROFILE"
-            }
+            })
         )
         
         items = response.get("Items", [])
@@ -86,7 +89,7 @@ class UserRepository:
         if not items:
             return None
         
-        return self._unmarshal_user(items[0])
+        return decode_user(items[0])
 
     async def delete(self, user_id, email):
         key_by_email = {
@@ -99,49 +102,33 @@ class UserRepository:
             "SK": "PROFILE"
         }
         
-        def do_transaction():
-            self.client.transact_write_items(
-                TransactItems=[
-                    {
-                        "Delete": {
-                            "TableName": self.table.table_name,
-                            "Key": key_by_email
-                        }
-                    },
-                    {
-                        "Delete": {
-                            "TableName": self.table.table_name,
-                            "Key": key_by_id
-                        }
+        await run_io(
+            self.client.transact_write_items,
+            TransactItems=[
+                {
+                    "Delete": {
+                        "TableName": self.table.table_name,
+                        "Key": key_by_email
                     }
-                ]
-            )
-        
-        await asyncio.to_thread(do_transaction)
+                },
+                {
+                    "Delete": {
+                        "TableName": self.table.table_name,
+                        "Key": key_by_id
+                    }
+                }
+            ]
+        )
 
     async def get_all(self):
-        response = await asyncio.to_thread(
-            self.table.scan,
+        response = await run_io(
+            self.raw_client.scan,
+            TableName=self.table.table_name,
             FilterExpression="SK = :sk",
-            ExpressionAttributeValues={
+            ExpressionAttributeValues=encode_map({
                 ":sk": "PROFILE"
-            }
+            })
         )
         
         items = response.get("Items", [])
-        return [self._unmarshal_user(item) for item in items]
-
-    def _unmarshal_user(self, item):
-        from app.serverful.models.models import User
-        
-        return User(
-            user_id=item.get("user_id"),
-            first_name=item.get("first_name"),
-            last_name=item.get("last_name"),
-            email=item.get("email"),
-            password=item.get("password"),
-            role=item.get("role", "user"),
-            created_at=item.get("created_at", 0),
-            updated_at=item.get("updated_at", 0)
-        ) 
-
+        return [decode_user(item) for item in items]
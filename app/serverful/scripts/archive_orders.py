@@ -0,0 +1,86 @@
+"""Move terminal orders older than a cutoff out of DynamoDB into the order archive.
+
+FULFILLED, ORDER_CANCELLED and FULFILLMENT_FAILED orders whose last change is older than
+--older-than-days are written to the archive with their full history, then every table item
+for them is deleted. OrderRepository keeps serving them by ID from the archive.
+
+    python -m app.serverful.scripts.archive_orders --archive-path /mnt/order-archive --older-than-days 90
+"""
+import argparse
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+import boto3
+from app.serverful.config.config import settings
+from app.serverful.models.models import OrderStatus, OrderSummary
+from app.serverful.repositories.order_archive import LocalOrderArchive
+from app.serverful.repositories.order_repository import OrderRepository
+from app.serverful.utils.io_utils import run_io
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = [OrderStatus.FULFILLED, OrderStatus.ORDER_CANCELLED, OrderStatus.FULFILLMENT_FAILED]
+PAGE_SIZE = 100
+
+
+async def archive_orders(order_repo: OrderRepository, archive: LocalOrderArchive, older_than_days: int, now: datetime, dry_run: bool = False) -> Counter:
+    cutoff = now - timedelta(days=older_than_days)
+    cutoff_timestamp = int(cutoff.timestamp())
+    stats = Counter()
+    semaphore = asyncio.Semaphore(settings.BULK_WRITE_CONCURRENCY)
+
+    async def archive_one(summary: OrderSummary) -> str:
+        if summary.updated_at >= cutoff_timestamp:
+            return "recent"
+        if dry_run:
+            return "archived"
+        async with semaphore:
+            order = await order_repo.get_by_order_id(summary.order_id, include_history=True)
+            if order is None or order.status != summary.status:
+                return "skipped"
+            # Archive first: a failure between the two steps leaves a duplicate, never a lost order
+            await run_io(archive.put, order)
+            try:
+                await order_repo.remove_archived(order)
+            except ClientError as e:
+                logger.warning(f"Order {order.order_id} archived but not removed from the table: {str(e)}")
+                return "failed"
+            return "archived"
+
+    for status in TERMINAL_STATUSES:
+        cursor_state = None
+        while True:
+            # STATUS# sort keys start with the creation date; an order created after the cutoff was also last changed after it
+            summaries, cursor_state = await order_repo.get_by_status(
+                status, PAGE_SIZE, cursor_state, summary=True, date_to=cutoff.date()
+            )
+            for outcome in await asyncio.gather(*(archive_one(summary) for summary in summaries)):
+                stats[outcome] += 1
+            if cursor_state is None:
+                break
+
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive terminal orders older than a cutoff")
+    parser.add_argument("--archive-path", default=settings.ORDER_ARCHIVE_PATH)
+    parser.add_argument("--older-than-days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--table", default=settings.DYNAMODB_TABLE_NAME)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if not args.archive_path:
+        parser.error("--archive-path or ORDER_ARCHIVE_PATH is required")
+
+    logging.basicConfig(level=logging.INFO)
+    dynamodb_resource = boto3.resource("dynamodb", region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+    archive = LocalOrderArchive(args.archive_path)
+    order_repo = OrderRepository(dynamodb_resource, args.table, status_shards=settings.STATUS_SHARD_COUNT, archive=archive)
+    stats = asyncio.run(archive_orders(order_repo, archive, args.older_than_days, datetime.now(timezone.utc), args.dry_run))
+    logger.info(f"Order archival {'(dry run) ' if args.dry_run else ''}finished: {dict(stats)}")
+
+
+if __name__ == "__main__":
+    main()
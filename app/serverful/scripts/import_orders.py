@@ -0,0 +1,85 @@
+"""Bulk-load orders from a JSON Lines file, one {"user_id", "delivery_address", "items"} object per line.
+
+Rows are validated in one pass over the whole file before anything is written. Valid orders are then
+packed into transactions by OrderRepository.create_many. No ORDER_CREATED events are published.
+
+    python -m app.serverful.scripts.import_orders orders.jsonl > results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Tuple
+import boto3
+from pydantic import Field, TypeAdapter, ValidationError
+from app.serverful.config.config import settings
+from app.serverful.models.dto import CreateOrderRequest
+from app.serverful.repositories.order_repository import OrderRepository
+from app.serverful.services.order_service import OrderService
+
+logger = logging.getLogger(__name__)
+
+
+class ImportOrderRow(CreateOrderRequest):
+    user_id: str = Field(min_length=1, max_length=100)
+
+
+_rows_adapter = TypeAdapter(List[ImportOrderRow])
+
+
+def validate_rows(rows: List[Any]) -> Tuple[List[Tuple[int, ImportOrderRow]], Dict[int, str]]:
+    """Validate every row in one call, then re-validate only the rows that passed if any failed."""
+    try:
+        return list(enumerate(_rows_adapter.validate_python(rows))), {}
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors():
+            field = ".".join(str(part) for part in error["loc"][1:])
+            errors.setdefault(error["loc"][0], f"{field}: {error['msg']}" if field else error["msg"])
+
+    valid_indices = [index for index in range(len(rows)) if index not in errors]
+    valid_rows = _rows_adapter.validate_python([rows[index] for index in valid_indices])
+    return list(zip(valid_indices, valid_rows)), errors
+
+
+async def import_orders(order_repo: OrderRepository, rows: List[Any], batch_size: int) -> List[Dict[str, Any]]:
+    valid, errors = validate_rows(rows)
+    results = {index: {"index": index, "status": "invalid", "error": error} for index, error in errors.items()}
+
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        orders = [OrderService.build_order(row.user_id, row) for _, row in batch]
+        write_errors = await order_repo.create_many(orders)
+        for (index, _), order, error in zip(batch, orders, write_errors):
+            if error is None:
+                results[index] = {"index": index, "status": "created", "order_id": order.order_id}
+            else:
+                results[index] = {"index": index, "status": "failed", "error": str(error)}
+
+    return [results[index] for index in sorted(results)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import orders from a JSON Lines file")
+    parser.add_argument("path")
+    parser.add_argument("--table", default=settings.DYNAMODB_TABLE_NAME)
+    parser.add_argument("--batch-size", type=int, default=settings.MAX_BULK_ORDERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.path) as source:
+        rows = [json.loads(line) for line in source if line.strip()]
+
+    dynamodb_resource = boto3.resource("dynamodb", region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+    order_repo = OrderRepository(dynamodb_resource, args.table, status_shards=settings.STATUS_SHARD_COUNT)
+    results = asyncio.run(import_orders(order_repo, rows, args.batch_size))
+
+    for result in results:
+        sys.stdout.write(json.dumps(result) + "\n")
+    created = sum(1 for result in results if result["status"] == "created")
+    logger.info(f"Imported {created} of {len(results)} orders")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Re-key STATUS# items from one shard layout to another.
+
+Run right after rolling out a new STATUS_SHARD_COUNT; it is idempotent and safe to re-run:
+
+    python -m app.serverful.scripts.migrate_status_shards --from-shards 1 --to-shards 8
+"""
+import argparse
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterator, List
+import boto3
+from app.serverful.config.config import settings
+from app.serverful.models.models import OrderStatus
+from app.serverful.repositories.order_repository import status_partition_key, status_partition_keys
+
+logger = logging.getLogger(__name__)
+
+BATCH_GET_LIMIT = 100
+
+
+def migrate_status_shards(dynamodb_resource, table_name: str, from_shards: int, to_shards: int, dry_run: bool = False) -> Counter:
+    table = dynamodb_resource.Table(table_name)
+    stats = Counter()
+
+    with table.batch_writer() as batch:
+        for status in OrderStatus:
+            for source_pk in status_partition_keys(status, from_shards):
+                for items in _query_pages(table, source_pk):
+                    current_statuses = _current_statuses(dynamodb_resource, table_name, [item["order_id"] for item in items])
+                    for item in items:
+                        target_pk = status_partition_key(status, item["order_id"], to_shards)
+                        # Orders that changed status while their copy sat in the old layout leave a stale copy behind
+                        if current_statuses.get(item["order_id"]) != status.value:
+                            outcome = "dropped"
+                        elif target_pk == source_pk:
+                            outcome = "unchanged"
+                        else:
+                            outcome = "moved"
+                        stats[outcome] += 1
+
+                        if dry_run or outcome == "unchanged":
+                            continue
+                        if outcome == "moved":
+                            batch.put_item(Item={**item, "PK": target_pk})
+                        batch.delete_item(Key={"PK": source_pk, "SK": item["SK"]})
+
+    return stats
+
+
+def _query_pages(table, pk: str) -> Iterator[List[Dict[str, Any]]]:
+    query_kwargs = {
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": pk},
+        "Limit": BATCH_GET_LIMIT
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        if response.get("Items"):
+            yield response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _current_statuses(dynamodb_resource, table_name: str, order_ids: List[str]) -> Dict[str, str]:
+    request_items = {table_name: {
+        "Keys": [{"PK": f"ORDER#{order_id}", "SK": "DETAILS"} for order_id in set(order_ids)],
+        "ProjectionExpression": "order_id, order_status"
+    }}
+    statuses = {}
+    while request_items:
+        response = dynamodb_resource.batch_get_item(RequestItems=request_items)
+        for item in response.get("Responses", {}).get(table_name, []):
+            statuses[item["order_id"]] = item["order_status"]
+        request_items = response.get("UnprocessedKeys") or {}
+    return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move STATUS# order items between write shard layouts")
+    parser.add_argument("--from-shards", type=int, required=True)
+    parser.add_argument("--to-shards", type=int, default=settings.STATUS_SHARD_COUNT)
+    parser.add_argument("--table", default=settings.DYNAMODB_TABLE_NAME)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    dynamodb_resource = boto3.resource("dynamodb", region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+    stats = migrate_status_shards(dynamodb_resource, args.table, args.from_shards, args.to_shards, args.dry_run)
+    logger.info(f"Status shard migration {'(dry run) ' if args.dry_run else ''}finished: {dict(stats)}")
+
+
+if __name__ == "__main__":
+    main()
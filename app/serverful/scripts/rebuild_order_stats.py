@@ -0,0 +1,94 @@
+"""Recompute the STATS#STATUS[#<shard>] counter items from the STATUS# partitions.
+
+Run once after rolling out status counters so orders written before them are counted, and after changing
+STATS_COUNTER_SHARDS. Order writes that land while it runs are lost from the counters, so run it in a quiet window:
+
+    python -m app.serverful.scripts.rebuild_order_stats --dry-run
+"""
+import argparse
+import logging
+from collections import Counter
+from typing import Dict, Iterator, List
+import boto3
+from app.serverful.config.config import settings
+from app.serverful.models.models import OrderStatus
+from app.serverful.repositories.order_repository import stats_key, status_partition_keys
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+
+def rebuild_order_stats(
+    dynamodb_resource,
+    table_name: str,
+    status_shards: int,
+    stats_shards: int,
+    previous_stats_shards: int = 1,
+    dry_run: bool = False
+) -> Dict[str, Counter]:
+    """Count orders per status overall and per creation day, then overwrite the counter items with the result.
+
+    The full count goes to shard 0; other shards are removed so reads sum to it. Returns the counts keyed by
+    "TOTAL" and by creation day.
+    """
+    table = dynamodb_resource.Table(table_name)
+    counts: Dict[str, Counter] = {"TOTAL": Counter()}
+
+    for status in OrderStatus:
+        for pk in status_partition_keys(status, status_shards):
+            for sort_keys in _sort_key_pages(table, pk):
+                for sk in sort_keys:
+                    counts["TOTAL"][status.value] += 1
+                    counts.setdefault(sk.split("#", 1)[0], Counter())[status.value] += 1
+
+    if dry_run:
+        return counts
+
+    with table.batch_writer() as batch:
+        for bucket, bucket_counts in counts.items():
+            day = None if bucket == "TOTAL" else bucket
+            target = stats_key(day, 0, stats_shards)
+            batch.put_item(Item={**target, **{status.value: bucket_counts[status.value] for status in OrderStatus}})
+            stale_keys = {tuple(stats_key(day, shard, previous_stats_shards).values()) for shard in range(previous_stats_shards)}
+            stale_keys |= {tuple(stats_key(day, shard, stats_shards).values()) for shard in range(1, stats_shards)}
+            for pk, sk in stale_keys - {tuple(target.values())}:
+                batch.delete_item(Key={"PK": pk, "SK": sk})
+
+    return counts
+
+
+def _sort_key_pages(table, pk: str) -> Iterator[List[str]]:
+    query_kwargs = {
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": pk},
+        "ProjectionExpression": "SK",
+        "Limit": PAGE_SIZE
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        if response.get("Items"):
+            yield [item["SK"] for item in response["Items"]]
+        if "LastEvaluatedKey" not in response:
+            return
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute per-status order counters from the status partitions")
+    parser.add_argument("--table", default=settings.DYNAMODB_TABLE_NAME)
+    parser.add_argument("--stats-shards", type=int, default=settings.STATS_COUNTER_SHARDS)
+    parser.add_argument("--previous-stats-shards", type=int, default=1)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    dynamodb_resource = boto3.resource("dynamodb", region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+    counts = rebuild_order_stats(
+        dynamodb_resource, args.table, settings.STATUS_SHARD_COUNT, args.stats_shards, args.previous_stats_shards, args.dry_run
+    )
+    logger.info(f"Order stats rebuild {'(dry run) ' if args.dry_run else ''}finished: {dict(counts['TOTAL'])} across {len(counts) - 1} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import fcntl
+import logging
+import os
+import random
+import threading
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
+from pydantic import ValidationError
+from app.serverful.models.models import NotificationEvent
+from app.serverful.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REPLAY_CHUNK_SIZE = 100
+
+Publisher = Callable[[NotificationEvent], Awaitable[None]]
+
+
+class EventSpool:
+    """Append-only JSON Lines file of events SNS did not accept, replayed in the background until delivered.
+
+    Each event is fsynced before append() returns, so a spooled event survives a crash of the process.
+    The replayer moves the file aside before reading it, letting new failures keep appending meanwhile,
+    and backs off exponentially while SNS keeps failing. Replay is at-least-once: a crash mid-replay
+    publishes the events of the last chunk again.
+
+    Several worker processes may share one spool: appends and the move aside are serialised with an
+    OS file lock, and only the process holding the replay lock drains the file, including events
+    other workers appended.
+    """
+
+    def __init__(self, path: str, min_backoff_seconds: float = 1, max_backoff_seconds: float = 60) -> None:
+        self.path = path
+        self.replay_path = f"{path}.replaying"
+        self.lock_path = f"{path}.lock"
+        self.replay_lock_path = f"{path}.replaying.lock"
+        self.min_backoff_seconds = min_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._replayer: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return max(self._pending, 0)
+
+    async def start(self, publish: Publisher) -> None:
+        self._pending = await asyncio.to_thread(self._count_lines)
+        if self._pending:
+            logger.info(f"Replaying {self._pending} spooled events from {self.path}")
+            self._wakeup.set()
+        self._replayer = asyncio.create_task(self._replay(publish))
+
+    async def stop(self) -> None:
+        if self._replayer:
+            self._replayer.cancel()
+            await asyncio.gather(self._replayer, return_exceptions=True)
+            self._replayer = None
+
+    async def append(self, event: NotificationEvent) -> None:
+        await asyncio.to_thread(self._append_line, event.model_dump_json())
+        self._pending += 1
+        self._wakeup.set()
+
+    async def replay_once(self, publish: Publisher) -> bool:
+        """Publish spooled events in order; returns False when SNS failed and events remain.
+
+        Also False while another process is replaying, so this one retries after a backoff.
+        """
+        replay_lock = await asyncio.to_thread(self._try_replay_lock)
+        if replay_lock is None:
+            delivered = False
+        else:
+            try:
+                delivered = await self._replay_locked(publish)
+            finally:
+                os.close(replay_lock)
+        # Other workers append to and drain the same files, so the depth is recounted from them
+        self._pending = await asyncio.to_thread(self._count_lines)
+        return delivered or self._pending == 0
+
+    async def _replay_locked(self, publish: Publisher) -> bool:
+        events, dropped = await asyncio.to_thread(self._take)
+        self._pending -= dropped
+        for start in range(0, len(events), REPLAY_CHUNK_SIZE):
+            chunk = events[start:start + REPLAY_CHUNK_SIZE]
+            results = await asyncio.gather(*(publish(event) for event in chunk), return_exceptions=True)
+            failed = [event for event, result in zip(chunk, results) if isinstance(result, BaseException)]
+            self._pending -= len(chunk) - len(failed)
+            metrics.increment("sns_spool_replayed", len(chunk) - len(failed))
+            if failed:
+                await asyncio.to_thread(self._keep, failed + events[start + REPLAY_CHUNK_SIZE:])
+                return False
+        await asyncio.to_thread(self._remove_replay_file)
+        return True
+
+    async def _replay(self, publish: Publisher) -> None:
+        backoff = self.min_backoff_seconds
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                delivered = await self.replay_once(publish)
+            except (ClientError, BotoCoreError, OSError) as e:
+                logger.warning(f"Event spool replay failed: {str(e)}")
+                delivered = False
+            if delivered:
+                backoff = self.min_backoff_seconds
+                # Failures spooled while an older replay file was being drained are still waiting
+                if await asyncio.to_thread(os.path.exists, self.path):
+                    self._wakeup.set()
+                continue
+            await asyncio.sleep(random.uniform(backoff / 2, backoff))
+            backoff = min(backoff * 2, self.max_backoff_seconds)
+            self._wakeup.set()
+
+    @contextmanager
+    def _spool_lock(self) -> Iterator[None]:
+        # The thread lock orders this process's writers; flock orders the other workers sharing the file
+        with self._lock, open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _try_replay_lock(self) -> Optional[int]:
+        fd = os.open(self.replay_lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _append_line(self, line: str) -> None:
+        with self._spool_lock():
+            with open(self.path, "a", encoding="utf-8") as spool:
+                spool.write(line + "\n")
+                spool.flush()
+                os.fsync(spool.fileno())
+
+    def _take(self) -> Tuple[List[NotificationEvent], int]:
+        # A replay file left by a failed or interrupted replay is finished before newer failures are taken
+        with self._spool_lock():
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.path):
+                    return [], 0
+                os.replace(self.path, self.replay_path)
+        events, dropped = [], 0
+        with open(self.replay_path, encoding="utf-8") as spool:
+            for line in spool:
+                if not line.strip():
+                    continue
+                try:
+                    events.append(NotificationEvent.model_validate_json(line))
+                except ValidationError:
+                    # A torn final line from a crash mid-append, or a hand-edited file
+                    logger.error(f"Dropping unreadable spooled event: {line[:200]}")
+                    dropped += 1
+                    metrics.increment("sns_spool_dropped")
+        return events, dropped
+
+    def _keep(self, events: List[NotificationEvent]) -> None:
+        temporary = f"{self.replay_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as spool:
+            spool.writelines(event.model_dump_json() + "\n" for event in events)
+            spool.flush()
+            os.fsync(spool.fileno())
+        os.replace(temporary, self.replay_path)
+
+    def _remove_replay_file(self) -> None:
+        if os.path.exists(self.replay_path):
+            os.remove(self.replay_path)
+
+    def _count_lines(self) -> int:
+        count = 0
+        for path in (self.replay_path, self.path):
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as spool:
+                    count += sum(1 for line in spool if line.strip())
+        return count
@@ -0,0 +1,165 @@
+import asyncio
+import base64
+import json
+import logging
+import uuid
+from typing import Callable, List, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from app.serverful.services.sns_service import BINARY_EVENT_ENCODING, EVENT_ENCODING_ATTRIBUTE, decode_binary_event
+from app.serverful.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+InvalidationHandler = Callable[[str, Optional[str]], None]
+
+
+class LocalInvalidationBus:
+    """In-process stand-in for the cross-task channel; every subscriber sees every publish"""
+
+    def __init__(self) -> None:
+        self._handlers: List[InvalidationHandler] = []
+
+    def subscribe(self, handler: InvalidationHandler) -> None:
+        self._handlers.append(handler)
+
+    async def publish(self, order_id: str, user_id: Optional[str] = None) -> None:
+        self._dispatch(order_id, user_id)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def _dispatch(self, order_id: str, user_id: Optional[str]) -> None:
+        metrics.increment("cache_invalidations_received")
+        for handler in self._handlers:
+            handler(order_id, user_id)
+
+
+class SnsInvalidationBus(LocalInvalidationBus):
+    """Evicts cached orders whenever any task publishes an order event to the SNS topic.
+
+    Each task subscribes its own short-lived SQS queue to the topic on start and removes both on stop.
+    Publishing is a no-op: the order event SnsService already sends carries the keys to evict.
+    """
+
+    def __init__(self, sns_client, sqs_client, topic_arn: str, wait_seconds: int = 20) -> None:
+        super().__init__()
+        self.sns_client = sns_client
+        self.sqs_client = sqs_client
+        self.topic_arn = topic_arn
+        self.wait_seconds = wait_seconds
+        self.queue_url: Optional[str] = None
+        self.subscription_arn: Optional[str] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def publish(self, order_id: str, user_id: Optional[str] = None) -> None:
+        pass
+
+    async def start(self) -> None:
+        queue_name = f"order-cache-invalidation-{uuid.uuid4().hex}"
+        response = await asyncio.to_thread(
+            self.sqs_client.create_queue,
+            QueueName=queue_name,
+            Attributes={"MessageRetentionPeriod": "60", "ReceiveMessageWaitTimeSeconds": str(self.wait_seconds)}
+        )
+        self.queue_url = response["QueueUrl"]
+        attributes = await asyncio.to_thread(self.sqs_client.get_queue_attributes, QueueUrl=self.queue_url, AttributeNames=["QueueArn"])
+        queue_arn = attributes["Attributes"]["QueueArn"]
+        await asyncio.to_thread(
+            self.sqs_client.set_queue_attributes,
+            QueueUrl=self.queue_url,
+            Attributes={"Policy": json.dumps({
+                "Version": "2012-10-17",
+                "Statement": [{
+                    "Effect": "Allow",
+                    "Principal": {"Service": "sns.amazonaws.com"},
+                    "Action": "sqs:SendMessage",
+                    "Resource": queue_arn,
+                    "Condition": {"ArnEquals": {"aws:SourceArn": self.topic_arn}}
+                }]
+            })}
+        )
+        subscription = await asyncio.to_thread(
+            self.sns_client.subscribe,
+            TopicArn=self.topic_arn,
+            Protocol="sqs",
+            Endpoint=queue_arn,
+            Attributes={"RawMessageDelivery": "true"},
+            ReturnSubscriptionArn=True
+        )
+        self.subscription_arn = subscription["SubscriptionArn"]
+        self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller:
+            self._poller.cancel()
+            self._poller = None
+        try:
+            if self.subscription_arn:
+                await asyncio.to_thread(self.sns_client.unsubscribe, SubscriptionArn=self.subscription_arn)
+            if self.queue_url:
+                await asyncio.to_thread(self.sqs_client.delete_queue, QueueUrl=self.queue_url)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"Failed to remove cache invalidation queue {self.queue_url}: {str(e)}")
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:
+                # Evictions must keep flowing for the life of the task, whatever one poll ran into
+                logger.exception("Cache invalidation poll failed unexpectedly")
+                await asyncio.sleep(1)
+
+    async def poll_once(self) -> None:
+        # Long polls run on their own thread rather than the AWS I/O executor so they never hold a request worker
+        try:
+            response = await asyncio.to_thread(
+                self.sqs_client.receive_message,
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=10,
+                WaitTimeSeconds=self.wait_seconds,
+                MessageAttributeNames=[EVENT_ENCODING_ATTRIBUTE]
+            )
+            messages = response.get("Messages", [])
+            for message in messages:
+                # A message that cannot be handled is logged and deleted with the rest, not retried
+                try:
+                    encoding = message.get("MessageAttributes", {}).get(EVENT_ENCODING_ATTRIBUTE, {}).get("StringValue")
+                    self._handle_body(message["Body"], encoding)
+                except Exception:
+                    logger.exception(f"Failed to handle cache invalidation message {message.get('MessageId')}")
+                    metrics.increment("cache_invalidation_errors")
+            if messages:
+                await asyncio.to_thread(
+                    self.sqs_client.delete_message_batch,
+                    QueueUrl=self.queue_url,
+                    Entries=[{"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]} for index, message in enumerate(messages)]
+                )
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"Cache invalidation poll failed: {str(e)}")
+            await asyncio.sleep(1)
+
+    def _handle_body(self, body: str, encoding: Optional[str] = None) -> None:
+        try:
+            payload = _decode_event(body, encoding)
+            order_id = payload["order_id"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning(f"Ignoring unreadable cache invalidation message: {body[:200]}")
+            return
+        self._dispatch(order_id, payload.get("user_id"))
+
+
+def _decode_event(body: str, encoding: Optional[str]) -> dict:
+    if encoding is None and body.startswith("{"):
+        payload = json.loads(body)
+        if payload.get("Type") != "Notification":
+            return payload
+        # Delivered in the SNS envelope, which carries the message attributes itself
+        encoding = payload.get("MessageAttributes", {}).get(EVENT_ENCODING_ATTRIBUTE, {}).get("Value")
+        body = payload["Message"]
+    if encoding == BINARY_EVENT_ENCODING:
+        return decode_binary_event(base64.b64decode(body))
+    return json.loads(body)
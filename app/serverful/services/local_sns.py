@@ -0,0 +1,37 @@
+import logging
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSnsClient:
+    """Stand-in for the SNS client used with the local storage backends.
+
+    Accepts the calls SnsService and startup make and keeps the most recent messages in memory instead of
+    sending them anywhere, so the service runs without AWS credentials. Nothing consumes them: the email
+    Lambda and cross-task cache invalidation only see events published to the real topic.
+    """
+
+    def __init__(self, max_messages: int = 1000) -> None:
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=max_messages)
+
+    def get_topic_attributes(self, TopicArn: str) -> Dict[str, Any]:
+        return {"Attributes": {"TopicArn": TopicArn}}
+
+    def publish(self, TopicArn: str, **entry: Any) -> Dict[str, Any]:
+        return {"MessageId": self._keep(TopicArn, entry)}
+
+    def publish_batch(self, TopicArn: str, PublishBatchRequestEntries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        successful = [
+            {"Id": entry["Id"], "MessageId": self._keep(TopicArn, {name: value for name, value in entry.items() if name != "Id"})}
+            for entry in PublishBatchRequestEntries
+        ]
+        return {"Successful": successful, "Failed": []}
+
+    def _keep(self, topic_arn: str, entry: Dict[str, Any]) -> str:
+        message_id = str(uuid.uuid4())
+        self.messages.append({"TopicArn": topic_arn, "MessageId": message_id, **entry})
+        logger.debug(f"Kept local SNS message {message_id}: {entry.get('Subject', '')}")
+        return message_id
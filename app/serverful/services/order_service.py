@@ -1,70 +1,97 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from decimal import Decimal
-from app.serverful.models.dto import CreateOrderRequest, ProcessPaymentRequest, OrderStatusResponse
-from app.serverful.models.models import OrderStatus, Order, OrderItem, PaymentDetails, StatusChange, NotificationEvent, NotificationEventType
+from app.serverful.models.dto import BulkOrderResult, CreateOrderRequest, ProcessPaymentRequest, OrderStatusResponse
+from app.serverful.models.models import (
+    EventRecipient, OrderStatus, Order, OrderItem, OrderSnapshot, OrderSummary, PaymentDetails, NotificationEvent, NotificationEventType, User
+)
 from app.serverful.utils.errors import ApplicationError, ErrorCode
 from app.serverful.utils.time_utils import current_timestamp
+from app.serverful.utils.cursor_utils import encode_cursor, decode_cursor
 
 
 class OrderService:
-    def __init__(self, order_repository, user_repository, sns_service) -> None:
+    def __init__(
+        self,
+        order_repository,
+        user_repository,
+        sns_service,
+        invalidation_bus=None,
+        use_outbox: bool = False,
+        event_snapshots: bool = False
+    ) -> None:
         self.order_repo = order_repository
         self.user_repo = user_repository
         self.sns_service = sns_service
+        self.invalidation_bus = invalidation_bus
+        # Events are written to the outbox inside the order's transaction and published by OutboxRelay
+        self.use_outbox = use_outbox
+        # Events carry the order and, where the user is already loaded, the recipient, saving consumers the reads
+        self.event_snapshots = event_snapshots
 
     async def create_order(self, user_id: str, order_req: CreateOrderRequest) -> None:
         user = await self.user_repo.get_by_id(user_id)
         if not user:
             raise ApplicationError(ErrorCode.USER_NOT_FOUND)
         
-        order_id = str(uuid.uuid4())
-        now = current_timestamp()
+        order = self.build_order(user_id, order_req)
+        recipient = self._recipient(user)
+        await self.order_repo.create(order, self._outbox_event(NotificationEventType.ORDER_CREATED), recipient)
+        await self._publish_event(NotificationEventType.ORDER_CREATED, order, recipient)
+
+    async def create_orders(self, user_id: str, order_reqs: List[CreateOrderRequest]) -> List[BulkOrderResult]:
+        user = await self.user_repo.get_by_id(user_id)
+        if not user:
+            raise ApplicationError(ErrorCode.USER_NOT_FOUND)
         
-        items = [OrderItem(
-            product_id=item.product_id,
-            product_name=item.product_name,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            subtotal=item.subtotal
-        ) for item in order_req.items]
-        total = sum(item.subtotal for item in items)
+        orders = [self.build_order(user_id, order_req) for order_req in order_reqs]
+        recipient = self._recipient(user)
+        errors = await self.order_repo.create_many(orders, self._outbox_event(NotificationEventType.ORDER_CREATED), recipient)
         
-        order = Order(
-            order_id=order_id,
-            user_id=user_id,
-            delivery_address=order_req.delivery_address,
-            status=OrderStatus.PAYMENT_PENDING,
-            items=items,
-            total_amount=total,
-            created_at=now,
-            updated_at=now
-        )
+        created = [order for order, error in zip(orders, errors) if error is None]
+        await asyncio.gather(*(self._publish_event(NotificationEventType.ORDER_CREATED, order, recipient) for order in created))
         
-        await self.order_repo.create(order)
-        await self._publish_event(NotificationEventType.ORDER_CREATED, order_id, user_id)
+        return [BulkOrderResult(
+            index=index,
+            order_id=order.order_id if error is None else None,
+            status="created" if error is None else "failed",
+            error=str(error) if error is not None else None
+        ) for index, (order, error) in enumerate(zip(orders, errors))]
 
     async def cancel_order(self, user_id: str, order_id: str) -> None:
-        order = await self.order_repo.get_by_user_and_order(user_id, order_id)
-        if not order:
-            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
-        
-        if order.status not in [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED]:
-            raise ApplicationError(ErrorCode.ORDER_CANNOT_BE_CANCELLED)
-        
-        await self._update_order_status(order, OrderStatus.ORDER_CANCELLED, "user")
-        await self._publish_event(NotificationEventType.ORDER_CANCELLED, order_id, user_id)
+        try:
+            order = await self.order_repo.transition(
+                order_id,
+                [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED],
+                OrderStatus.ORDER_CANCELLED,
+                "user",
+                user_id=user_id,
+                event_type=self._outbox_event(NotificationEventType.ORDER_CANCELLED)
+            )
+        except ApplicationError as e:
+            if e.error_code == ErrorCode.INVALID_ORDER_STATUS:
+                raise ApplicationError(ErrorCode.ORDER_CANNOT_BE_CANCELLED)
+            raise
+        
+        await self._publish_event(NotificationEventType.ORDER_CANCELLED, order)
 
     async def get_order_by_id(self, order_id: str) -> Order:
-        order = await self.order_repo.get_by_order_id(order_id)
+        order = await self.order_repo.get_by_order_id(order_id, include_history=True)
         if not order:
             raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
         
         return order
 
+    async def get_orders_by_ids(self, order_ids: List[str]) -> Tuple[List[Order], List[str]]:
+        orders = await self.order_repo.get_many(order_ids)
+        found_ids = {order.order_id for order in orders}
+        missing_order_ids = [order_id for order_id in dict.fromkeys(order_ids) if order_id not in found_ids]
+        return orders, missing_order_ids
+
     async def get_order(self, user_id: str, order_id: str) -> Order:
-        order = await self.order_repo.get_by_user_and_order(user_id, order_id)
+        order = await self.order_repo.get_by_user_and_order(user_id, order_id, include_history=True)
         if not order:
             raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
         
@@ -82,112 +109,146 @@ class OrderService:
             updated_at=order.updated_at
         )
 
-    async def get_user_orders(self, user_id: str) -> List[Order]:
-        orders = await self.order_repo.get_by_user(user_id)
-        return orders
+    async def get_user_orders(self, user_id: str, limit: int, cursor: Optional[str] = None, summary: bool = False) -> Tuple[List[Union[Order, OrderSummary]], Optional[str]]:
+        scope = f"user:{user_id}"
+        start_key = self._decode_cursor(cursor, scope)
+        orders, last_key = await self.order_repo.get_by_user(user_id, limit, start_key, summary=summary)
+        return orders, self._encode_cursor(last_key, scope)
+
+    async def get_orders_by_status(
+        self,
+        status: OrderStatus,
+        limit: int,
+        cursor: Optional[str] = None,
+        summary: bool = False,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Tuple[List[Union[Order, OrderSummary]], Optional[str]]:
+        if date_from and date_to and date_from > date_to:
+            raise ApplicationError(ErrorCode.INVALID_INPUT, "'from' must not be after 'to'")
+        scope = f"status:{status.value}:{date_from or ''}:{date_to or ''}"
+        cursor_state = self._decode_cursor(cursor, scope)
+        orders, next_state = await self.order_repo.get_by_status(status, limit, cursor_state, summary=summary, date_from=date_from, date_to=date_to)
+        return orders, self._encode_cursor(next_state, scope)
+
+    async def get_all_orders(self, limit: int, cursor: Optional[str] = None, summary: bool = False) -> Tuple[List[Union[Order, OrderSummary]], Optional[str]]:
+        cursor_state = self._decode_cursor(cursor, "all")
+        orders, next_state = await self.order_repo.get_all(limit, cursor_state, summary=summary)
+        return orders, self._encode_cursor(next_state, "all")
+
+    async def get_order_stats(self, day: Optional[date] = None) -> Dict[OrderStatus, int]:
+        return await self.order_repo.get_status_counts(day)
 
-    async def get_orders_by_status(self, status: Optional[OrderStatus]) -> List[Order]:
-        if status:
-            orders = await self.order_repo.get_by_status(status)
-        else:
-            orders = await self.order_repo.get_all()
-        return orders
+    async def stream_all_orders(self, page_size: int) -> AsyncIterator[List[Order]]:
+        async for orders in self.order_repo.iter_all(page_size):
+            yield orders
 
     async def process_payment(self, user_id: str, order_id: str, payment_req: ProcessPaymentRequest) -> Order:
-        order = await self.order_repo.get_by_user_and_order(user_id, order_id)
-        if not order:
-            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
-        
-        if order.status not in [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED]:
-            raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
-        
         is_success = payment_req.payment_status.value == "success"
         new_status = OrderStatus.PAYMENT_CONFIRMED if is_success else OrderStatus.PAYMENT_FAILED
         event_type = NotificationEventType.PAYMENT_CONFIRMED if is_success else NotificationEventType.PAYMENT_FAILED
         
-        now = current_timestamp()
         transaction_id = str(uuid.uuid4())
         payment_details = PaymentDetails(
             payment_method=payment_req.payment_method,
             transaction_id=transaction_id,
             payment_status=payment_req.payment_status.value,
-            processed_at=now
+            processed_at=current_timestamp()
         )
         
-        status_change = StatusChange(
-            from_status=order.status,
-            to_status=new_status,
-            changed_at=now,
-            changed_by="user"
+        order = await self.order_repo.transition(
+            order_id,
+            [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED],
+            new_status,
+            "user",
+            user_id=user_id,
+            payment_details=payment_details,
+            include_history=True,
+            event_type=self._outbox_event(event_type)
         )
-        
-        order.status = new_status
-        order.payment_details = payment_details
-        order.status_history.append(status_change)
-        order.updated_at = now
-        
-        previous_status = status_change.from_status
-        await self.order_repo.update_status(order, previous_status)
-        await self._publish_event(event_type, order_id, user_id)
+        await self._publish_event(event_type, order)
         
         return order
 
     async def start_fulfilment(self, order_id: str) -> None:
-        order = await self.order_repo.get_by_order_id(order_id)
-        if not order:
-            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
-        
-        if order.status != OrderStatus.PAYMENT_CONFIRMED:
-            raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
-        
-        await self._update_order_status(order, OrderStatus.FULFILLMENT_IN_PROGRESS, "system")
-        await self._publish_event(NotificationEventType.FULFILLMENT_STARTED, order_id, order.user_id)
+        order = await self.order_repo.transition(
+            order_id, [OrderStatus.PAYMENT_CONFIRMED], OrderStatus.FULFILLMENT_IN_PROGRESS, "system",
+            event_type=self._outbox_event(NotificationEventType.FULFILLMENT_STARTED)
+        )
+        await self._publish_event(NotificationEventType.FULFILLMENT_STARTED, order)
 
     async def complete_fulfilment(self, order_id: str) -> None:
-        order = await self.order_repo.get_by_order_id(order_id)
-        if not order:
-            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
-        
-        if order.status != OrderStatus.FULFILLMENT_IN_PROGRESS:
-            raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
-        
-        await self._update_order_status(order, OrderStatus.FULFILLED, "system")
-        await self._publish_event(NotificationEventType.FULFILLED, order_id, order.user_id)
+        order = await self.order_repo.transition(
+            order_id, [OrderStatus.FULFILLMENT_IN_PROGRESS], OrderStatus.FULFILLED, "system",
+            event_type=self._outbox_event(NotificationEventType.FULFILLED)
+        )
+        await self._publish_event(NotificationEventType.FULFILLED, order)
 
     async def cancel_fulfilment(self, order_id: str) -> None:
-        order = await self.order_repo.get_by_order_id(order_id)
-        if not order:
-            raise ApplicationError(ErrorCode.ORDER_NOT_FOUND)
-        
-        if order.status != OrderStatus.FULFILLMENT_IN_PROGRESS:
-            raise ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
-        
-        await self._update_order_status(order, OrderStatus.FULFILLMENT_FAILED, "system")
-        await self._publish_event(NotificationEventType.FULFILLMENT_CANCELLED, order_id, order.user_id)
+        order = await self.order_repo.transition(
+            order_id, [OrderStatus.FULFILLMENT_IN_PROGRESS], OrderStatus.FULFILLMENT_FAILED, "system",
+            event_type=self._outbox_event(NotificationEventType.FULFILLMENT_CANCELLED)
+        )
+        await self._publish_event(NotificationEventType.FULFILLMENT_CANCELLED, order)
 
-    async def _update_order_status(self, order: Order, new_status: OrderStatus, changed_by: str) -> None:
-        old_status = order.status
+    @staticmethod
+    def build_order(user_id: str, order_req: CreateOrderRequest) -> Order:
         now = current_timestamp()
         
-        status_change = StatusChange(
-            from_status=old_status,
-            to_status=new_status,
-            changed_at=now,
-            changed_by=changed_by
+        items = [OrderItem(
+            product_id=item.product_id,
+            product_name=item.product_name,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+            subtotal=item.subtotal
+        ) for item in order_req.items]
+        total = sum(item.subtotal for item in items)
+        
+        return Order(
+            order_id=str(uuid.uuid4()),
+            user_id=user_id,
+            delivery_address=order_req.delivery_address,
+            status=OrderStatus.PAYMENT_PENDING,
+            items=items,
+            total_amount=total,
+            created_at=now,
+            updated_at=now
         )
+
+    def _outbox_event(self, event_type: NotificationEventType) -> Optional[NotificationEventType]:
+        return event_type if self.use_outbox else None
+
+    def _recipient(self, user: User) -> Optional[EventRecipient]:
+        if not self.event_snapshots:
+            return None
+        return EventRecipient(first_name=user.first_name, last_name=user.last_name, email=user.email)
+
+    async def _publish_event(self, event_type: NotificationEventType, order: Order, recipient: Optional[EventRecipient] = None) -> None:
+        # With the outbox the event was committed alongside the order, and the relay publishes it
+        if not self.use_outbox:
+            event = NotificationEvent(
+                event_id=str(uuid.uuid4()),
+                event_type=event_type,
+                order_id=order.order_id,
+                user_id=order.user_id,
+                occurred_at=current_timestamp(),
+                order=OrderSnapshot.of(order) if self.event_snapshots else None,
+                recipient=recipient
+            )
+            await self.sns_service.publish_event(event)
+        if self.invalidation_bus:
+            await self.invalidation_bus.publish(order.order_id, order.user_id)
+
+    def _decode_cursor(self, cursor: Optional[str], scope: str) -> Optional[Dict[str, Any]]:
+        # A cursor only resumes the listing it came from: the same user, or the same status and date range
+        if not cursor:
+            return None
         
-        order.status = new_status
-        order.status_history.append(status_change)
-        order.updated_at = now
+        start_key = decode_cursor(cursor, scope)
+        if start_key is None:
+            raise ApplicationError(ErrorCode.INVALID_CURSOR)
         
-        await self.order_repo.update_status(order, old_status)
+        return start_key
 
-    async def _publish_event(self, event_type: NotificationEventType, order_id: str, user_id: str) -> None:
-        event = NotificationEvent(
-            event_id=str(uuid.uuid4()),
-            event_type=event_type,
-            order_id=order_id,
-            user_id=user_id,
-            occurred_at=current_timestamp()
-        )
-        await self.sns_service.publish_event(event)
\ No newline at end of file
+    def _encode_cursor(self, last_key: Optional[Dict[str, Any]], scope: str) -> Optional[str]:
+        return encode_cursor(last_key, scope) if last_key else None
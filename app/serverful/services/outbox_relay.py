@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import List
+from botocore.exceptions import BotoCoreError, ClientError
+from app.serverful.models.models import NotificationEvent
+from app.serverful.repositories.order_repository import OUTBOX_PAGE_SIZE, outbox_partition_keys
+from app.serverful.utils.errors import ApplicationError
+from app.serverful.utils.metrics import metrics
+from app.serverful.utils.time_utils import current_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """Publishes order events from the outbox to SNS and removes them once delivered.
+
+    Events committed by this task are handed over in memory right after their transaction, so they go out
+    without waiting for a poll. A periodic sweep picks up events older than sweep_age_seconds, which are left
+    only when a publish failed or a task stopped before delivering. Delivery is at-least-once: an event
+    can be published again if its removal fails, so consumers should de-duplicate on event_id.
+    """
+
+    def __init__(self, order_repository, sns_service, sweep_interval_seconds: float, sweep_age_seconds: int) -> None:
+        self.order_repo = order_repository
+        self.sns_service = sns_service
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.sweep_age_seconds = sweep_age_seconds
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, events: List[NotificationEvent]) -> None:
+        for event in events:
+            self._queue.put_nowait(event)
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._deliver_submitted()), asyncio.create_task(self._sweep())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Anything still queued is delivered now rather than left for another task's sweep
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self.deliver(pending)
+
+    async def deliver(self, events: List[NotificationEvent]) -> int:
+        """Publish events and remove the delivered ones from the outbox; returns how many were delivered."""
+        results = await asyncio.gather(*(self.sns_service.publish_event(event) for event in events), return_exceptions=True)
+        delivered = [event for event, result in zip(events, results) if not isinstance(result, BaseException)]
+        failed = len(events) - len(delivered)
+        if failed:
+            metrics.increment("outbox_publish_failures", failed)
+            logger.warning(f"{failed} outbox events failed to publish; the sweep will retry them")
+
+        if delivered:
+            try:
+                await self.order_repo.delete_outbox_events(delivered)
+            except (ClientError, BotoCoreError, ApplicationError) as e:
+                # They were published, so the sweep publishing them again is the only cost
+                logger.warning(f"Failed to remove {len(delivered)} delivered outbox events: {str(e)}")
+            metrics.increment("outbox_events_delivered", len(delivered))
+        return len(delivered)
+
+    async def sweep_once(self) -> int:
+        cutoff = current_timestamp() - self.sweep_age_seconds
+        delivered = 0
+        for partition_key in outbox_partition_keys(self.order_repo.outbox_shards):
+            last = None
+            while True:
+                # Pages resume after the last event read, so events that keep failing cannot hide newer ones
+                events = await self.order_repo.get_outbox_events(partition_key, cutoff, OUTBOX_PAGE_SIZE, start_after=last)
+                if not events:
+                    break
+                delivered += await self.deliver(events)
+                if len(events) < OUTBOX_PAGE_SIZE:
+                    break
+                last = events[-1]
+        return delivered
+
+    async def _deliver_submitted(self) -> None:
+        while True:
+            events = [await self._queue.get()]
+            while len(events) < OUTBOX_PAGE_SIZE and not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            try:
+                await self.deliver(events)
+            except (ClientError, BotoCoreError, ApplicationError) as e:
+                logger.warning(f"Outbox delivery failed, leaving {len(events)} events for the sweep: {str(e)}")
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                swept = await self.sweep_once()
+                if swept:
+                    metrics.increment("outbox_events_swept", swept)
+            except (ClientError, BotoCoreError, ApplicationError) as e:
+                logger.warning(f"Outbox sweep failed: {str(e)}")
@@ -1,44 +1,305 @@
+import asyncio
+import base64
 import json
 import logging
+import struct
+from typing import Any, Dict, List, Optional, Set, Tuple
 from botocore.exceptions import ClientError
-from app.serverful.models.models import NotificationEvent
+from app.serverful.models.models import NotificationEvent, NotificationEventType
 from app.serverful.config.config import settings
+from app.serverful.services.event_spool import EventSpool
+from app.serverful.utils.io_utils import run_io
+from app.serverful.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# PublishBatch limits: ten entries and 256 KiB of messages and attributes per call
+PUBLISH_BATCH_SIZE = 10
+PUBLISH_BATCH_MAX_BYTES = 256 * 1024
+
+PendingEvent = Tuple[NotificationEvent, Dict[str, Any], asyncio.Future]
+
+# Message attribute naming the body encoding; events without it are JSON
+EVENT_ENCODING_ATTRIBUTE = "event_encoding"
+BINARY_EVENT_ENCODING = "binary-v1"
+
+# Binary layout, version 1: a fixed header of version, event type code and occurred_at, then event_id,
+# order_id and user_id (a length byte and UTF-8, or _UUID_TAG and 16 raw bytes), and nothing after.
+# SNS bodies are text, so it is sent base64 encoded. Only id-only events use it: a snapshot would have
+# to ride along as JSON, which is no smaller and slower to read than plain JSON, so those stay JSON.
+# Codes are positional and append-only; the email Lambda keeps the same table.
+BINARY_EVENT_VERSION = 1
+_HEADER = struct.Struct(">BBQ")
+_UUID_TAG = 0xFF
+_EVENT_TYPE_CODES = (
+    NotificationEventType.ORDER_CREATED,
+    NotificationEventType.PAYMENT_CONFIRMED,
+    NotificationEventType.PAYMENT_FAILED,
+    NotificationEventType.FULFILLMENT_STARTED,
+    NotificationEventType.FULFILLED,
+    NotificationEventType.FULFILLMENT_CANCELLED,
+    NotificationEventType.ORDER_CANCELLED
+)
+_EVENT_TYPE_CODE = {event_type: code for code, event_type in enumerate(_EVENT_TYPE_CODES)}
+
 
 class SnsService:
+    """Publishes order events to the SNS topic.
+
+    After start(), events are queued for a background publisher that groups them into PublishBatch
+    calls within a short linger window; each publish_event call still resolves or raises with its own
+    event's outcome. Before start() (and after stop()) every event is sent with its own Publish call.
+    With a spool, events SNS rejects are written to it instead of raising, and replayed once SNS recovers.
+    """
 
-    def __init__(self, sns_client) -> None:
+    def __init__(
+        self,
+        sns_client,
+        linger_seconds: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        snapshot_max_bytes: Optional[int] = None,
+        encoding: Optional[str] = None,
+        spool: Optional[EventSpool] = None
+    ) -> None:
         self.sns_client = sns_client
         self.topic_arn = settings.SNS_TOPIC_ARN
+        self.linger_seconds = linger_seconds if linger_seconds is not None else settings.SNS_PUBLISH_LINGER_MS / 1000
+        self.max_concurrency = max_concurrency or settings.SNS_PUBLISH_CONCURRENCY
+        self.snapshot_max_bytes = snapshot_max_bytes or settings.ORDER_EVENT_SNAPSHOT_MAX_BYTES
+        self.encoding = encoding or settings.SNS_EVENT_ENCODING
+        self.spool = spool
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._sends: Set[asyncio.Task] = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._runner = asyncio.create_task(self._run(self._queue))
+        if self.spool:
+            await self.spool.start(self._publish)
+
+    async def stop(self) -> None:
+        """Publish everything already queued, then fall back to direct publishing."""
+        if self.spool:
+            await self.spool.stop()
+        if self._runner is None:
+            return
+        runner, self._runner = self._runner, None
+        self._queue.put_nowait(None)
+        await runner
+        await asyncio.gather(*self._sends, return_exceptions=True)
+        self._queue = None
 
     async def publish_event(self, event: NotificationEvent) -> None:
-        message = {
-            "event_id": event.event_id,
-            "event_type": event.event_type.value,
-            "order_id": event.order_id,
-            "user_id": event.user_id,
-            "occurred_at": event.occurred_at
+        if self.spool is None:
+            await self._publish(event)
+            return
+        try:
+            await self._publish(event)
+        except Exception as e:
+            # Batched sends fail with whatever _send_batch caught; the order is already committed either way
+            await self.spool.append(event)
+            metrics.increment("sns_events_spooled")
+            logger.warning(f"Spooled event {event.event_id} for order {event.order_id} after publish failure: {str(e)}")
+
+    async def _publish(self, event: NotificationEvent) -> None:
+        entry = self._entry(event)
+        if self._runner is None:
+            await self._publish_one(event, entry)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((event, entry, future))
+        await future
+
+    def _entry(self, event: NotificationEvent) -> Dict[str, Any]:
+        attributes = {
+            "event_type": {
+                "DataType": "String",
+                "StringValue": event.event_type.value
+            },
+            "order_id": {
+                "DataType": "String",
+                "StringValue": event.order_id
+            }
         }
-        
+        snapshot = self._snapshot(event)
+        if self.encoding == BINARY_EVENT_ENCODING and not snapshot:
+            body = base64.b64encode(encode_binary_event(event)).decode("ascii")
+            attributes[EVENT_ENCODING_ATTRIBUTE] = {"DataType": "String", "StringValue": BINARY_EVENT_ENCODING}
+        else:
+            body = json.dumps({
+                "event_id": event.event_id,
+                "event_type": event.event_type.value,
+                "order_id": event.order_id,
+                "user_id": event.user_id,
+                "occurred_at": event.occurred_at,
+                **snapshot
+            })
+
+        return {
+            "Message": body,
+            "Subject": f"Order Event: {event.event_type.value}",
+            "MessageAttributes": attributes
+        }
+
+    def _snapshot(self, event: NotificationEvent) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {}
+        if event.order is not None:
+            snapshot["order"] = event.order.model_dump(mode="json")
+        if event.recipient is not None:
+            snapshot["recipient"] = event.recipient.model_dump()
+        if snapshot and len(json.dumps(snapshot).encode("utf-8")) > self.snapshot_max_bytes:
+            # Too large to carry; consumers fall back to reading the order and user themselves
+            metrics.increment("sns_event_snapshots_dropped")
+            logger.info(f"Event {event.event_id} snapshot exceeds {self.snapshot_max_bytes} bytes; publishing ids only")
+            return {}
+        return snapshot
+
+    async def _publish_one(self, event: NotificationEvent, entry: Dict[str, Any]) -> None:
         try:
-            response = self.sns_client.publish(
-                TopicArn=self.topic_arn,
-                Message=json.dumps(message),
-                Subject=f"Order Event: {event.event_type.value}",
-                MessageAttributes={
-                    "event_type": {
-                        "DataType": "String",
-                        "StringValue": event.event_type.value
-                    },
-                    "order_id": {
-                        "DataType": "String",
-                        "StringValue": event.order_id
-                    }
-                }
-            )
+            response = await run_io(self.sns_client.publish, TopicArn=self.topic_arn, **entry)
             logger.info(f"Published SNS event: {event.event_type.value} for order {event.order_id}, MessageId: {response['MessageId']}")
         except ClientError as e:
             logger.error(f"Failed to publish SNS event: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        carry: Optional[PendingEvent] = None
+        stopping = False
+        while not stopping:
+            first = carry if carry is not None else await queue.get()
+            carry = None
+            if first is None:
+                break
+            batch, size = [first], _entry_size(first[1])
+            deadline = loop.time() + self.linger_seconds
+            while len(batch) < PUBLISH_BATCH_SIZE:
+                try:
+                    pending = queue.get_nowait() if queue.qsize() else await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                if size + _entry_size(pending[1]) > PUBLISH_BATCH_MAX_BYTES:
+                    # Too big to ride along; it opens the next batch instead
+                    carry = pending
+                    break
+                batch.append(pending)
+                size += _entry_size(pending[1])
+
+            await semaphore.acquire()
+            send = asyncio.create_task(self._send_batch(batch))
+            self._sends.add(send)
+
+            def finished(task: asyncio.Task) -> None:
+                self._sends.discard(task)
+                semaphore.release()
+
+            send.add_done_callback(finished)
+
+        if carry is not None:
+            await self._send_batch([carry])
+
+    async def _send_batch(self, batch: List[PendingEvent]) -> None:
+        metrics.increment("sns_publish_batches")
+        try:
+            response = await run_io(
+                self.sns_client.publish_batch,
+                TopicArn=self.topic_arn,
+                PublishBatchRequestEntries=[{"Id": str(index), **entry} for index, (_, entry, _) in enumerate(batch)]
+            )
+        except Exception as e:
+            # Any failure, not only AWS errors (say the I/O executor shutting down), must reach the waiting publishers
+            logger.error(f"Failed to publish batch of {len(batch)} SNS events: {str(e)}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for result in response.get("Successful", []):
+            event, _, future = batch[int(result["Id"])]
+            logger.info(f"Published SNS event: {event.event_type.value} for order {event.order_id}, MessageId: {result['MessageId']}")
+            if not future.done():
+                future.set_result(None)
+        for failure in response.get("Failed", []):
+            event, _, future = batch[int(failure["Id"])]
+            logger.error(f"Failed to publish SNS event {event.event_id}: {failure['Code']} {failure.get('Message', '')}")
+            if not future.done():
+                future.set_exception(ClientError({"Error": {"Code": failure["Code"], "Message": failure.get("Message", "")}}, "PublishBatch"))
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(ClientError({"Error": {"Code": "MissingResult", "Message": "PublishBatch returned no result for this entry"}}, "PublishBatch"))
+
+
+def _entry_size(entry: Dict[str, Any]) -> int:
+    attributes = sum(len(name) + len(value["DataType"]) + len(value["StringValue"]) for name, value in entry["MessageAttributes"].items())
+    return len(entry["Message"].encode("utf-8")) + attributes
+
+
+def encode_binary_event(event: NotificationEvent) -> bytes:
+    parts = [_HEADER.pack(BINARY_EVENT_VERSION, _EVENT_TYPE_CODE[event.event_type], event.occurred_at)]
+    for value in (event.event_id, event.order_id, event.user_id):
+        parts.append(_encode_id(value))
+    return b"".join(parts)
+
+
+def decode_binary_event(data: bytes) -> Dict[str, Any]:
+    """Event fields as the JSON encoding would carry them; raises ValueError for unreadable or unknown-version data."""
+    try:
+        version, code, occurred_at = _HEADER.unpack_from(data)
+        if version != BINARY_EVENT_VERSION:
+            raise ValueError(f"Unsupported binary event version {version}")
+        offset = _HEADER.size
+        ids = []
+        for _ in range(3):
+            value, offset = _decode_id(data, offset)
+            ids.append(value)
+        message = {
+            "event_id": ids[0],
+            "event_type": _EVENT_TYPE_CODES[code].value,
+            "order_id": ids[1],
+            "user_id": ids[2],
+            "occurred_at": occurred_at
+        }
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Malformed binary event: {str(e)}")
+    if offset != len(data):
+        raise ValueError("Malformed binary event: trailing data")
+    return message
+
+
+def _encode_id(value: str) -> bytes:
+    # Canonical UUIDs, which every generated id is, pack to 16 bytes instead of 36
+    if len(value) == 36 and value[8] == value[13] == value[18] == value[23] == "-" and value == value.lower():
+        try:
+            packed = bytes.fromhex(value.replace("-", ""))
+        except ValueError:
+            packed = b""
+        if len(packed) == 16:
+            return bytes((_UUID_TAG,)) + packed
+    encoded = value.encode("utf-8")
+    if len(encoded) >= _UUID_TAG:
+        raise ValueError(f"Identifier too long for binary event encoding: {value[:50]}")
+    return bytes((len(encoded),)) + encoded
+
+
+def _decode_id(data: bytes, offset: int) -> Tuple[str, int]:
+    length = data[offset]
+    offset += 1
+    if length == _UUID_TAG:
+        digits = data[offset:offset + 16].hex()
+        if len(digits) != 32:
+            raise ValueError("Truncated binary event")
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}", offset + 16
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Truncated binary event")
+    return data[offset:end].decode("utf-8"), end
@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from app.serverful.utils.metrics import metrics
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a fixed TTL; not thread-safe, use from the event loop"""
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            metrics.increment(f"{self.name}_cache_misses")
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.increment(f"{self.name}_cache_hits")
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            metrics.increment(f"{self.name}_cache_evictions")
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
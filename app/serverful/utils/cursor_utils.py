@@ -0,0 +1,47 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from typing import Any, Dict, Optional
+from app.serverful.config.config import settings
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.CURSOR_SECRET_KEY.encode("utf-8"), payload, hashlib.sha256).digest()[:16]
+
+
+def encode_cursor(key: Dict[str, Any], scope: str) -> str:
+    """Encode a DynamoDB start key as an opaque, signed continuation token, valid only for the listing named by scope"""
+    payload: bytes = json.dumps({"scope": scope, "key": key}, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, scope: str) -> Optional[Dict[str, Any]]:
+    """Return the start key carried by a cursor, or None if it is malformed, tampered with or issued for another scope"""
+    try:
+        payload_part, signature_part = cursor.split(".")
+        payload: bytes = _b64decode(payload_part)
+        signature: bytes = _b64decode(signature_part)
+    except (ValueError, binascii.Error):
+        return None
+    
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    
+    try:
+        body = json.loads(payload)
+    except ValueError:
+        return None
+    
+    if not isinstance(body, dict) or body.get("scope") != scope or not isinstance(body.get("key"), dict):
+        return None
+    return body["key"]
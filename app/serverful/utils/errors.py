@@ -20,6 +20,7 @@ class ErrorCode:
     PAYMENT_PROCESSING_ERROR = 4002
 
     INVALID_INPUT = 5001
+    INVALID_CURSOR = 5002
 
     INTERNAL_ERROR = 9001
 
@@ -77,6 +78,10 @@ ERROR_REGISTRY: Dict[int, Dict[str, any]] = {
         "message": "Invalid input provided",
         "status_code": status.HTTP_400_BAD_REQUEST,
     },
+    ErrorCode.INVALID_CURSOR: {
+        "message": "Invalid pagination cursor",
+        "status_code": status.HTTP_400_BAD_REQUEST,
+    },
     ErrorCode.INTERNAL_ERROR: {
         "message": "Internal server error",
         "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
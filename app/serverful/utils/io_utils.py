@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class IOExecutor:
+    """Thread pool reserved for blocking AWS SDK calls, sized to match the botocore connection pool"""
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aws-io")
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return self._executor._work_queue.qsize()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._invoke, fn, args, kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _invoke(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+_io_executor: Optional[IOExecutor] = None
+
+
+def configure_io_executor(executor: Optional[IOExecutor]) -> None:
+    global _io_executor
+    _io_executor = executor
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await a native coroutine function directly, or run a blocking call on the I/O executor"""
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    if _io_executor is not None:
+        return await _io_executor.run(fn, *args, **kwargs)
+    return await asyncio.to_thread(fn, *args, **kwargs)
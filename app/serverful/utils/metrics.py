@@ -0,0 +1,30 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+
+class MetricsRegistry:
+    """Process-local counters and gauges exposed through the admin metrics endpoint"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        self._gauges[name] = read
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "counters": counters,
+            "gauges": {name: read() for name, read in self._gauges.items()}
+        }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.serverful.utils.metrics import metrics
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one in-flight call whose result every caller awaits"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], copy: Optional[Callable[[Any], Any]] = None) -> Any:
+        """Run fn() unless a call for key is already running; copy, if given, is applied to the result for joiners."""
+        call = self._calls.get(key)
+        if call is not None:
+            metrics.increment(f"{self.name}_coalesced")
+            # Shielded so a cancelled joiner cannot cancel the call the other awaiters depend on
+            result = await asyncio.shield(call)
+            return copy(result) if copy else result
+
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        call.add_done_callback(lambda _: self._calls.pop(key) if self._calls.get(key) is call else None)
+        return await asyncio.shield(call)
+
+    def forget(self, matches: Callable[[Hashable], bool]) -> None:
+        """Stop handing matching in-flight calls to new callers, e.g. after a write made their result stale."""
+        for key in [key for key in self._calls if matches(key)]:
+            del self._calls[key]
@@ -1,24 +1,47 @@
+import base64
 import json
 import os
+import struct
 import boto3
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from service import EmailService
 from models import OrderNotificationMessage
-from repository import UserRepository, OrderRepository
+from repository import UserRepository, OrderRepository, ProcessedEventRepository
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Must match the encoder in the API's SnsService: the attribute flagging the body encoding, and binary
+# version 1 (version, event type code, occurred_at, three ids), sent base64 encoded. Events carrying
+# a snapshot are always JSON.
+EVENT_ENCODING_ATTRIBUTE = 'event_encoding'
+BINARY_EVENT_ENCODING = 'binary-v1'
+BINARY_EVENT_VERSION = 1
+_HEADER = struct.Struct('>BBQ')
+_UUID_TAG = 0xFF
+_EVENT_TYPE_CODES = (
+    'ORDER_CREATED',
+    'PAYMENT_CONFIRMED',
+    'PAYMENT_FAILED',
+    'FULFILLMENT_STARTED',
+    'FULFILLED',
+    'FULFILLMENT_CANCELED',
+    'ORDER_CANCELLED',
+)
+
 
 dynamodb = boto3.resource('dynamodb')
 ses = boto3.client('ses')
 table = dynamodb.Table(os.environ['DYNAMODB_TABLE_NAME'])
 from_email = os.environ['FROM_EMAIL']
+# How long an event_id is remembered; longer than the API's outbox and spool can redeliver it
+processed_event_ttl = int(os.environ.get('PROCESSED_EVENT_TTL_SECONDS', str(7 * 24 * 3600)))
 
 user_repository = UserRepository(table)
 order_repository = OrderRepository(table)
-email_service = EmailService(user_repository, order_repository, ses, from_email)
+processed_event_repository = ProcessedEventRepository(table, processed_event_ttl)
+email_service = EmailService(user_repository, order_repository, ses, from_email, processed_event_repository)
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -26,12 +49,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     for record in event['Records']:
         try:
-            sqs_body = json.loads(record['body'])
-            
-            if 'Message' in sqs_body:
-                sns_message = json.loads(sqs_body['Message'])
-            else:
-                sns_message = sqs_body
+            sns_message = read_message(record)
             
             notification = OrderNotificationMessage(**sns_message)
             
@@ -46,4 +64,54 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     return {
         "batchItemFailures": batch_item_failures
-    }
\ No newline at end of file
+    }
+
+
+def read_message(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Event fields from an SQS record, delivered raw or in the SNS envelope, in either encoding"""
+    body = record['body']
+    encoding = record.get('messageAttributes', {}).get(EVENT_ENCODING_ATTRIBUTE, {}).get('stringValue')
+    if encoding is None and body.startswith('{'):
+        sqs_body = json.loads(body)
+        if 'Message' not in sqs_body:
+            return sqs_body
+        encoding = sqs_body.get('MessageAttributes', {}).get(EVENT_ENCODING_ATTRIBUTE, {}).get('Value')
+        body = sqs_body['Message']
+    
+    if encoding == BINARY_EVENT_ENCODING:
+        return decode_binary_event(base64.b64decode(body))
+    return json.loads(body)
+
+
+def decode_binary_event(data: bytes) -> Dict[str, Any]:
+    version, code, occurred_at = _HEADER.unpack_from(data)
+    if version != BINARY_EVENT_VERSION:
+        raise ValueError(f"Unsupported binary event version {version}")
+    
+    offset = _HEADER.size
+    event_id, offset = _decode_id(data, offset)
+    order_id, offset = _decode_id(data, offset)
+    user_id, offset = _decode_id(data, offset)
+    message = {
+        'event_id': event_id,
+        'event_type': _EVENT_TYPE_CODES[code],
+        'order_id': order_id,
+        'user_id': user_id,
+        'occurred_at': occurred_at
+    }
+    if offset != len(data):
+        raise ValueError('Malformed binary event: trailing data')
+    return message
+
+
+def _decode_id(data: bytes, offset: int) -> Tuple[str, int]:
+    length = data[offset]
+    offset += 1
+    if length == _UUID_TAG:
+        digits = data[offset:offset + 16].hex()
+        if len(digits) != 32:
+            raise ValueError('Truncated binary event')
+        return f'{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}', offset + 16
+    if offset + length > len(data):
+        raise ValueError("Truncated binary event")
+    return data[offset:offset + length].decode('utf-8'), offset + length
@@ -1,3 +1,4 @@
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 
@@ -6,4 +7,7 @@ class OrderNotificationMessage(BaseModel):
     event_type: str = Field(min_length=1)
     order_id: str = Field(min_length=1)
     user_id: str = Field(min_length=1)
-    occurred_at: int = Field(gt=0)
\ No newline at end of file
+    occurred_at: int = Field(gt=0)
+    # Present on enriched events; when missing the order and user are read from DynamoDB
+    order: Optional[Dict[str, Any]] = None
+    recipient: Optional[Dict[str, Any]] = None
\ No newline at end of file
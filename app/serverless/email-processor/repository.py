@@ -1,5 +1,7 @@
 import logging
+import time
 from typing import Dict, Any, Optional
+from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -45,3 +47,32 @@ class OrderRepository:
         except Exception as e:
             logger.error(f"Error fetching order {order_id}: {str(e)}")
             return None
+
+
+class ProcessedEventRepository:
+    """Marks events as handled so a re-published event does not send a second email"""
+
+    def __init__(self, table, ttl_seconds: int):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+
+    def claim(self, event_id: str) -> bool:
+        """Record the event as processed; False if it already was"""
+        try:
+            self.table.put_item(
+                Item={
+                    'PK': f'PROCESSED#{event_id}',
+                    'SK': 'EVENT',
+                    'expires_at': int(time.time()) + self.ttl_seconds
+                },
+                ConditionExpression='attribute_not_exists(PK)'
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def release(self, event_id: str) -> None:
+        """Forget a claim whose processing failed, so the redelivered event is handled"""
+        self.table.delete_item(Key={'PK': f'PROCESSED#{event_id}', 'SK': 'EVENT'})
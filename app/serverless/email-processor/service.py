@@ -1,18 +1,26 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from models import OrderNotificationMessage
-from repository import UserRepository, OrderRepository
+from repository import UserRepository, OrderRepository, ProcessedEventRepository
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
 class EmailService:
-    def __init__(self, user_repository: UserRepository, order_repository: OrderRepository, ses_client, from_email: str):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        order_repository: OrderRepository,
+        ses_client,
+        from_email: str,
+        processed_events: Optional[ProcessedEventRepository] = None
+    ):
         self.user_repo = user_repository
         self.order_repo = order_repository
         self.ses = ses_client
         self.from_email = from_email
+        self.processed_events = processed_events
         
         self.event_templates = {
             'ORDER_CREATED': self._order_created_template,
@@ -25,12 +33,26 @@ class EmailService:
         }
 
     def process_event(self, notification: OrderNotificationMessage) -> None:
-        user = self.user_repo.get_user(notification.user_id)
+        # The API publishes at least once, so the same event_id can arrive again
+        if self.processed_events is None:
+            self._handle_event(notification)
+            return
+        if not self.processed_events.claim(notification.event_id):
+            logger.info(f"Skipping already processed event: {notification.event_id}")
+            return
+        try:
+            self._handle_event(notification)
+        except Exception:
+            self.processed_events.release(notification.event_id)
+            raise
+
+    def _handle_event(self, notification: OrderNotificationMessage) -> None:
+        user = notification.recipient or self.user_repo.get_user(notification.user_id)
         if not user:
             logger.warning(f"User not found: {notification.user_id}")
             return
         
-        order = self.order_repo.get_order(notification.order_id)
+        order = notification.order or self.order_repo.get_order(notification.order_id)
         if not order:
             logger.warning(f"Order not found: {notification.order_id}")
             return
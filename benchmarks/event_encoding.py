@@ -0,0 +1,96 @@
+"""Per-event cost and size of the order event encodings.
+
+Compares the JSON and binary-v1 message bodies SnsService publishes, for plain events and events
+carrying an order snapshot and recipient (which binary-v1 publishes as JSON):
+  encode  building the message body from a NotificationEvent
+  decode  what a consumer does to get the event fields back from an SQS record body, with raw
+          message delivery (one parse) and inside the SNS envelope (two parses for JSON)
+  bytes   published message body size
+
+    python -m benchmarks.event_encoding --events 100000
+"""
+import argparse
+import base64
+import json
+import time
+import uuid
+from decimal import Decimal
+from typing import Callable, List
+from app.serverful.models.models import EventRecipient, NotificationEvent, NotificationEventType, OrderItem, OrderSnapshot, OrderStatus
+from app.serverful.services.sns_service import BINARY_EVENT_ENCODING, EVENT_ENCODING_ATTRIBUTE, SnsService, decode_binary_event
+
+
+def make_events(count: int, snapshot: bool) -> List[NotificationEvent]:
+    items = [OrderItem(
+        product_id=f"prod-{line}",
+        product_name=f"Product {line}",
+        quantity=2,
+        unit_price=Decimal("10.99"),
+        subtotal=Decimal("21.98")
+    ) for line in range(3)]
+    return [NotificationEvent(
+        event_id=str(uuid.uuid4()),
+        event_type=NotificationEventType.PAYMENT_CONFIRMED,
+        order_id=str(uuid.uuid4()),
+        user_id=str(uuid.uuid4()),
+        occurred_at=1704700100 + index,
+        order=OrderSnapshot(
+            order_status=OrderStatus.PAYMENT_CONFIRMED,
+            items=items,
+            total_amount=Decimal("65.94"),
+            delivery_address="123 Main St, Springfield"
+        ) if snapshot else None,
+        recipient=EventRecipient(first_name="John", last_name="Doe", email="john@example.com") if snapshot else None
+    ) for index in range(count)]
+
+
+def envelope(body: str) -> str:
+    return json.dumps({"Type": "Notification", "MessageId": str(uuid.uuid4()), "Message": body})
+
+
+def decode_json(body: str) -> dict:
+    return json.loads(body)
+
+
+def decode_binary(body: str) -> dict:
+    return decode_binary_event(base64.b64decode(body))
+
+
+def decode_enveloped(decode: Callable[[str], dict]) -> Callable[[str], dict]:
+    return lambda body: decode(json.loads(body)["Message"])
+
+
+def per_event_us(operation: Callable, values: list) -> float:
+    started = time.perf_counter()
+    for value in values:
+        operation(value)
+    return (time.perf_counter() - started) / len(values) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark order event encodings")
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    encoders = {
+        "json": SnsService(sns_client=None, encoding="json"),
+        "binary": SnsService(sns_client=None, encoding=BINARY_EVENT_ENCODING)
+    }
+    print(f"{'event':>9} {'encoding':>9} {'encode us':>10} {'decode us':>10} {'enveloped us':>13} {'bytes':>6}")
+    for snapshot in (False, True):
+        events = make_events(args.events, snapshot)
+        for name, service in encoders.items():
+            encode = lambda event: service._entry(event)["Message"]
+            encode_us = per_event_us(encode, events)
+            bodies = [encode(event) for event in events]
+            enveloped = [envelope(body) for body in bodies]
+            decode = decode_binary if EVENT_ENCODING_ATTRIBUTE in service._entry(events[0])["MessageAttributes"] else decode_json
+            decode_us = per_event_us(decode, bodies)
+            enveloped_us = per_event_us(decode_enveloped(decode), enveloped)
+            size = sum(len(body) for body in bodies) / len(bodies)
+            label = "snapshot" if snapshot else "ids"
+            print(f"{label:>9} {name:>9} {encode_us:>10.2f} {decode_us:>10.2f} {enveloped_us:>13.2f} {size:>6.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Per-order cost of turning DynamoDB order rows into Order models.
+
+Compares three read paths over the same rows:
+  validated  Table resource deserialization, then full Pydantic validation
+  resource   Table resource deserialization, then trusted model construction
+  raw        low-level client AttributeValue maps decoded by attribute_codec.decode_order
+
+    python -m benchmarks.unmarshal_orders --sizes 1000 100000
+"""
+import argparse
+import time
+from decimal import Decimal
+from typing import Callable, List
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from app.serverful.models.models import Order, OrderItem, OrderStatus, PaymentDetails, StatusChange
+from app.serverful.repositories.attribute_codec import decode_order, trusted
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def make_rows(count: int) -> List[dict]:
+    """Order rows as a low-level client returns them."""
+    return [{name: _serializer.serialize(value) for name, value in {
+        "PK": f"ORDER#order-{index}",
+        "SK": "DETAILS",
+        "order_id": f"order-{index}",
+        "user_id": "123e4567-e89b-12d3-a456-426614174000",
+        "delivery_address": "123 Main St, Springfield",
+        "order_status": "PAYMENT_CONFIRMED",
+        "items": [{
+            "product_id": f"prod-{line}",
+            "product_name": f"Product {line}",
+            "quantity": 2,
+            "unit_price": "10.99",
+            "subtotal": "21.98"
+        } for line in range(3)],
+        "total_amount": "65.94",
+        "payment_details": {
+            "payment_method": "credit_card",
+            "transaction_id": f"txn-{index}",
+            "payment_status": "success",
+            "processed_at": 1704700100
+        },
+        "status_history": [{
+            "from_status": "PAYMENT_PENDING",
+            "to_status": "PAYMENT_CONFIRMED",
+            "changed_at": 1704700100,
+            "changed_by": "user"
+        }],
+        "created_at": 1704700000,
+        "updated_at": 1704700100
+    }.items()} for index in range(count)]
+
+
+def resource_item(raw: dict) -> dict:
+    return {name: _deserializer.deserialize(value) for name, value in raw.items()}
+
+
+def validated_unmarshal(raw: dict) -> Order:
+    item = resource_item(raw)
+    return Order(
+        order_id=item["order_id"],
+        user_id=item["user_id"],
+        delivery_address=item["delivery_address"],
+        status=OrderStatus(item["order_status"]),
+        items=[OrderItem(
+            product_id=i["product_id"],
+            product_name=i["product_name"],
+            quantity=i["quantity"],
+            unit_price=Decimal(i["unit_price"]),
+            subtotal=Decimal(i["subtotal"])
+        ) for i in item["items"]],
+        total_amount=Decimal(item["total_amount"]),
+        payment_details=PaymentDetails(**item["payment_details"]),
+        status_history=[StatusChange(**sc) for sc in item["status_history"]],
+        created_at=item["created_at"],
+        updated_at=item["updated_at"]
+    )
+
+
+def resource_unmarshal(raw: dict) -> Order:
+    item = resource_item(raw)
+    pd = item["payment_details"]
+    return trusted(
+        Order,
+        order_id=item["order_id"],
+        user_id=item["user_id"],
+        delivery_address=item["delivery_address"],
+        status=OrderStatus(item["order_status"]),
+        items=[trusted(
+            OrderItem,
+            product_id=i["product_id"],
+            product_name=i["product_name"],
+            quantity=int(i["quantity"]),
+            unit_price=Decimal(i["unit_price"]),
+            subtotal=Decimal(i["subtotal"])
+        ) for i in item["items"]],
+        total_amount=Decimal(item["total_amount"]),
+        payment_details=trusted(
+            PaymentDetails,
+            payment_method=pd["payment_method"],
+            transaction_id=pd["transaction_id"],
+            payment_status=pd["payment_status"],
+            processed_at=int(pd["processed_at"])
+        ),
+        status_history=[trusted(
+            StatusChange,
+            from_status=OrderStatus(sc["from_status"]),
+            to_status=OrderStatus(sc["to_status"]),
+            changed_at=int(sc["changed_at"]),
+            changed_by=sc["changed_by"]
+        ) for sc in item["status_history"]],
+        created_at=int(item["created_at"]),
+        updated_at=int(item["updated_at"])
+    )
+
+
+def per_order_us(unmarshal: Callable[[dict], Order], rows: List[dict]) -> float:
+    started = time.perf_counter()
+    for row in rows:
+        unmarshal(row)
+    return (time.perf_counter() - started) / len(rows) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark order unmarshalling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'orders':>8} {'validated us/order':>20} {'resource us/order':>19} {'raw us/order':>14}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        validated = per_order_us(validated_unmarshal, rows)
+        resource = per_order_us(resource_unmarshal, rows)
+        raw = per_order_us(decode_order, rows)
+        print(f"{size:>8} {validated:>20.2f} {resource:>19.2f} {raw:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import json
 import pytest
+from datetime import date
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, MagicMock
 from decimal import Decimal
-from app.serverful.models.models import Order, OrderStatus, OrderItem
+from app.serverful.models.models import Order, OrderStatus, OrderItem, OrderSummary
 from app.serverful.utils.errors import ApplicationError, ErrorCode
 
 
@@ -83,18 +85,37 @@ class TestAdminOrderControllers:
         assert response.status_code == 400
 
     def test_get_all_orders_success(self, client, mock_order_service, sample_order):
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[sample_order])
+        mock_order_service.get_all_orders = AsyncMock(return_value=([sample_order], None))
         response = client.get("/orders/all")
         assert response.status_code == 200
         data = response.json()
         assert data["total_count"] == 1
 
     def test_get_all_orders_empty(self, client, mock_order_service):
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[])
+        mock_order_service.get_all_orders = AsyncMock(return_value=([], None))
         response = client.get("/orders/all")
         assert response.status_code == 200
         assert response.json()["total_count"] == 0
 
+    def test_get_all_orders_ndjson_stream(self, client, mock_order_service, sample_order):
+        order2 = sample_order.model_copy()
+        order2.order_id = "order-456"
+        
+        async def pages(page_size):
+            yield [sample_order]
+            yield [order2]
+        
+        mock_order_service.stream_all_orders = pages
+        response = client.get("/orders/all", params={"format": "ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert [json.loads(line)["order_id"] for line in lines] == ["order-123", "order-456"]
+
+    def test_get_all_orders_invalid_format(self, client, mock_order_service):
+        response = client.get("/orders/all", params={"format": "xml"})
+        assert response.status_code == 422
+
     def test_get_order_by_id_success(self, client, mock_order_service, sample_order):
         mock_order_service.get_order_by_id = AsyncMock(return_value=sample_order)
         response = client.get("/orders/order/order-123")
@@ -106,16 +127,47 @@ class TestAdminOrderControllers:
         response = client.get("/orders/order/nonexistent")
         assert response.status_code == 404
 
+    def test_batch_get_orders_success(self, client, mock_order_service, sample_order):
+        mock_order_service.get_orders_by_ids = AsyncMock(return_value=([sample_order], ["order-404"]))
+        response = client.post("/orders/batch-get", json={"order_ids": ["order-123", "order-404"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert [order["order_id"] for order in data["orders"]] == ["order-123"]
+        assert data["missing_order_ids"] == ["order-404"]
+        mock_order_service.get_orders_by_ids.assert_called_once_with(["order-123", "order-404"])
+
+    def test_batch_get_orders_requires_ids(self, client, mock_order_service):
+        response = client.post("/orders/batch-get", json={"order_ids": []})
+        assert response.status_code == 422
+
+    def test_get_order_stats(self, client, mock_order_service):
+        counts = {status: 0 for status in OrderStatus}
+        counts[OrderStatus.PAYMENT_FAILED] = 7
+        mock_order_service.get_order_stats = AsyncMock(return_value=counts)
+        response = client.get("/orders/stats", params={"date": "2024-03-01"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["counts"]["PAYMENT_FAILED"] == 7
+        assert data["date"] == "2024-03-01"
+        mock_order_service.get_order_stats.assert_called_once_with(date(2024, 3, 1))
+
+    def test_get_order_stats_overall(self, client, mock_order_service):
+        mock_order_service.get_order_stats = AsyncMock(return_value={OrderStatus.FULFILLED: 3})
+        response = client.get("/orders/stats")
+        assert response.status_code == 200
+        assert response.json() == {"counts": {"FULFILLED": 3}, "date": None}
+        mock_order_service.get_order_stats.assert_called_once_with(None)
+
     def test_get_all_orders_by_status_payment_pending(self, client, mock_order_service, sample_order):
         pending_order = sample_order.model_copy()
         pending_order.status = OrderStatus.PAYMENT_PENDING
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[pending_order])
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([pending_order], None))
         response = client.get(f"/orders/{OrderStatus.PAYMENT_PENDING.value}")
         assert response.status_code == 200
         assert response.json()["orders"][0]["status"] == OrderStatus.PAYMENT_PENDING.value
 
     def test_get_all_orders_by_status_payment_confirmed(self, client, mock_order_service, sample_order):
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[sample_order])
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([sample_order], None))
         response = client.get(f"/orders/{OrderStatus.PAYMENT_CONFIRMED.value}")
         assert response.status_code == 200
         assert response.json()["orders"][0]["status"] == OrderStatus.PAYMENT_CONFIRMED.value
@@ -128,24 +180,64 @@ class TestAdminOrderControllers:
                             unit_price=Decimal("15.50"), subtotal=Decimal("15.50"))],
             total_amount=Decimal("15.50"), created_at=1704700100, updated_at=1704700200,
         )
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[fulfilled_order])
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([fulfilled_order], None))
         response = client.get(f"/orders/{OrderStatus.FULFILLED.value}")
         assert response.status_code == 200
         assert response.json()["orders"][0]["status"] == OrderStatus.FULFILLED.value
 
     def test_get_all_orders_by_status_empty(self, client, mock_order_service):
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[])
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([], None))
         response = client.get(f"/orders/{OrderStatus.PAYMENT_PENDING.value}")
         assert response.status_code == 200
         assert response.json()["total_count"] == 0
 
+    def test_get_all_orders_by_status_with_cursor(self, client, mock_order_service, sample_order):
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([sample_order], "next-token"))
+        response = client.get(f"/orders/{OrderStatus.PAYMENT_CONFIRMED.value}", params={"limit": 1, "cursor": "page-token"})
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] == "next-token"
+        mock_order_service.get_orders_by_status.assert_called_once_with(OrderStatus.PAYMENT_CONFIRMED, 1, "page-token", summary=False, date_from=None, date_to=None)
+
+    def test_get_all_orders_by_status_summary_view(self, client, mock_order_service):
+        summary = OrderSummary(order_id="order-123", user_id="123e4567-e89b-12d3-a456-426614174000", status=OrderStatus.PAYMENT_PENDING,
+                               total_amount=Decimal("21.98"), created_at=1704700000, updated_at=1704700000)
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([summary], None))
+        response = client.get(f"/orders/{OrderStatus.PAYMENT_PENDING.value}", params={"view": "summary"})
+        assert response.status_code == 200
+        order = response.json()["orders"][0]
+        assert order["order_id"] == "order-123"
+        assert "items" not in order
+        mock_order_service.get_orders_by_status.assert_called_once_with(OrderStatus.PAYMENT_PENDING, 50, None, summary=True, date_from=None, date_to=None)
+
+    def test_get_all_orders_by_status_date_range(self, client, mock_order_service, sample_order):
+        mock_order_service.get_orders_by_status = AsyncMock(return_value=([sample_order], None))
+        response = client.get(f"/orders/{OrderStatus.PAYMENT_FAILED.value}", params={"from": "2024-03-01", "to": "2024-03-02"})
+        assert response.status_code == 200
+        mock_order_service.get_orders_by_status.assert_called_once_with(
+            OrderStatus.PAYMENT_FAILED, 50, None, summary=False, date_from=date(2024, 3, 1), date_to=date(2024, 3, 2)
+        )
+
+    def test_get_all_orders_by_status_invalid_date(self, client, mock_order_service):
+        response = client.get(f"/orders/{OrderStatus.PAYMENT_FAILED.value}", params={"from": "yesterday"})
+        assert response.status_code == 422
+
+    def test_get_all_orders_invalid_view(self, client, mock_order_service):
+        response = client.get("/orders/all", params={"view": "compact"})
+        assert response.status_code == 422
+
+    def test_get_all_orders_by_status_limit_too_large(self, client, mock_order_service):
+        response = client.get(f"/orders/{OrderStatus.PAYMENT_PENDING.value}", params={"limit": 1000})
+        assert response.status_code == 422
+
     def test_get_all_orders_with_multiple_orders(self, client, mock_order_service, sample_order):
         order2 = sample_order.model_copy()
         order2.order_id = "order-456"
-        mock_order_service.get_orders_by_status = AsyncMock(return_value=[sample_order, order2])
-        response = client.get("/orders/all")
+        mock_order_service.get_all_orders = AsyncMock(return_value=([sample_order, order2], "next-token"))
+        response = client.get("/orders/all", params={"limit": 2})
         assert response.status_code == 200
         assert response.json()["total_count"] == 2
+        assert response.json()["next_cursor"] == "next-token"
+        mock_order_service.get_all_orders.assert_called_once_with(2, None, summary=False)
 
     def test_update_fulfilment_service_error(self, client, mock_order_service):
         mock_order_service.start_fulfilment = AsyncMock(side_effect=Exception("Database error"))
@@ -2,7 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, MagicMock
 from decimal import Decimal
-from app.serverful.models.models import Order, OrderStatus, OrderItem
+from app.serverful.models.models import Order, OrderStatus, OrderItem, OrderSummary
+from app.serverful.models.dto import BulkOrderResult
 from app.serverful.utils.errors import ApplicationError, ErrorCode
 
 
@@ -87,22 +88,67 @@ class TestCustomerOrderControllers:
         response = client.post("/orders", json=payload)
         assert response.status_code == 422, f"Failed for case: {description}"
 
+    def test_create_orders_bulk(self, client, mock_order_service, valid_order_payload):
+        mock_order_service.create_orders = AsyncMock(return_value=[
+            BulkOrderResult(index=0, order_id="order-1", status="created"),
+            BulkOrderResult(index=1, status="failed", error="throttled")
+        ])
+        response = client.post("/orders/bulk", json={"orders": [valid_order_payload, valid_order_payload]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created_count"] == 1
+        assert data["failed_count"] == 1
+        assert data["results"][1]["error"] == "throttled"
+        assert len(mock_order_service.create_orders.call_args[0][1]) == 2
+
+    def test_create_orders_bulk_requires_orders(self, client, mock_order_service):
+        response = client.post("/orders/bulk", json={"orders": []})
+        assert response.status_code == 422
+
     def test_get_user_orders_success(self, client, mock_order_service, sample_order):
-        mock_order_service.get_user_orders = AsyncMock(return_value=[sample_order])
+        mock_order_service.get_user_orders = AsyncMock(return_value=([sample_order], None))
         response = client.get("/orders")
         assert response.status_code == 200
         data = response.json()
         assert data["total_count"] == 1
         assert len(data["orders"]) == 1
+        assert data["next_cursor"] is None
         mock_order_service.get_user_orders.assert_called_once()
 
     def test_get_user_orders_empty(self, client, mock_order_service):
-        mock_order_service.get_user_orders = AsyncMock(return_value=[])
+        mock_order_service.get_user_orders = AsyncMock(return_value=([], None))
         response = client.get("/orders")
         assert response.status_code == 200
         data = response.json()
         assert data["total_count"] == 0
 
+    def test_get_user_orders_with_cursor(self, client, mock_order_service, sample_order):
+        mock_order_service.get_user_orders = AsyncMock(return_value=([sample_order], "next-token"))
+        response = client.get("/orders", params={"limit": 1, "cursor": "page-token"})
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] == "next-token"
+        mock_order_service.get_user_orders.assert_called_once_with("123e4567-e89b-12d3-a456-426614174000", 1, "page-token", summary=False)
+
+    def test_get_user_orders_summary_view(self, client, mock_order_service):
+        summary = OrderSummary(order_id="order-123", user_id="123e4567-e89b-12d3-a456-426614174000", status=OrderStatus.PAYMENT_PENDING,
+                               total_amount=Decimal("21.98"), created_at=1704700000, updated_at=1704700000)
+        mock_order_service.get_user_orders = AsyncMock(return_value=([summary], None))
+        response = client.get("/orders", params={"view": "summary"})
+        assert response.status_code == 200
+        order = response.json()["orders"][0]
+        assert order["status"] == "PAYMENT_PENDING"
+        assert "items" not in order
+        assert "status_history" not in order
+
+    def test_get_user_orders_invalid_limit(self, client, mock_order_service):
+        response = client.get("/orders", params={"limit": 0})
+        assert response.status_code == 422
+
+    def test_get_user_orders_invalid_cursor(self, client, mock_order_service):
+        mock_order_service.get_user_orders = AsyncMock(side_effect=ApplicationError(ErrorCode.INVALID_CURSOR))
+        response = client.get("/orders", params={"cursor": "tampered"})
+        assert response.status_code == 400
+
     def test_get_order_by_id_success(self, client, mock_order_service, sample_order):
         mock_order_service.get_order = AsyncMock(return_value=sample_order)
         response = client.get("/orders/order-123")
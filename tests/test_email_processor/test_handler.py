@@ -1,4 +1,6 @@
+import asyncio
 import pytest
+import base64
 import json
 from unittest.mock import Mock, patch, MagicMock
 import sys
@@ -197,3 +199,47 @@ class TestLambdaHandler:
         assert len(result['batchItemFailures']) == 2
         assert result['batchItemFailures'][0]['itemIdentifier'] == 'msg-1'
         assert result['batchItemFailures'][1]['itemIdentifier'] == 'msg-2'
+    
+    def test_read_message_decodes_every_event_type_published_by_api(self):
+        from handler import read_message
+        from app.serverful.models.models import EventRecipient, NotificationEvent, NotificationEventType
+        from app.serverful.services.sns_service import SnsService
+        
+        sns_client = Mock()
+        sns_client.publish.return_value = {'MessageId': 'msg-1'}
+        sns_service = SnsService(sns_client=sns_client, encoding='binary-v1')
+        recipient = EventRecipient(first_name='John', last_name='Doe', email='john@example.com')
+        events = [NotificationEvent(
+            event_id='8f14e45f-ceea-467f-a0b9-2f1e0f4b6f8a',
+            event_type=event_type,
+            order_id='order-123',
+            user_id='123e4567-e89b-12d3-a456-426614174000',
+            occurred_at=1234567890,
+            recipient=recipient if with_snapshot else None
+        ) for event_type in NotificationEventType for with_snapshot in (False, True)]
+        
+        for event in events:
+            asyncio.run(sns_service.publish_event(event))
+            published = sns_client.publish.call_args.kwargs
+            attributes = published['MessageAttributes']
+            raw = {
+                'body': published['Message'],
+                'messageAttributes': {name: {'stringValue': value['StringValue'], 'dataType': value['DataType']} for name, value in attributes.items()}
+            }
+            enveloped = {'body': json.dumps({
+                'Type': 'Notification',
+                'Message': published['Message'],
+                'MessageAttributes': {name: {'Type': value['DataType'], 'Value': value['StringValue']} for name, value in attributes.items()}
+            })}
+            expected = {
+                'event_id': event.event_id,
+                'event_type': event.event_type.value,
+                'order_id': event.order_id,
+                'user_id': event.user_id,
+                'occurred_at': event.occurred_at,
+                **({'recipient': recipient.model_dump()} if event.recipient else {})
+            }
+            
+            assert ('event_encoding' in attributes) == (event.recipient is None)
+            assert read_message(raw) == expected
+            assert read_message(enveloped) == expected
@@ -1,11 +1,12 @@
 import pytest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
+from botocore.exceptions import ClientError
 import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../app/serverless/email-processor'))
 
-from repository import UserRepository, OrderRepository
+from repository import UserRepository, OrderRepository, ProcessedEventRepository
 
 
 class TestUserRepository:
@@ -94,3 +95,38 @@ class TestOrderRepository:
         result = order_repository.get_order('order-123')
         
         assert result is None
+
+
+class TestProcessedEventRepository:
+    @pytest.fixture
+    def mock_table(self):
+        return Mock()
+    
+    @pytest.fixture
+    def processed_events(self, mock_table):
+        return ProcessedEventRepository(mock_table, 3600)
+    
+    def test_claim_new_event(self, processed_events, mock_table):
+        with patch('repository.time.time', return_value=1000):
+            assert processed_events.claim('event-123') is True
+        
+        mock_table.put_item.assert_called_once_with(
+            Item={'PK': 'PROCESSED#event-123', 'SK': 'EVENT', 'expires_at': 4600},
+            ConditionExpression='attribute_not_exists(PK)'
+        )
+    
+    def test_claim_seen_event(self, processed_events, mock_table):
+        mock_table.put_item.side_effect = ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        
+        assert processed_events.claim('event-123') is False
+    
+    def test_claim_error_propagates(self, processed_events, mock_table):
+        mock_table.put_item.side_effect = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'PutItem')
+        
+        with pytest.raises(ClientError):
+            processed_events.claim('event-123')
+    
+    def test_release(self, processed_events, mock_table):
+        processed_events.release('event-123')
+        
+        mock_table.delete_item.assert_called_once_with(Key={'PK': 'PROCESSED#event-123', 'SK': 'EVENT'})
@@ -234,6 +234,69 @@ class TestEmailService:
         call_args = mock_ses_client.send_email.call_args[1]
         assert 'Order Cancelled' in call_args['Message']['Subject']['Data']
     
+    def test_process_enriched_event_skips_lookups(self, email_service, mock_user_repo, mock_order_repo, mock_ses_client, sample_user, sample_order):
+        notification = OrderNotificationMessage(
+            event_id='event-123',
+            event_type='ORDER_CREATED',
+            order_id='order-123',
+            user_id='user-123',
+            occurred_at=1234567890,
+            order=sample_order,
+            recipient=sample_user
+        )
+        
+        email_service.process_event(notification)
+        
+        mock_user_repo.get_user.assert_not_called()
+        mock_order_repo.get_order.assert_not_called()
+        call_args = mock_ses_client.send_email.call_args[1]
+        assert call_args['Destination']['ToAddresses'] == ['john@example.com']
+        assert 'Product A' in call_args['Message']['Body']['Html']['Data']
+    
+    def test_process_event_with_order_snapshot_reads_only_user(self, email_service, mock_user_repo, mock_order_repo, mock_ses_client, sample_user, sample_order):
+        mock_user_repo.get_user.return_value = sample_user
+        notification = OrderNotificationMessage(
+            event_id='event-123',
+            event_type='FULFILLED',
+            order_id='order-123',
+            user_id='user-123',
+            occurred_at=1234567890,
+            order=sample_order
+        )
+        
+        email_service.process_event(notification)
+        
+        mock_user_repo.get_user.assert_called_once_with('user-123')
+        mock_order_repo.get_order.assert_not_called()
+        mock_ses_client.send_email.assert_called_once()
+    
+    def test_duplicate_event_sends_one_email(self, mock_user_repo, mock_order_repo, mock_ses_client, sample_user, sample_order, sample_notification):
+        mock_user_repo.get_user.return_value = sample_user
+        mock_order_repo.get_order.return_value = sample_order
+        processed_events = Mock()
+        processed_events.claim.side_effect = [True, False]
+        email_service = EmailService(mock_user_repo, mock_order_repo, mock_ses_client, 'noreply@example.com', processed_events)
+        
+        email_service.process_event(sample_notification)
+        email_service.process_event(sample_notification)
+        
+        assert processed_events.claim.call_args_list == [(('event-123',),), (('event-123',),)]
+        mock_ses_client.send_email.assert_called_once()
+        processed_events.release.assert_not_called()
+    
+    def test_failed_event_releases_claim(self, mock_user_repo, mock_order_repo, mock_ses_client, sample_user, sample_order, sample_notification):
+        mock_user_repo.get_user.return_value = sample_user
+        mock_order_repo.get_order.return_value = sample_order
+        mock_ses_client.send_email.side_effect = Exception("SES error")
+        processed_events = Mock()
+        processed_events.claim.return_value = True
+        email_service = EmailService(mock_user_repo, mock_order_repo, mock_ses_client, 'noreply@example.com', processed_events)
+        
+        with pytest.raises(Exception, match="SES error"):
+            email_service.process_event(sample_notification)
+        
+        processed_events.release.assert_called_once_with('event-123')
+    
     def test_send_email_success(self, email_service, mock_ses_client):
         email_service._send_email('test@example.com', 'Test Subject', '<html>Test Body</html>')
         
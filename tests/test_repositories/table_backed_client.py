@@ -0,0 +1,60 @@
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def serialize(item):
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def deserialize(item):
+    return {name: _deserializer.deserialize(value) for name, value in item.items()}
+
+
+class TableBackedClient:
+    """Low-level client stand-in answering from a mocked Table and resource.
+
+    Tests keep stubbing and asserting plain items on the Table mock while the repositories
+    send and receive raw AttributeValue maps, as they do against a real low-level client.
+    """
+
+    def __init__(self, dynamodb, table):
+        self.dynamodb = dynamodb
+        self.table = table
+
+    def query(self, TableName, **kwargs):
+        return self._raw_response(self.table.query(**self._plain_params(kwargs)))
+
+    def scan(self, TableName, **kwargs):
+        return self._raw_response(self.table.scan(**self._plain_params(kwargs)))
+
+    def get_item(self, TableName, Key, **kwargs):
+        return self._raw_response(self.table.get_item(Key=deserialize(Key), **kwargs))
+
+    def batch_get_item(self, RequestItems):
+        plain_request = {table: {"Keys": [deserialize(key) for key in request["Keys"]]} for table, request in RequestItems.items()}
+        response = self.dynamodb.batch_get_item(RequestItems=plain_request)
+        return {
+            "Responses": {table: [serialize(item) for item in items] for table, items in response.get("Responses", {}).items()},
+            "UnprocessedKeys": {
+                table: {"Keys": [serialize(key) for key in request["Keys"]]}
+                for table, request in (response.get("UnprocessedKeys") or {}).items()
+            }
+        }
+
+    def _plain_params(self, kwargs):
+        plain = dict(kwargs)
+        for name in ("ExpressionAttributeValues", "ExclusiveStartKey"):
+            if name in plain:
+                plain[name] = deserialize(plain[name])
+        return plain
+
+    def _raw_response(self, response):
+        raw = dict(response)
+        if "Items" in raw:
+            raw["Items"] = [serialize(item) for item in raw["Items"]]
+        for name in ("Item", "LastEvaluatedKey"):
+            if raw.get(name):
+                raw[name] = serialize(raw[name])
+        return raw
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import pytest
+import httpx
+from decimal import Decimal
+from botocore.credentials import Credentials
+from botocore.exceptions import ClientError
+from app.serverful.repositories.async_dynamodb import AsyncDynamoDBClient, AsyncDynamoDBResource
+from app.serverful.repositories.order_repository import OrderRepository
+from app.serverful.repositories.user_repository import UserRepository
+from app.serverful.models.models import Order, OrderItem, OrderStatus, User
+
+
+class LocalDynamoDBEndpoint:
+    """In-memory stand-in for the DynamoDB JSON endpoint covering the calls the repositories make"""
+
+    def __init__(self):
+        self.items = {}
+        self.requests = []
+        self.fail_next = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        operation = request.headers["X-Amz-Target"].split(".")[-1]
+        self.requests.append(request)
+        if self.fail_next:
+            failure = self.fail_next.pop(0)
+            return failure if isinstance(failure, httpx.Response) else self._error(*failure)
+        result = getattr(self, operation.lower())(json.loads(request.content))
+        return result if isinstance(result, httpx.Response) else httpx.Response(200, json=result)
+
+    def _error(self, status_code, error_type):
+        return httpx.Response(status_code, json={"__type": f"com.amazonaws.dynamodb.v20120810#{error_type}", "message": error_type})
+
+    def _key(self, item):
+        return item["PK"]["S"], item["SK"]["S"]
+
+    def query(self, params):
+        values = params["ExpressionAttributeValues"]
+        matches = [item for (pk, sk), item in sorted(self.items.items()) if pk == values[":pk"]["S"]]
+        if ":sk" in values:
+            matches = [item for item in matches if item["SK"] == values[":sk"]]
+        return {"Items": matches, "Count": len(matches)}
+
+    def scan(self, params):
+        sk = params["ExpressionAttributeValues"][":sk"]
+        return {"Items": [item for item in self.items.values() if item["SK"] == sk]}
+
+    def describetable(self, params):
+        return {"Table": {"TableName": params["TableName"], "TableStatus": "ACTIVE"}}
+
+    def transactwriteitems(self, params):
+        for action in params["TransactItems"]:
+            if "Put" in action:
+                item = action["Put"]["Item"]
+                if action["Put"].get("ConditionExpression") == "attribute_not_exists(PK)" and self._key(item) in self.items:
+                    return self._error(400, "TransactionCanceledException")
+        
+        for action in params["TransactItems"]:
+            if "Put" in action:
+                self.items[self._key(action["Put"]["Item"])] = action["Put"]["Item"]
+            elif "Delete" in action:
+                self.items.pop(self._key(action["Delete"]["Key"]), None)
+            elif "Update" in action:
+                update = action["Update"]
+                item = self.items.setdefault(self._key(update["Key"]), dict(update["Key"]))
+                if update["UpdateExpression"].startswith("ADD "):
+                    for assignment in update["UpdateExpression"][len("ADD "):].split(", "):
+                        name, placeholder = assignment.split(" ")
+                        attribute = update["ExpressionAttributeNames"][name]
+                        current = int(item.get(attribute, {"N": "0"})["N"])
+                        item[attribute] = {"N": str(current + int(update["ExpressionAttributeValues"][placeholder]["N"]))}
+                    continue
+                for assignment in update["UpdateExpression"][len("SET "):].split(", "):
+                    name, placeholder = assignment.split(" = ")
+                    item[name] = update["ExpressionAttributeValues"][placeholder]
+        return {}
+
+
+@pytest.fixture
+def endpoint():
+    return LocalDynamoDBEndpoint()
+
+
+@pytest.fixture
+def resource(endpoint):
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(endpoint))
+    client = AsyncDynamoDBClient(http_client, "ap-south-1", Credentials("key", "secret"), endpoint_url="http://dynamodb.local", max_attempts=3)
+    return AsyncDynamoDBResource(client)
+
+
+@pytest.fixture
+def sample_order():
+    return Order(
+        order_id="order-123",
+        user_id="123e4567-e89b-12d3-a456-426614174000",
+        delivery_address="123 Main St, Springfield",
+        status=OrderStatus.PAYMENT_PENDING,
+        items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=2, unit_price=Decimal("10.00"), subtotal=Decimal("20.00"))],
+        total_amount=Decimal("20.00"),
+        created_at=1234567890,
+        updated_at=1234567890
+    )
+
+
+@pytest.fixture
+def sample_user():
+    return User(
+        user_id="123e4567-e89b-12d3-a456-426614174000",
+        first_name="John",
+        last_name="Doe",
+        email="john@example.com",
+        password="$2b$12$hashedpassword",
+        created_at=1234567890,
+        updated_at=1234567890
+    )
+
+
+class TestAsyncDynamoDBClient:
+    @pytest.mark.asyncio
+    async def test_requests_are_signed(self, resource, endpoint):
+        await resource.Table("test-table").query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": "ORDERS#u"})
+        
+        request = endpoint.requests[0]
+        assert request.headers["X-Amz-Target"] == "DynamoDB_20120810.Query"
+        assert request.headers["Authorization"].startswith("AWS4-HMAC-SHA256 Credential=key/")
+        assert "/ap-south-1/dynamodb/aws4_request" in request.headers["Authorization"]
+        assert json.loads(request.content)["ExpressionAttributeValues"] == {":pk": {"S": "ORDERS#u"}}
+
+    @pytest.mark.asyncio
+    async def test_error_maps_to_client_error(self, resource, endpoint):
+        endpoint.fail_next.append((400, "ValidationException"))
+        
+        with pytest.raises(ClientError) as exc_info:
+            await resource.Table("test-table").query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": "x"})
+        
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+        assert len(endpoint.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_throttling_is_retried(self, resource, endpoint):
+        endpoint.fail_next.append((400, "ProvisionedThroughputExceededException"))
+        
+        response = await resource.Table("test-table").query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": "x"})
+        
+        assert response["Items"] == []
+        assert len(endpoint.requests) == 2
+
+
+    @pytest.mark.asyncio
+    async def test_non_json_server_errors_are_retried(self, resource, endpoint):
+        endpoint.fail_next += [httpx.Response(502, text="<html>Bad Gateway</html>"), httpx.Response(503)]
+        
+        response = await resource.Table("test-table").query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": "x"})
+        
+        assert response["Items"] == []
+        assert len(endpoint.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_non_json_error_maps_to_client_error(self, resource, endpoint):
+        endpoint.fail_next += [httpx.Response(502, text="<html>Bad Gateway</html>")] * 3
+        
+        with pytest.raises(ClientError) as exc_info:
+            await resource.Table("test-table").query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": "x"})
+        
+        assert exc_info.value.response["Error"]["Code"] == "HTTP502"
+        assert exc_info.value.response["ResponseMetadata"]["HTTPStatusCode"] == 502
+        assert len(endpoint.requests) == 3
+
+class TestRepositoriesOverAsyncClient:
+    @pytest.mark.asyncio
+    async def test_order_round_trip(self, resource, sample_order):
+        repo = OrderRepository(resource, "test-table")
+        
+        await repo.create(sample_order)
+        order = await repo.get_by_order_id(sample_order.order_id)
+        orders, last_key = await repo.get_by_user(sample_order.user_id)
+        
+        assert order == sample_order
+        assert [o.order_id for o in orders] == [sample_order.order_id]
+        assert last_key is None
+
+    @pytest.mark.asyncio
+    async def test_update_status_round_trip(self, resource, sample_order):
+        repo = OrderRepository(resource, "test-table")
+        await repo.create(sample_order)
+        
+        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
+        await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING)
+        
+        assert (await repo.get_by_order_id(sample_order.order_id)).status == OrderStatus.PAYMENT_CONFIRMED
+        assert (await repo.get_by_status(OrderStatus.PAYMENT_PENDING))[0] == []
+
+    @pytest.mark.asyncio
+    async def test_user_round_trip_and_duplicate(self, resource, sample_user):
+        repo = UserRepository(resource, "test-table")
+        
+        await repo.create(sample_user)
+        with pytest.raises(ClientError) as exc_info:
+            await repo.create(sample_user)
+        
+        assert (await repo.get_by_email(sample_user.email)).user_id == sample_user.user_id
+        assert [user.email for user in await repo.get_all()] == [sample_user.email]
+        assert exc_info.value.response["Error"]["Code"] == "TransactionCanceledException"
+
+    @pytest.mark.asyncio
+    async def test_many_in_flight_queries_without_threads(self, resource, sample_order):
+        repo = OrderRepository(resource, "test-table")
+        await repo.create(sample_order)
+        
+        results = await asyncio.gather(*(repo.get_by_order_id(sample_order.order_id) for _ in range(2000)))
+        
+        assert all(order.order_id == sample_order.order_id for order in results)
@@ -0,0 +1,229 @@
+import asyncio
+import pytest
+from datetime import date
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from app.serverful.repositories.async_dynamodb import low_level_client
+from app.serverful.repositories.local_storage import create_local_dynamodb_resource
+from app.serverful.repositories.order_repository import OrderRepository, outbox_partition_key
+from app.serverful.repositories.user_repository import UserRepository
+from app.serverful.models.models import EventRecipient, NotificationEventType, Order, OrderItem, OrderStatus, User
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def resource(request, tmp_path):
+    resource = create_local_dynamodb_resource(request.param, str(tmp_path / "orders.db"))
+    yield resource
+    resource.engine.close()
+
+
+@pytest.fixture
+def raw(resource):
+    client = low_level_client(resource)
+
+    async def call(method, **kwargs):
+        result = getattr(client, method)(TableName="test-table", **kwargs)
+        return await result if asyncio.iscoroutine(result) else result
+
+    return call
+
+
+def make_order(order_id, created_at=1234567890, user_id="123e4567-e89b-12d3-a456-426614174000"):
+    return Order(
+        order_id=order_id,
+        user_id=user_id,
+        delivery_address="123 Main St, Springfield",
+        status=OrderStatus.PAYMENT_PENDING,
+        items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=2, unit_price=Decimal("10.00"), subtotal=Decimal("20.00"))],
+        total_amount=Decimal("20.00"),
+        created_at=created_at,
+        updated_at=created_at
+    )
+
+
+def put(pk, sk, **attributes):
+    return {"Put": {"TableName": "test-table", "Item": {"PK": {"S": pk}, "SK": {"S": sk}, **attributes}}}
+
+
+class TestLocalDynamoDB:
+    @pytest.mark.asyncio
+    async def test_query_pages_in_sort_key_order(self, raw):
+        await raw("transact_write_items", TransactItems=[put("P", f"2024-01-0{day}#ORDER#o{day}") for day in range(1, 6)])
+        page_kwargs = {"KeyConditionExpression": "PK = :pk AND SK BETWEEN :from AND :to", "ScanIndexForward": False, "Limit": 2}
+        values = {":pk": {"S": "P"}, ":from": {"S": "2024-01-02#"}, ":to": {"S": "2024-01-04#~"}}
+
+        first = await raw("query", ExpressionAttributeValues=values, **page_kwargs)
+        second = await raw("query", ExpressionAttributeValues=values, ExclusiveStartKey=first["LastEvaluatedKey"], **page_kwargs)
+
+        assert [item["SK"]["S"][:10] for item in first["Items"]] == ["2024-01-04", "2024-01-03"]
+        assert [item["SK"]["S"][:10] for item in second["Items"]] == ["2024-01-02"]
+        assert "LastEvaluatedKey" not in second
+
+    @pytest.mark.asyncio
+    async def test_begins_with_and_projection(self, raw):
+        await raw("transact_write_items", TransactItems=[
+            put("ORDER#o1", "DETAILS", order_status={"S": "FULFILLED"}),
+            put("ORDER#o1", "HIST#1", to_status={"S": "FULFILLED"}),
+            put("ORDER#o1", "HIST#2", to_status={"S": "FULFILLED"})
+        ])
+
+        response = await raw(
+            "query",
+            KeyConditionExpression="PK = :pk AND begins_with(SK, :sk)",
+            ExpressionAttributeValues={":pk": {"S": "ORDER#o1"}, ":sk": {"S": "HIST#"}},
+            ProjectionExpression="SK"
+        )
+
+        assert response["Items"] == [{"SK": {"S": "HIST#1"}}, {"SK": {"S": "HIST#2"}}]
+
+    @pytest.mark.asyncio
+    async def test_failed_condition_cancels_whole_transaction(self, raw):
+        await raw("transact_write_items", TransactItems=[put("A", "1", order_status={"S": "PAYMENT_PENDING"})])
+
+        with pytest.raises(ClientError) as exc_info:
+            await raw("transact_write_items", TransactItems=[
+                put("B", "1"),
+                {"Update": {
+                    "TableName": "test-table",
+                    "Key": {"PK": {"S": "A"}, "SK": {"S": "1"}},
+                    "UpdateExpression": "SET order_status = :new",
+                    "ConditionExpression": "order_status = :old",
+                    "ExpressionAttributeValues": {":new": {"S": "FULFILLED"}, ":old": {"S": "PAYMENT_CONFIRMED"}}
+                }}
+            ])
+
+        assert exc_info.value.response["Error"]["Code"] == "TransactionCanceledException"
+        assert [reason["Code"] for reason in exc_info.value.response["CancellationReasons"]] == ["None", "ConditionalCheckFailed"]
+        assert await raw("get_item", Key={"PK": {"S": "B"}, "SK": {"S": "1"}}) == {}
+
+    @pytest.mark.asyncio
+    async def test_rejects_two_actions_on_one_item(self, raw):
+        with pytest.raises(ClientError) as exc_info:
+            await raw("transact_write_items", TransactItems=[put("A", "1"), put("A", "1")])
+
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+
+    def test_sqlite_store_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "orders.db")
+        first = create_local_dynamodb_resource("sqlite", path)
+        first.raw_client.transact_write_items(TransactItems=[put("A", "1", n={"N": "3"})])
+        first.engine.close()
+
+        second = create_local_dynamodb_resource("sqlite", path)
+        item = second.raw_client.get_item(TableName="test-table", Key={"PK": {"S": "A"}, "SK": {"S": "1"}})["Item"]
+        second.engine.close()
+
+        assert item["n"] == {"N": "3"}
+
+
+class TestRepositoriesOverLocalStorage:
+    @pytest.mark.asyncio
+    async def test_order_lifecycle(self, resource):
+        repo = OrderRepository(resource, "test-table", status_shards=4)
+        order = make_order("order-1")
+        await repo.create(order)
+
+        paid = await repo.transition("order-1", [OrderStatus.PAYMENT_PENDING], OrderStatus.PAYMENT_CONFIRMED, "user", include_history=True)
+
+        assert await repo.get_by_order_id("order-1", include_history=True) == paid
+        assert (await repo.get_by_status(OrderStatus.PAYMENT_PENDING))[0] == []
+        assert [o.order_id for o in (await repo.get_by_status(OrderStatus.PAYMENT_CONFIRMED))[0]] == ["order-1"]
+        counts = await repo.get_status_counts()
+        assert counts[OrderStatus.PAYMENT_CONFIRMED] == 1
+        assert counts[OrderStatus.PAYMENT_PENDING] == 0
+
+        await repo.delete(order.user_id, "order-1", OrderStatus.PAYMENT_CONFIRMED)
+        assert await repo.get_by_order_id("order-1") is None
+        assert (await repo.get_status_counts())[OrderStatus.PAYMENT_CONFIRMED] == 0
+
+    @pytest.mark.asyncio
+    async def test_repeated_failed_payment_keeps_one_copy_and_count(self, resource):
+        repo = OrderRepository(resource, "test-table", status_shards=4)
+        await repo.create(make_order("order-1"))
+        failed_from = [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED]
+
+        await repo.transition("order-1", failed_from, OrderStatus.PAYMENT_FAILED, "user")
+        again = await repo.transition("order-1", failed_from, OrderStatus.PAYMENT_FAILED, "user", include_history=True)
+
+        assert [change.to_status for change in again.status_history] == [OrderStatus.PAYMENT_FAILED] * 2
+        assert [o.order_id for o in (await repo.get_by_status(OrderStatus.PAYMENT_FAILED))[0]] == ["order-1"]
+        for counts in [await repo.get_status_counts(), await repo.get_status_counts(date(2009, 2, 13))]:
+            assert counts[OrderStatus.PAYMENT_FAILED] == 1
+            assert counts[OrderStatus.PAYMENT_PENDING] == 0
+
+    @pytest.mark.asyncio
+    async def test_stale_transition_is_rejected(self, resource):
+        repo = OrderRepository(resource, "test-table")
+        order = make_order("order-1")
+        await repo.create(order)
+        await repo.transition("order-1", [OrderStatus.PAYMENT_PENDING], OrderStatus.PAYMENT_CONFIRMED, "user")
+
+        with pytest.raises(ClientError):
+            await repo.update_status(order.model_copy(update={"status": OrderStatus.PAYMENT_FAILED}), OrderStatus.PAYMENT_PENDING)
+
+    @pytest.mark.asyncio
+    async def test_status_pages_merge_shards_newest_first(self, resource):
+        repo = OrderRepository(resource, "test-table", status_shards=3)
+        orders = [make_order(f"order-{n}", created_at=1704067200 + n * 86400) for n in range(10)]
+        assert await repo.create_many(orders) == [None] * 10
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await repo.get_by_status(OrderStatus.PAYMENT_PENDING, 3, cursor, summary=True)
+            seen.extend(order.order_id for order in page)
+            if cursor is None:
+                break
+        in_range, _ = await repo.get_by_status(OrderStatus.PAYMENT_PENDING, date_from=date(2024, 1, 3), date_to=date(2024, 1, 4))
+
+        assert seen == [f"order-{n}" for n in reversed(range(10))]
+        assert [order.order_id for order in in_range] == ["order-3", "order-2"]
+        assert (await repo.get_status_counts(date(2024, 1, 3)))[OrderStatus.PAYMENT_PENDING] == 1
+
+    @pytest.mark.asyncio
+    async def test_outbox_events_commit_with_orders(self, resource):
+        repo = OrderRepository(resource, "test-table")
+        await repo.create(make_order("order-1"), NotificationEventType.ORDER_CREATED)
+        await repo.transition("order-1", [OrderStatus.PAYMENT_PENDING], OrderStatus.PAYMENT_CONFIRMED, "user", event_type=NotificationEventType.PAYMENT_CONFIRMED)
+
+        partition_key = outbox_partition_key("order-1", repo.outbox_shards)
+        events = await repo.get_outbox_events(partition_key, 2 ** 31)
+        resumed = await repo.get_outbox_events(partition_key, 2 ** 31, start_after=events[0])
+        await repo.delete_outbox_events(events[:1])
+
+        assert [event.event_type for event in events] == [NotificationEventType.ORDER_CREATED, NotificationEventType.PAYMENT_CONFIRMED]
+        assert [event.event_id for event in resumed] == [events[1].event_id]
+        assert [event.event_id for event in await repo.get_outbox_events(partition_key, 2 ** 31)] == [events[1].event_id]
+
+    @pytest.mark.asyncio
+    async def test_outbox_events_keep_snapshots(self, resource):
+        repo = OrderRepository(resource, "test-table", event_snapshots=True)
+        recipient = EventRecipient(first_name="John", last_name="Doe", email="john@example.com")
+        await repo.create(make_order("order-1"), NotificationEventType.ORDER_CREATED, recipient)
+
+        event, = await repo.get_outbox_events(outbox_partition_key("order-1", repo.outbox_shards), 2 ** 31)
+
+        assert event.recipient == recipient
+        assert event.order.order_status == OrderStatus.PAYMENT_PENDING
+        assert event.order.items == make_order("order-1").items
+        assert event.order.total_amount == Decimal("20.00")
+
+    @pytest.mark.asyncio
+    async def test_user_round_trip_and_duplicate(self, resource):
+        repo = UserRepository(resource, "test-table")
+        user = User(
+            user_id="123e4567-e89b-12d3-a456-426614174000",
+            first_name="John",
+            last_name="Doe",
+            email="john@example.com",
+            password="$2b$12$hashedpassword",
+            created_at=1234567890,
+            updated_at=1234567890
+        )
+
+        await repo.create(user)
+        with pytest.raises(ClientError) as exc_info:
+            await repo.create(user)
+
+        assert await repo.get_by_id(user.user_id) == user
+        assert [u.email for u in await repo.get_all()] == [user.email]
+        assert exc_info.value.response["Error"]["Code"] == "TransactionCanceledException"
@@ -0,0 +1,30 @@
+import gzip
+from decimal import Decimal
+from app.serverful.models.models import Order, OrderItem, OrderStatus, StatusChange
+from app.serverful.repositories.order_archive import LocalOrderArchive
+
+
+def make_order():
+    return Order(
+        order_id="order-123", user_id="user-1", delivery_address="123 Main St", status=OrderStatus.FULFILLED,
+        items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=2, unit_price=Decimal("10.00"), subtotal=Decimal("20.00"))],
+        total_amount=Decimal("20.00"), created_at=1234567890, updated_at=1234567990,
+        status_history=[StatusChange(from_status=OrderStatus.FULFILLMENT_IN_PROGRESS, to_status=OrderStatus.FULFILLED, changed_at=1234567990, changed_by="system")]
+    )
+
+
+class TestLocalOrderArchive:
+    def test_round_trip_is_compressed(self, tmp_path):
+        archive = LocalOrderArchive(str(tmp_path))
+        archive.put(make_order())
+        
+        path = tmp_path / "orders" / "or" / "order-123.json.gz"
+        assert gzip.decompress(path.read_bytes()).startswith(b"{")
+        assert archive.get("order-123") == make_order()
+
+    def test_missing_and_unsafe_ids_return_none(self, tmp_path):
+        archive = LocalOrderArchive(str(tmp_path))
+        
+        assert archive.get("order-404") is None
+        assert archive.get("../order-123") is None
+        assert archive.get("..") is None
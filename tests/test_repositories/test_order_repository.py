@@ -1,9 +1,19 @@
+import asyncio
+import threading
+import time
 import pytest
-from unittest.mock import MagicMock
+from collections import Counter
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
 from decimal import Decimal
-from datetime import datetime, timezone
-from app.serverful.repositories.order_repository import OrderRepository
-from app.serverful.models.models import Order, OrderStatus, OrderItem, PaymentDetails, StatusChange
+from datetime import date, datetime, timezone
+from app.serverful.repositories.order_repository import OrderRepository, outbox_partition_key, status_partition_key, status_partition_keys
+from app.serverful.repositories.attribute_codec import decode_key, decode_order, encode_map
+from app.serverful.repositories.order_archive import LocalOrderArchive
+from tests.test_repositories.table_backed_client import TableBackedClient, serialize
+from app.serverful.models.models import NotificationEvent, NotificationEventType, Order, OrderStatus, OrderItem, OrderSummary, PaymentDetails, StatusChange
+from app.serverful.utils.cache import TTLCache
+from app.serverful.utils.errors import ApplicationError, ErrorCode
 
 
 @pytest.fixture
@@ -20,7 +30,7 @@ def mock_dynamodb():
 @pytest.fixture
 def order_repo(mock_dynamodb):
     dynamodb, table, client = mock_dynamodb
-    return OrderRepository(dynamodb, "test-table"), table, client
+    return OrderRepository(dynamodb, "test-table", raw_client=TableBackedClient(dynamodb, table)), table, client
 
 
 @pytest.fixture
@@ -75,10 +85,17 @@ class TestCreateOrder:
         assert client.transact_write_items.call_count == 1
         call_args = client.transact_write_items.call_args[1]
         transact_items = call_args["TransactItems"]
-        assert len(transact_items) == 3
+        assert len(transact_items) == 5
         assert transact_items[0]["Put"]["Item"]["PK"].startswith("STATUS#PAYMENT_PENDING")
         assert transact_items[1]["Put"]["Item"]["PK"] == f"ORDERS#{sample_order.user_id}"
         assert transact_items[2]["Put"]["Item"]["PK"] == f"ORDER#{sample_order.order_id}"
+        stats_keys = [action["Update"]["Key"] for action in transact_items[3:]]
+        assert [key["SK"] for key in stats_keys] == ["TOTAL", "DAY#2009-02-13"]
+        assert stats_keys[0]["PK"] == stats_keys[1]["PK"]
+        assert stats_keys[0]["PK"].startswith("STATS#STATUS#")
+        assert transact_items[3]["Update"]["UpdateExpression"] == "ADD #s0 :d0"
+        assert transact_items[3]["Update"]["ExpressionAttributeNames"] == {"#s0": "PAYMENT_PENDING"}
+        assert transact_items[3]["Update"]["ExpressionAttributeValues"] == {":d0": 1}
 
     @pytest.mark.asyncio
     async def test_create_order_with_payment_details(self, order_repo, sample_order):
@@ -98,6 +115,51 @@ class TestCreateOrder:
         assert "payment_details" in transact_items[0]["Put"]["Item"]
 
 
+class TestCreateMany:
+    @pytest.mark.asyncio
+    async def test_create_many_packs_orders_into_full_transactions(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        client.transact_write_items.return_value = {}
+        orders = [sample_order.model_copy(update={"order_id": f"order-{n}"}) for n in range(70)]
+        
+        errors = await repo.create_many(orders)
+        
+        assert errors == [None] * 70
+        sizes = sorted(len(call[1]["TransactItems"]) for call in client.transact_write_items.call_args_list)
+        assert sizes == [20, 98, 98]
+        counter = client.transact_write_items.call_args_list[0][1]["TransactItems"][-2]["Update"]
+        assert counter["ExpressionAttributeValues"] == {":d0": 32}
+
+    @pytest.mark.asyncio
+    async def test_create_many_closes_chunks_early_for_many_creation_days(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        client.transact_write_items.return_value = {}
+        orders = [sample_order.model_copy(update={"order_id": f"order-{n}", "created_at": 1234567890 + n * 86400}) for n in range(40)]
+        
+        await repo.create_many(orders)
+        
+        sizes = [len(call[1]["TransactItems"]) for call in client.transact_write_items.call_args_list]
+        assert max(sizes) <= 100
+        assert sum(size for size in sizes) == 40 * 3 + len(sizes) + 40
+
+    @pytest.mark.asyncio
+    async def test_create_many_isolates_failing_order(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        orders = [sample_order.model_copy(update={"order_id": f"order-{n}"}) for n in range(3)]
+        cancelled = ClientError({"Error": {"Code": "TransactionCanceledException", "Message": "cancelled"}}, "TransactWriteItems")
+        
+        def transact_write_items(TransactItems):
+            if any(action.get("Put", {}).get("Item", {}).get("order_id") == "order-1" for action in TransactItems):
+                raise cancelled
+            return {}
+        client.transact_write_items.side_effect = transact_write_items
+        
+        errors = await repo.create_many(orders)
+        
+        assert errors[0] is None and errors[2] is None
+        assert errors[1] is cancelled
+
+
 class TestGetOrder:
     @pytest.mark.asyncio
     async def test_get_by_user_and_order_success(self, order_repo, sample_order_dict):
@@ -130,6 +192,33 @@ class TestGetOrder:
         assert result.order_id == "order-123"
         table.query.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_by_order_id_with_history_reads_one_partition(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [
+            {**sample_order_dict, "SK": "DETAILS", "order_status": "PAYMENT_CONFIRMED"},
+            {"PK": "ORDER#order-123", "SK": "HIST#1234567891#1", "from_status": "PAYMENT_PENDING", "to_status": "PAYMENT_CONFIRMED",
+             "changed_at": 1234567891, "changed_by": "user"}
+        ]}
+        
+        result = await repo.get_by_order_id("order-123", include_history=True)
+        
+        assert [change.to_status for change in result.status_history] == [OrderStatus.PAYMENT_CONFIRMED]
+        table.query.assert_called_once()
+        assert table.query.call_args[1]["KeyConditionExpression"] == "PK = :pk"
+
+    @pytest.mark.asyncio
+    async def test_get_by_user_and_order_with_history(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        history = {"PK": "ORDER#order-123", "SK": "HIST#1234567891#1", "from_status": "PAYMENT_PENDING", "to_status": "PAYMENT_FAILED",
+                   "changed_at": 1234567891, "changed_by": "user"}
+        table.query.side_effect = lambda **kwargs: {"Items": [history] if "begins_with" in kwargs["KeyConditionExpression"] else [sample_order_dict]}
+        
+        result = await repo.get_by_user_and_order("123e4567-e89b-12d3-a456-426614174000", "order-123", include_history=True)
+        
+        assert [change.to_status for change in result.status_history] == [OrderStatus.PAYMENT_FAILED]
+        assert table.query.call_count == 2
+
     @pytest.mark.asyncio
     async def test_get_by_order_id_not_found(self, order_repo):
         repo, table, client = order_repo
@@ -144,23 +233,257 @@ class TestGetOrder:
         repo, table, client = order_repo
         table.query.return_value = {"Items": [sample_order_dict]}
         
-        result = await repo.get_by_user("123e4567-e89b-12d3-a456-426614174000")
+        result, last_key = await repo.get_by_user("123e4567-e89b-12d3-a456-426614174000")
         
         assert len(result) == 1
         assert result[0].order_id == "order-123"
+        assert last_key is None
         table.query.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_by_user_paginated(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        start_key = {"PK": "ORDERS#123e4567-e89b-12d3-a456-426614174000", "SK": "ORDER#order-100"}
+        next_key = {"PK": "ORDERS#123e4567-e89b-12d3-a456-426614174000", "SK": "ORDER#order-123"}
+        table.query.return_value = {"Items": [sample_order_dict], "LastEvaluatedKey": next_key}
+        
+        result, last_key = await repo.get_by_user("123e4567-e89b-12d3-a456-426614174000", 1, start_key)
+        
+        assert len(result) == 1
+        assert last_key == next_key
+        query_kwargs = table.query.call_args[1]
+        assert query_kwargs["Limit"] == 1
+        assert query_kwargs["ExclusiveStartKey"] == start_key
+
+    @pytest.mark.asyncio
+    async def test_get_by_user_summary_uses_projection(self, order_repo):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [{
+            "PK": "ORDERS#123e4567-e89b-12d3-a456-426614174000",
+            "SK": "ORDER#order-123",
+            "order_id": "order-123",
+            "user_id": "123e4567-e89b-12d3-a456-426614174000",
+            "order_status": "PAYMENT_PENDING",
+            "total_amount": "20.00",
+            "created_at": 1234567890,
+            "updated_at": 1234567890
+        }]}
+        
+        result, _ = await repo.get_by_user("123e4567-e89b-12d3-a456-426614174000", 10, summary=True)
+        
+        assert isinstance(result[0], OrderSummary)
+        assert result[0].total_amount == Decimal("20.00")
+        projection = table.query.call_args[1]["ProjectionExpression"]
+        assert "items" not in projection and "status_history" not in projection
+
     @pytest.mark.asyncio
     async def test_get_by_status(self, order_repo, sample_order_dict):
         repo, table, client = order_repo
-        table.query.return_value = {"Items": [sample_order_dict]}
+        table.query.return_value = {"Items": [{**sample_order_dict, "PK": "STATUS#PAYMENT_PENDING", "SK": "2009-02-13#ORDER#order-123"}]}
         
-        result = await repo.get_by_status(OrderStatus.PAYMENT_PENDING)
+        result, last_key = await repo.get_by_status(OrderStatus.PAYMENT_PENDING)
         
         assert len(result) == 1
         assert result[0].status == OrderStatus.PAYMENT_PENDING
+        assert "Limit" not in table.query.call_args[1]
         table.query.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_by_status_date_range_uses_sort_key_condition(self, order_repo):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": []}
+        
+        await repo.get_by_status(OrderStatus.PAYMENT_FAILED, date_from=date(2024, 3, 1), date_to=date(2024, 3, 1))
+        kwargs = table.query.call_args[1]
+        
+        assert kwargs["KeyConditionExpression"] == "PK = :pk AND SK BETWEEN :sk_from AND :sk_to"
+        assert kwargs["ExpressionAttributeValues"] == {":pk": "STATUS#PAYMENT_FAILED", ":sk_from": "2024-03-01#", ":sk_to": "2024-03-01#~"}
+
+    @pytest.mark.asyncio
+    async def test_get_by_status_open_ended_date_range(self, order_repo):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": []}
+        
+        await repo.get_by_status(OrderStatus.PAYMENT_FAILED, date_from=date(2024, 3, 1))
+        assert table.query.call_args[1]["KeyConditionExpression"] == "PK = :pk AND SK >= :sk_from"
+        
+        await repo.get_by_status(OrderStatus.PAYMENT_FAILED, date_to=date(2024, 3, 1))
+        assert table.query.call_args[1]["KeyConditionExpression"] == "PK = :pk AND SK <= :sk_to"
+
+
+
+def make_partition_query(partitions):
+    def query(**kwargs):
+        pk = kwargs["ExpressionAttributeValues"][":pk"]
+        items = sorted(partitions.get(pk, []), key=lambda item: item["SK"], reverse=True)
+        start_key = kwargs.get("ExclusiveStartKey")
+        if start_key:
+            items = [item for item in items if item["SK"] < start_key["SK"]]
+        limit = kwargs.get("Limit", len(items))
+        response = {"Items": items[:limit]}
+        if len(items) > limit:
+            response["LastEvaluatedKey"] = {"PK": pk, "SK": items[limit - 1]["SK"]}
+        return response
+    return query
+
+
+class TestGetAllOrders:
+    @pytest.fixture
+    def partitions(self, sample_order_dict):
+        def item(status, day, order_id):
+            return {**sample_order_dict, "PK": f"STATUS#{status}", "SK": f"2024-01-{day}#ORDER#{order_id}", "order_id": order_id, "order_status": status}
+        return {
+            "STATUS#PAYMENT_PENDING": [item("PAYMENT_PENDING", "05", "o5"), item("PAYMENT_PENDING", "02", "o2")],
+            "STATUS#FULFILLED": [item("FULFILLED", "04", "o4"), item("FULFILLED", "01", "o1")],
+            "STATUS#PAYMENT_FAILED": [item("PAYMENT_FAILED", "03", "o3")],
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_all_queries_every_status_partition(self, order_repo, partitions):
+        repo, table, client = order_repo
+        table.query.side_effect = make_partition_query(partitions)
+        
+        orders, next_state = await repo.get_all(10)
+        
+        queried = {call[1]["ExpressionAttributeValues"][":pk"] for call in table.query.call_args_list}
+        assert queried == {f"STATUS#{status.value}" for status in OrderStatus}
+        assert [order.order_id for order in orders] == ["o5", "o4", "o3", "o2", "o1"]
+        assert next_state is None
+
+    @pytest.mark.asyncio
+    async def test_get_all_pages_in_global_order(self, order_repo, partitions):
+        repo, table, client = order_repo
+        table.query.side_effect = make_partition_query(partitions)
+        
+        seen, cursor_state = [], None
+        while True:
+            orders, cursor_state = await repo.get_all(2, cursor_state)
+            seen.extend(order.order_id for order in orders)
+            if cursor_state is None:
+                break
+        
+        assert seen == ["o5", "o4", "o3", "o2", "o1"]
+
+    @pytest.mark.asyncio
+    async def test_get_all_reads_on_into_truncated_partition_before_emitting_older_items(self, order_repo, partitions):
+        repo, table, client = order_repo
+        query = make_partition_query(partitions)
+        
+        def truncated_query(**kwargs):
+            response = query(**kwargs)
+            if kwargs["ExpressionAttributeValues"][":pk"] == "STATUS#PAYMENT_PENDING" and "ExclusiveStartKey" not in kwargs:
+                return {"Items": response["Items"][:1], "LastEvaluatedKey": {"PK": "STATUS#PAYMENT_PENDING", "SK": response["Items"][0]["SK"]}}
+            return response
+        table.query.side_effect = truncated_query
+        
+        orders, cursor_state = await repo.get_all(10)
+        
+        assert [order.order_id for order in orders] == ["o5", "o4", "o3", "o2", "o1"]
+        assert cursor_state is None
+        pending_queries = [call[1] for call in table.query.call_args_list if call[1]["ExpressionAttributeValues"][":pk"] == "STATUS#PAYMENT_PENDING"]
+        assert [query.get("ExclusiveStartKey", {}).get("SK") for query in pending_queries] == [None, "2024-01-05#ORDER#o5"]
+
+    @pytest.mark.asyncio
+    async def test_iter_all_yields_each_page(self, order_repo, partitions):
+        repo, table, client = order_repo
+        table.query.side_effect = make_partition_query(partitions)
+        
+        pages = [[order.order_id for order in orders] async for orders in repo.iter_all(2)]
+        
+        assert pages == [["o5", "o4"], ["o3", "o2"], ["o1"]]
+
+
+class TestStatusSharding:
+    @pytest.fixture
+    def sharded_repo(self, mock_dynamodb):
+        dynamodb, table, client = mock_dynamodb
+        return OrderRepository(dynamodb, "test-table", status_shards=4, raw_client=TableBackedClient(dynamodb, table)), table, client
+
+    def test_single_shard_keeps_legacy_key(self):
+        assert status_partition_key(OrderStatus.PAYMENT_PENDING, "order-123", 1) == "STATUS#PAYMENT_PENDING"
+        assert status_partition_keys(OrderStatus.PAYMENT_PENDING, 1) == ["STATUS#PAYMENT_PENDING"]
+
+    def test_shard_selection_is_deterministic(self):
+        pk = status_partition_key(OrderStatus.PAYMENT_PENDING, "order-123", 4)
+        assert pk == status_partition_key(OrderStatus.PAYMENT_PENDING, "order-123", 4)
+        assert pk in status_partition_keys(OrderStatus.PAYMENT_PENDING, 4)
+        shards = {status_partition_key(OrderStatus.PAYMENT_PENDING, f"order-{n}", 4) for n in range(100)}
+        assert shards == set(status_partition_keys(OrderStatus.PAYMENT_PENDING, 4))
+
+    @pytest.mark.asyncio
+    async def test_create_writes_to_order_shard(self, sharded_repo, sample_order):
+        repo, table, client = sharded_repo
+        client.transact_write_items.return_value = {}
+        
+        await repo.create(sample_order)
+        
+        transact_items = client.transact_write_items.call_args[1]["TransactItems"]
+        assert transact_items[0]["Put"]["Item"]["PK"] == status_partition_key(OrderStatus.PAYMENT_PENDING, "order-123", 4)
+
+    @pytest.mark.asyncio
+    async def test_update_status_moves_between_shards_of_same_order(self, sharded_repo, sample_order):
+        repo, table, client = sharded_repo
+        client.transact_write_items.return_value = {}
+        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
+        
+        await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING)
+        
+        transact_items = client.transact_write_items.call_args[1]["TransactItems"]
+        assert transact_items[0]["Delete"]["Key"]["PK"] == status_partition_key(OrderStatus.PAYMENT_PENDING, "order-123", 4)
+        assert transact_items[1]["Put"]["Item"]["PK"] == status_partition_key(OrderStatus.PAYMENT_CONFIRMED, "order-123", 4)
+
+    @pytest.mark.asyncio
+    async def test_get_by_status_merges_shards_in_date_order(self, sharded_repo, sample_order_dict):
+        repo, table, client = sharded_repo
+        partitions = {}
+        for day in range(1, 9):
+            order_id = f"o{day}"
+            pk = status_partition_key(OrderStatus.PAYMENT_PENDING, order_id, 4)
+            partitions.setdefault(pk, []).append({**sample_order_dict, "PK": pk, "SK": f"2024-01-0{day}#ORDER#{order_id}", "order_id": order_id})
+        table.query.side_effect = make_partition_query(partitions)
+        
+        seen, cursor_state = [], None
+        while True:
+            orders, cursor_state = await repo.get_by_status(OrderStatus.PAYMENT_PENDING, 3, cursor_state)
+            seen.extend(order.order_id for order in orders)
+            if cursor_state is None:
+                break
+        
+        assert seen == [f"o{day}" for day in range(8, 0, -1)]
+        queried = {call[1]["ExpressionAttributeValues"][":pk"] for call in table.query.call_args_list}
+        assert queried == set(status_partition_keys(OrderStatus.PAYMENT_PENDING, 4))
+
+    @pytest.mark.asyncio
+    async def test_get_by_status_reads_about_one_page_per_page(self, mock_dynamodb, sample_order_dict):
+        dynamodb, table, client = mock_dynamodb
+        repo = OrderRepository(dynamodb, "test-table", status_shards=8, raw_client=TableBackedClient(dynamodb, table))
+        partition_keys = status_partition_keys(OrderStatus.PAYMENT_PENDING, 8)
+        partitions = {}
+        for n in range(160):
+            pk = partition_keys[n % 8]
+            partitions.setdefault(pk, []).append({**sample_order_dict, "PK": pk, "SK": f"2024-01-01#ORDER#o{n:03d}", "order_id": f"o{n:03d}"})
+        query = make_partition_query(partitions)
+        items_read = []
+        
+        def counting_query(**kwargs):
+            response = query(**kwargs)
+            items_read.append(len(response["Items"]))
+            return response
+        table.query.side_effect = counting_query
+        
+        seen, cursor_state, pages = [], None, 0
+        while True:
+            orders, cursor_state = await repo.get_by_status(OrderStatus.PAYMENT_PENDING, 20, cursor_state, summary=True)
+            seen.extend(order.order_id for order in orders)
+            pages += 1
+            if cursor_state is None:
+                break
+        
+        assert seen == [f"o{n:03d}" for n in reversed(range(160))]
+        # Asking every partition for the whole page read 8 x 20 items per page; shares keep it near one page
+        assert pages == 8
+        assert sum(items_read) < 2 * len(seen)
+
 
 class TestUpdateOrderStatus:
     @pytest.mark.asyncio
@@ -180,9 +503,21 @@ class TestUpdateOrderStatus:
         assert client.transact_write_items.call_count == 1
         call_args = client.transact_write_items.call_args[1]
         transact_items = call_args["TransactItems"]
-        assert len(transact_items) == 4
+        assert len(transact_items) == 7
         assert transact_items[0]["Delete"]["Key"]["PK"].startswith("STATUS#PAYMENT_PENDING")
         assert transact_items[1]["Put"]["Item"]["PK"].startswith("STATUS#PAYMENT_CONFIRMED")
+        assert "status_history" not in transact_items[1]["Put"]["Item"]
+        assert "status_history" not in transact_items[3]["Update"]["UpdateExpression"]
+        history_item = transact_items[4]["Put"]["Item"]
+        assert history_item["PK"] == f"ORDER#{sample_order.order_id}"
+        assert history_item["SK"].startswith("HIST#1234567890#")
+        assert history_item["to_status"] == "PAYMENT_CONFIRMED"
+        total = transact_items[5]["Update"]
+        assert total["Key"]["SK"] == "TOTAL"
+        assert total["UpdateExpression"] == "ADD #s0 :d0, #s1 :d1"
+        assert total["ExpressionAttributeNames"] == {"#s0": "PAYMENT_PENDING", "#s1": "PAYMENT_CONFIRMED"}
+        assert total["ExpressionAttributeValues"] == {":d0": -1, ":d1": 1}
+        assert transact_items[6]["Update"]["Key"]["SK"] == "DAY#2009-02-13"
 
     @pytest.mark.asyncio
     async def test_update_status_with_payment(self, order_repo, sample_order):
@@ -209,6 +544,442 @@ class TestUpdateOrderStatus:
         assert "payment_details" in transact_items[1]["Put"]["Item"]
 
 
+class TestSingleFlightReads:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_reads_share_one_query(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [sample_order_dict]}
+        
+        first, second = await asyncio.gather(repo.get_by_order_id("order-123"), repo.get_by_order_id("order-123"))
+        
+        table.query.assert_called_once()
+        assert first.order_id == second.order_id == "order-123"
+        assert first is not second
+
+    @pytest.mark.asyncio
+    async def test_invalidate_stops_joining_in_flight_read(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [sample_order_dict]}
+        
+        first = asyncio.ensure_future(repo.get_by_order_id("order-123"))
+        await asyncio.sleep(0)
+        repo.invalidate("order-123")
+        await asyncio.gather(first, repo.get_by_order_id("order-123"))
+        
+        assert table.query.call_count == 2
+
+
+class TestArchiveFallback:
+    @pytest.fixture
+    def archived_repo(self, mock_dynamodb, sample_order, tmp_path):
+        dynamodb, table, client = mock_dynamodb
+        archive = LocalOrderArchive(str(tmp_path))
+        sample_order.status_history = [StatusChange(from_status=OrderStatus.PAYMENT_PENDING, to_status=OrderStatus.ORDER_CANCELLED, changed_at=1234567891, changed_by="user")]
+        archive.put(sample_order)
+        table.query.return_value = {"Items": []}
+        return OrderRepository(dynamodb, "test-table", raw_client=TableBackedClient(dynamodb, table), archive=archive), table, client
+
+    @pytest.mark.asyncio
+    async def test_get_by_order_id_falls_back_to_archive(self, archived_repo, sample_order):
+        repo, table, client = archived_repo
+        
+        with_history = await repo.get_by_order_id(sample_order.order_id, include_history=True)
+        without_history = await repo.get_by_order_id(sample_order.order_id)
+        
+        assert with_history.order_id == sample_order.order_id
+        assert len(with_history.status_history) == 1
+        assert without_history.status_history == []
+
+    @pytest.mark.asyncio
+    async def test_user_lookup_falls_back_only_for_owner(self, archived_repo, sample_order):
+        repo, table, client = archived_repo
+        
+        assert (await repo.get_by_user_and_order(sample_order.user_id, sample_order.order_id)).order_id == sample_order.order_id
+        assert await repo.get_by_user_and_order("someone-else", sample_order.order_id) is None
+
+    @pytest.mark.asyncio
+    async def test_remove_archived_deletes_history_on_condition(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [
+            {"PK": "ORDER#order-123", "SK": "HIST#1234567891#0000000000000000001", "from_status": "PAYMENT_PENDING",
+             "to_status": "ORDER_CANCELLED", "changed_at": 1234567891, "changed_by": "user"}
+        ]}
+        sample_order.status = OrderStatus.ORDER_CANCELLED
+        
+        await repo.remove_archived(sample_order)
+        
+        actions = client.transact_write_items.call_args[1]["TransactItems"]
+        assert len(actions) == 6
+        assert actions[4]["Update"]["ExpressionAttributeValues"] == {":d0": -1}
+        assert actions[2]["Delete"]["ConditionExpression"] == "order_status = :status"
+        assert actions[2]["Delete"]["ExpressionAttributeValues"] == {":status": "ORDER_CANCELLED"}
+        assert actions[3]["Delete"]["Key"] == {"PK": "ORDER#order-123", "SK": "HIST#1234567891#0000000000000000001"}
+
+
+class TestOrderCache:
+    @pytest.fixture
+    def cached_repo(self, mock_dynamodb):
+        dynamodb, table, client = mock_dynamodb
+        return OrderRepository(dynamodb, "test-table", cache=TTLCache("test_order", 100, 60), raw_client=TableBackedClient(dynamodb, table)), table, client
+
+    @pytest.mark.asyncio
+    async def test_repeat_reads_are_served_from_cache(self, cached_repo, sample_order_dict):
+        repo, table, client = cached_repo
+        table.query.return_value = {"Items": [sample_order_dict]}
+        
+        first = await repo.get_by_order_id("order-123")
+        first.status = OrderStatus.FULFILLED
+        second = await repo.get_by_order_id("order-123")
+        
+        assert second.status == OrderStatus.PAYMENT_PENDING
+        table.query.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cached_order_only_returned_to_owner(self, cached_repo, sample_order_dict):
+        repo, table, client = cached_repo
+        table.query.return_value = {"Items": [sample_order_dict]}
+        await repo.get_by_order_id("order-123")
+        
+        assert await repo.get_by_user_and_order("someone-else", "order-123") is None
+        assert (await repo.get_by_user_and_order(sample_order_dict["user_id"], "order-123")).order_id == "order-123"
+        table.query.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_update_status_invalidates(self, cached_repo, sample_order, sample_order_dict):
+        repo, table, client = cached_repo
+        table.query.return_value = {"Items": [{**sample_order_dict, "SK": "DETAILS"}]}
+        client.transact_write_items.return_value = {}
+        await repo.get_by_order_id("order-123")
+        await repo.get_by_order_id("order-123", include_history=True)
+        
+        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
+        await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING)
+        await repo.get_by_order_id("order-123")
+        await repo.get_by_order_id("order-123", include_history=True)
+        
+        assert table.query.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_read_racing_a_write_does_not_cache_the_old_order(self, cached_repo, sample_order, sample_order_dict):
+        repo, table, client = cached_repo
+        table.query.return_value = {"Items": [{**sample_order_dict, "SK": "DETAILS"}]}
+        client.transact_write_items.return_value = {}
+        read_started = asyncio.Event()
+        release_read = asyncio.Event()
+        load_by_order_id = repo._load_by_order_id
+
+        async def slow_load(order_id, include_history):
+            order = await load_by_order_id(order_id, include_history)
+            read_started.set()
+            await release_read.wait()
+            return order
+        repo._load_by_order_id = slow_load
+
+        read = asyncio.create_task(repo.get_by_order_id("order-123"))
+        await read_started.wait()
+        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
+        await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING)
+        release_read.set()
+
+        assert (await read).status == OrderStatus.PAYMENT_PENDING
+        assert repo._get_cached("order-123", False) is None
+        assert repo._generations == {}
+        await repo.get_by_order_id("order-123")
+        assert table.query.call_count == 2
+
+
+class TestGetMany:
+    @pytest.mark.asyncio
+    async def test_get_many_chunks_keys_and_keeps_request_order(self, order_repo, mock_dynamodb, sample_order_dict):
+        repo, table, client = order_repo
+        dynamodb = mock_dynamodb[0]
+        order_ids = [f"o{n}" for n in range(250)]
+        
+        def batch_get_item(RequestItems):
+            keys = RequestItems["test-table"]["Keys"]
+            return {"Responses": {"test-table": [{**sample_order_dict, "order_id": key["PK"].split("#", 1)[1]} for key in reversed(keys) if key["PK"] != "ORDER#o7"]}}
+        dynamodb.batch_get_item.side_effect = batch_get_item
+        
+        orders = await repo.get_many(order_ids + ["o1"])
+        
+        assert dynamodb.batch_get_item.call_count == 3
+        assert max(len(call[1]["RequestItems"]["test-table"]["Keys"]) for call in dynamodb.batch_get_item.call_args_list) == 100
+        assert [order.order_id for order in orders] == [order_id for order_id in order_ids if order_id != "o7"]
+
+    @pytest.mark.asyncio
+    async def test_get_many_retries_unprocessed_keys(self, order_repo, mock_dynamodb, sample_order_dict):
+        repo, table, client = order_repo
+        dynamodb = mock_dynamodb[0]
+        unprocessed = {"test-table": {"Keys": [{"PK": "ORDER#o2", "SK": "DETAILS"}]}}
+        dynamodb.batch_get_item.side_effect = [
+            {"Responses": {"test-table": [{**sample_order_dict, "order_id": "o1"}]}, "UnprocessedKeys": unprocessed},
+            {"Responses": {"test-table": [{**sample_order_dict, "order_id": "o2"}]}, "UnprocessedKeys": {}}
+        ]
+        
+        orders = await repo.get_many(["o1", "o2"])
+        
+        assert [order.order_id for order in orders] == ["o1", "o2"]
+        assert dynamodb.batch_get_item.call_args_list[1][1]["RequestItems"] == unprocessed
+
+
+class TestTransition:
+    @pytest.mark.asyncio
+    async def test_transition_conditions_write_on_observed_status(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.get_item.return_value = {"Item": {**sample_order_dict, "order_status": "PAYMENT_CONFIRMED"}}
+        client.transact_write_items.return_value = {}
+        
+        order = await repo.transition("order-123", [OrderStatus.PAYMENT_CONFIRMED], OrderStatus.FULFILLMENT_IN_PROGRESS, "system")
+        
+        assert order.status == OrderStatus.FULFILLMENT_IN_PROGRESS
+        assert order.status_history[-1].from_status == OrderStatus.PAYMENT_CONFIRMED
+        assert table.get_item.call_args[1] == {"Key": {"PK": "ORDER#order-123", "SK": "DETAILS"}, "ConsistentRead": True}
+        details_update = client.transact_write_items.call_args[1]["TransactItems"][3]["Update"]
+        assert details_update["ConditionExpression"] == "order_status = :old_status"
+        assert details_update["ExpressionAttributeValues"][":old_status"] == "PAYMENT_CONFIRMED"
+
+    @pytest.mark.asyncio
+    async def test_transition_reads_customer_copy_when_user_given(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.get_item.return_value = {"Item": sample_order_dict}
+        client.transact_write_items.return_value = {}
+        payment = PaymentDetails(payment_method="card", transaction_id="txn-1", payment_status="success", processed_at=1234567890)
+        
+        order = await repo.transition("order-123", [OrderStatus.PAYMENT_PENDING], OrderStatus.PAYMENT_CONFIRMED, "user",
+                                      user_id="user-1", payment_details=payment)
+        
+        assert order.payment_details == payment
+        assert table.get_item.call_args[1]["Key"] == {"PK": "ORDERS#user-1", "SK": "ORDER#order-123"}
+
+    @pytest.mark.asyncio
+    async def test_transition_not_found(self, order_repo):
+        repo, table, client = order_repo
+        table.get_item.return_value = {}
+        
+        with pytest.raises(ApplicationError) as exc_info:
+            await repo.transition("order-123", [OrderStatus.PAYMENT_CONFIRMED], OrderStatus.FULFILLED, "system")
+        
+        assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
+        client.transact_write_items.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_transition_rejects_unexpected_status_without_writing(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.get_item.return_value = {"Item": sample_order_dict}
+        
+        with pytest.raises(ApplicationError) as exc_info:
+            await repo.transition("order-123", [OrderStatus.FULFILLMENT_IN_PROGRESS], OrderStatus.FULFILLED, "system")
+        
+        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
+        client.transact_write_items.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_transition_maps_cancelled_transaction(self, order_repo, sample_order_dict):
+        repo, table, client = order_repo
+        table.get_item.return_value = {"Item": sample_order_dict}
+        client.transact_write_items.side_effect = ClientError(
+            {"Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"}}, "TransactWriteItems"
+        )
+        
+        with pytest.raises(ApplicationError) as exc_info:
+            await repo.transition("order-123", [OrderStatus.PAYMENT_PENDING], OrderStatus.ORDER_CANCELLED, "user")
+        
+        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
+
+
+class TestStatusCounters:
+    @pytest.mark.asyncio
+    async def test_get_status_counts_reads_one_item(self, mock_dynamodb):
+        dynamodb, table, client = mock_dynamodb
+        repo = OrderRepository(dynamodb, "test-table", stats_shards=1, raw_client=TableBackedClient(dynamodb, table))
+        table.get_item.return_value = {"Item": {"PK": "STATS#STATUS", "SK": "DAY#2024-03-01", "PAYMENT_FAILED": 4, "FULFILLED": 2}}
+        
+        counts = await repo.get_status_counts(date(2024, 3, 1))
+        
+        table.get_item.assert_called_once_with(Key={"PK": "STATS#STATUS", "SK": "DAY#2024-03-01"})
+        assert counts[OrderStatus.PAYMENT_FAILED] == 4
+        assert counts[OrderStatus.FULFILLED] == 2
+        assert counts[OrderStatus.PAYMENT_PENDING] == 0
+
+    @pytest.mark.asyncio
+    async def test_get_status_counts_sums_shards(self, mock_dynamodb):
+        dynamodb, table, client = mock_dynamodb
+        repo = OrderRepository(dynamodb, "test-table", stats_shards=3, raw_client=TableBackedClient(dynamodb, table))
+        dynamodb.batch_get_item.return_value = {"Responses": {"test-table": [
+            {"PK": "STATS#STATUS#0", "SK": "TOTAL", "PAYMENT_PENDING": 2},
+            {"PK": "STATS#STATUS#2", "SK": "TOTAL", "PAYMENT_PENDING": 3}
+        ]}}
+        
+        counts = await repo.get_status_counts()
+        
+        keys = dynamodb.batch_get_item.call_args[1]["RequestItems"]["test-table"]["Keys"]
+        assert [(key["PK"], key["SK"]) for key in keys] == [("STATS#STATUS#0", "TOTAL"), ("STATS#STATUS#1", "TOTAL"), ("STATS#STATUS#2", "TOTAL")]
+        assert counts[OrderStatus.PAYMENT_PENDING] == 5
+
+    @pytest.mark.asyncio
+    async def test_transaction_conflict_is_retried(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        conflict = ClientError(
+            {"Error": {"Code": "TransactionCanceledException"}, "CancellationReasons": [{"Code": "None"}, {"Code": "TransactionConflict"}]},
+            "TransactWriteItems"
+        )
+        client.transact_write_items.side_effect = [conflict, {}]
+        
+        await repo.create(sample_order)
+        
+        assert client.transact_write_items.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_creates_on_one_counter_shard_retry_onto_other_shards(self, mock_dynamodb, sample_order):
+        dynamodb, table, client = mock_dynamodb
+        repo = OrderRepository(dynamodb, "test-table", stats_shards=4, raw_client=TableBackedClient(dynamodb, table))
+        first_attempts = threading.Barrier(4, timeout=5)
+        lock = threading.Lock()
+        held = set()
+        counters = Counter()
+        calls = []
+
+        def transact_write_items(TransactItems):
+            counter_pks = {action["Update"]["Key"]["PK"] for action in TransactItems if "Update" in action}
+            with lock:
+                calls.append(counter_pks)
+                first_attempt = len(calls) <= 4
+            if first_attempt:
+                first_attempts.wait()
+            with lock:
+                # Like DynamoDB, a transaction touching an item another transaction holds is cancelled
+                if counter_pks & held:
+                    raise ClientError(
+                        {"Error": {"Code": "TransactionCanceledException"}, "CancellationReasons": [{"Code": "TransactionConflict"}]},
+                        "TransactWriteItems"
+                    )
+                held.update(counter_pks)
+            time.sleep(0.05)
+            with lock:
+                held.difference_update(counter_pks)
+                counters.update(counter_pks)
+            return {}
+        client.transact_write_items.side_effect = transact_write_items
+        orders = [sample_order.model_copy(update={"order_id": f"order-{n}"}) for n in range(4)]
+
+        # Every first attempt lands on shard 0, so all but one conflict and must move to a fresh shard
+        with patch("app.serverful.repositories.order_repository.random.randrange", side_effect=[0, 0, 0, 0, 1, 2, 3]):
+            await asyncio.gather(*(repo.create(order) for order in orders))
+
+        assert len(calls) == 7
+        assert counters == {"STATS#STATUS#0": 1, "STATS#STATUS#1": 1, "STATS#STATUS#2": 1, "STATS#STATUS#3": 1}
+
+    @pytest.mark.asyncio
+    async def test_failed_condition_is_not_retried(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        cancelled = ClientError(
+            {"Error": {"Code": "TransactionCanceledException"}, "CancellationReasons": [{"Code": "ConditionalCheckFailed"}, {"Code": "TransactionConflict"}]},
+            "TransactWriteItems"
+        )
+        client.transact_write_items.side_effect = cancelled
+        
+        with pytest.raises(ClientError):
+            await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING)
+        
+        assert client.transact_write_items.call_count == 1
+
+
+class TestOutbox:
+    @pytest.mark.asyncio
+    async def test_create_writes_event_in_same_transaction(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        client.transact_write_items.return_value = {}
+        delivered = []
+        repo.outbox_listener = delivered.extend
+        
+        await repo.create(sample_order, NotificationEventType.ORDER_CREATED)
+        
+        transact_items = client.transact_write_items.call_args[1]["TransactItems"]
+        assert len(transact_items) == 6
+        outbox = transact_items[-1]["Put"]["Item"]
+        assert outbox["PK"] == outbox_partition_key(sample_order.order_id, repo.outbox_shards)
+        assert outbox["PK"].startswith("OUTBOX#")
+        assert outbox["SK"] == f"1234567890#{outbox['event_id']}"
+        assert outbox["event_type"] == "ORDER_CREATED"
+        assert [event.event_id for event in delivered] == [outbox["event_id"]]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_notify_listener(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        client.transact_write_items.side_effect = ClientError({"Error": {"Code": "TransactionCanceledException"}}, "TransactWriteItems")
+        delivered = []
+        repo.outbox_listener = delivered.extend
+        
+        with pytest.raises(ClientError):
+            await repo.update_status(sample_order, OrderStatus.PAYMENT_PENDING, NotificationEvent(
+                event_id="event-1", event_type=NotificationEventType.PAYMENT_CONFIRMED, order_id=sample_order.order_id,
+                user_id=sample_order.user_id, occurred_at=1234567890
+            ))
+        
+        assert delivered == []
+
+    @pytest.mark.asyncio
+    async def test_create_many_leaves_room_for_events(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        client.transact_write_items.return_value = {}
+        orders = [sample_order.model_copy(update={"order_id": f"order-{n}"}) for n in range(70)]
+        
+        await repo.create_many(orders, NotificationEventType.ORDER_CREATED)
+        
+        sizes = sorted(len(call[1]["TransactItems"]) for call in client.transact_write_items.call_args_list)
+        assert sizes == [90, 98, 98]
+
+    def test_outbox_shard_follows_order(self):
+        assert outbox_partition_key("order-1", 1) == "OUTBOX"
+        assert outbox_partition_key("order-1", 4) == outbox_partition_key("order-1", 4)
+        assert outbox_partition_key("order-1", 4).startswith("OUTBOX#")
+
+    @pytest.mark.asyncio
+    async def test_get_and_delete_outbox_events(self, order_repo):
+        repo, table, client = order_repo
+        table.query.return_value = {"Items": [{
+            "PK": "OUTBOX", "SK": "1234567890#event-1", "event_id": "event-1", "event_type": "FULFILLED",
+            "order_id": "order-123", "user_id": "user-1", "occurred_at": 1234567890
+        }]}
+        client.batch_write_item.return_value = {"UnprocessedItems": {}}
+        
+        events = await repo.get_outbox_events("OUTBOX", 1234567900, 10)
+        await repo.delete_outbox_events(events)
+        
+        query = table.query.call_args[1]
+        assert query["ExpressionAttributeValues"] == {":pk": "OUTBOX", ":sk": "1234567900#"}
+        assert query["Limit"] == 10
+        assert events[0].event_type == NotificationEventType.FULFILLED
+        assert client.batch_write_item.call_args[1]["RequestItems"] == {"test-table": [
+            {"DeleteRequest": {"Key": {"PK": outbox_partition_key("order-123", repo.outbox_shards), "SK": "1234567890#event-1"}}}
+        ]}
+        client.transact_write_items.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_delete_outbox_events_batches_and_retries_unprocessed(self, order_repo):
+        repo, table, client = order_repo
+        events = [
+            NotificationEvent(event_id=f"event-{n}", event_type=NotificationEventType.FULFILLED, order_id=f"order-{n}", user_id="user-1", occurred_at=1234567890)
+            for n in range(30)
+        ]
+        throttled = []
+        
+        def batch_write_item(RequestItems):
+            requests = RequestItems["test-table"]
+            if len(requests) == 25:
+                throttled.extend(requests[-2:])
+                return {"UnprocessedItems": {"test-table": requests[-2:]}}
+            return {"UnprocessedItems": {}}
+        client.batch_write_item.side_effect = batch_write_item
+        
+        await repo.delete_outbox_events(events)
+        
+        sizes = sorted(len(call[1]["RequestItems"]["test-table"]) for call in client.batch_write_item.call_args_list)
+        assert sizes == [2, 5, 25]
+        retried = [call[1]["RequestItems"]["test-table"] for call in client.batch_write_item.call_args_list if len(call[1]["RequestItems"]["test-table"]) == 2]
+        assert retried == [throttled]
+
+
 class TestDeleteOrder:
     @pytest.mark.asyncio
     async def test_delete_order_success(self, order_repo, sample_order, sample_order_dict):
@@ -221,10 +992,11 @@ class TestDeleteOrder:
         assert client.transact_write_items.call_count == 1
         call_args = client.transact_write_items.call_args[1]
         transact_items = call_args["TransactItems"]
-        assert len(transact_items) == 3
+        assert len(transact_items) == 5
         assert transact_items[0]["Delete"]["Key"]["PK"].startswith("STATUS#PAYMENT_PENDING")
         assert transact_items[1]["Delete"]["Key"]["PK"] == f"ORDERS#{sample_order.user_id}"
         assert transact_items[2]["Delete"]["Key"]["PK"] == f"ORDER#{sample_order.order_id}"
+        assert transact_items[3]["Update"]["ExpressionAttributeValues"] == {":d0": -1}
 
     @pytest.mark.asyncio
     async def test_delete_order_not_found(self, order_repo):
@@ -236,9 +1008,9 @@ class TestDeleteOrder:
         client.transact_write_items.assert_not_called()
 
 
-class TestUnmarshalOrder:
+class TestDecodeOrder:
     @pytest.mark.asyncio
-    async def test_unmarshal_order_with_payment_details(self, order_repo):
+    async def test_decode_order_with_payment_details(self, order_repo):
         repo, table, client = order_repo
         item_with_payment = {
             "order_id": "order-123",
@@ -264,14 +1036,40 @@ class TestUnmarshalOrder:
             }
         }
         
-        order = repo._unmarshal_order(item_with_payment)
+        order = decode_order(serialize(item_with_payment))
         
         assert order.payment_details is not None
         assert order.payment_details.payment_method == "credit_card"
         assert order.payment_details.transaction_id == "txn-123"
 
     @pytest.mark.asyncio
-    async def test_unmarshal_order_with_status_history(self, order_repo):
+    async def test_decode_order_matches_validated_model(self, order_repo, sample_order):
+        repo, table, client = order_repo
+        item = {
+            "order_id": sample_order.order_id,
+            "user_id": sample_order.user_id,
+            "delivery_address": sample_order.delivery_address,
+            "order_status": sample_order.status.value,
+            "items": [{
+                "product_id": i.product_id,
+                "product_name": i.product_name,
+                "quantity": Decimal(i.quantity),
+                "unit_price": str(i.unit_price),
+                "subtotal": str(i.subtotal)
+            } for i in sample_order.items],
+            "total_amount": str(sample_order.total_amount),
+            "created_at": Decimal(sample_order.created_at),
+            "updated_at": Decimal(sample_order.updated_at)
+        }
+        
+        order = decode_order(serialize(item))
+        
+        assert order == Order.model_validate(order.model_dump())
+        assert order.model_dump_json() == Order.model_validate(order.model_dump()).model_dump_json()
+        assert type(order.created_at) is int and type(order.items[0].quantity) is int
+
+    @pytest.mark.asyncio
+    async def test_decode_order_with_status_history(self, order_repo):
         repo, table, client = order_repo
         item_with_history = {
             "order_id": "order-123",
@@ -296,8 +1094,14 @@ class TestUnmarshalOrder:
             }]
         }
         
-        order = repo._unmarshal_order(item_with_history)
+        order = decode_order(serialize(item_with_history))
         
         assert len(order.status_history) == 1
         assert order.status_history[0].from_status == OrderStatus.PAYMENT_PENDING
         assert order.status_history[0].to_status == OrderStatus.PAYMENT_CONFIRMED
+
+    def test_keys_round_trip_through_attribute_values(self):
+        key = {"PK": "STATUS#PAYMENT_PENDING", "SK": "2009-02-13#ORDER#order-123"}
+        
+        assert encode_map(key) == {"PK": {"S": "STATUS#PAYMENT_PENDING"}, "SK": {"S": "2009-02-13#ORDER#order-123"}}
+        assert decode_key(encode_map(key)) == key
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, AsyncMock
 import asyncio
 from decimal import Decimal
 from app.serverful.repositories.user_repository import UserRepository
+from tests.test_repositories.table_backed_client import TableBackedClient
 from app.serverful.models.models import User
 
 
@@ -20,7 +21,7 @@ def mock_dynamodb():
 @pytest.fixture
 def user_repo(mock_dynamodb):
     dynamodb, table, client = mock_dynamodb
-    return UserRepository(dynamodb, "test-table"), table, client
+    return UserRepository(dynamodb, "test-table", raw_client=TableBackedClient(dynamodb, table)), table, client
 
 
 @pytest.fixture
@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from botocore.exceptions import ClientError
+from app.serverful.models.models import Order, OrderItem, OrderStatus, OrderSummary
+from app.serverful.repositories.order_archive import LocalOrderArchive
+from app.serverful.scripts.archive_orders import archive_orders
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+OLD = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+RECENT = int(datetime(2024, 5, 30, tzinfo=timezone.utc).timestamp())
+
+
+def make_order(order_id, status, updated_at):
+    return Order(
+        order_id=order_id, user_id="user-1", delivery_address="123 Main St", status=status,
+        items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=1, unit_price=Decimal("5.00"), subtotal=Decimal("5.00"))],
+        total_amount=Decimal("5.00"), created_at=OLD, updated_at=updated_at
+    )
+
+
+def summary_of(order):
+    return OrderSummary(order_id=order.order_id, user_id=order.user_id, status=order.status,
+                        total_amount=order.total_amount, created_at=order.created_at, updated_at=order.updated_at)
+
+
+@pytest.fixture
+def orders():
+    return {
+        "old-done": make_order("old-done", OrderStatus.FULFILLED, OLD),
+        "recent-done": make_order("recent-done", OrderStatus.FULFILLED, RECENT),
+        "old-cancelled": make_order("old-cancelled", OrderStatus.ORDER_CANCELLED, OLD)
+    }
+
+
+@pytest.fixture
+def order_repo(orders):
+    repo = AsyncMock()
+    
+    async def get_by_status(status, limit, cursor_state, summary=False, date_to=None):
+        return [summary_of(order) for order in orders.values() if order.status == status], None
+    
+    repo.get_by_status.side_effect = get_by_status
+    repo.get_by_order_id.side_effect = lambda order_id, include_history=False: orders[order_id]
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_archives_old_terminal_orders_then_removes_them(order_repo, tmp_path):
+    archive = LocalOrderArchive(str(tmp_path))
+    
+    stats = await archive_orders(order_repo, archive, older_than_days=90, now=NOW)
+    
+    assert stats == {"archived": 2, "recent": 1}
+    assert archive.get("old-done").status == OrderStatus.FULFILLED
+    assert archive.get("recent-done") is None
+    assert sorted(call[0][0].order_id for call in order_repo.remove_archived.call_args_list) == ["old-cancelled", "old-done"]
+    assert {call[1]["date_to"] for call in order_repo.get_by_status.call_args_list} == {datetime(2024, 3, 3).date()}
+
+
+@pytest.mark.asyncio
+async def test_dry_run_writes_nothing(order_repo, tmp_path):
+    archive = LocalOrderArchive(str(tmp_path))
+    
+    stats = await archive_orders(order_repo, archive, older_than_days=90, now=NOW, dry_run=True)
+    
+    assert stats["archived"] == 2
+    assert archive.get("old-done") is None
+    order_repo.remove_archived.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_order_changed_during_removal_is_reported(order_repo, tmp_path):
+    order_repo.remove_archived.side_effect = ClientError({"Error": {"Code": "TransactionCanceledException"}}, "TransactWriteItems")
+    
+    stats = await archive_orders(order_repo, LocalOrderArchive(str(tmp_path)), older_than_days=90, now=NOW)
+    
+    assert stats["failed"] == 2
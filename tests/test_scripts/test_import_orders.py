@@ -0,0 +1,31 @@
+import pytest
+from unittest.mock import AsyncMock
+from app.serverful.scripts.import_orders import import_orders, validate_rows
+
+
+def row(user_id="user-1", subtotal="20.00"):
+    return {
+        "user_id": user_id,
+        "delivery_address": "123 Main St",
+        "items": [{"product_id": "prod-1", "product_name": "Product 1", "quantity": 2, "unit_price": "10.00", "subtotal": subtotal}]
+    }
+
+
+def test_validate_rows_reports_invalid_rows_by_index():
+    valid, errors = validate_rows([row(), row(subtotal="1.00"), row(user_id="")])
+    
+    assert [index for index, _ in valid] == [0]
+    assert set(errors) == {1, 2}
+    assert "subtotal" in errors[1]
+
+
+@pytest.mark.asyncio
+async def test_import_orders_writes_valid_rows_in_batches():
+    order_repo = AsyncMock()
+    order_repo.create_many.side_effect = lambda orders: [None] * len(orders)
+    
+    results = await import_orders(order_repo, [row(), row(subtotal="1.00"), row(), row()], batch_size=2)
+    
+    assert [result["status"] for result in results] == ["created", "invalid", "created", "created"]
+    assert [len(call[0][0]) for call in order_repo.create_many.call_args_list] == [2, 1]
+    assert order_repo.create_many.call_args_list[0][0][0][0].user_id == "user-1"
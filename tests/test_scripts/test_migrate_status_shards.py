@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import MagicMock
+from app.serverful.models.models import OrderStatus
+from app.serverful.repositories.order_repository import status_partition_key
+from app.serverful.scripts.migrate_status_shards import migrate_status_shards
+
+
+@pytest.fixture
+def dynamodb():
+    dynamodb = MagicMock()
+    table = MagicMock()
+    dynamodb.Table.return_value = table
+    return dynamodb, table, table.batch_writer.return_value.__enter__.return_value
+
+
+def legacy_item(order_id, status="PAYMENT_PENDING"):
+    return {"PK": f"STATUS#{status}", "SK": f"2024-01-01#ORDER#{order_id}", "order_id": order_id, "order_status": status}
+
+
+def test_moves_legacy_items_into_shards(dynamodb):
+    resource, table, batch = dynamodb
+    items = [legacy_item("o1"), legacy_item("o2")]
+    table.query.side_effect = lambda **kwargs: {"Items": items if kwargs["ExpressionAttributeValues"][":pk"] == "STATUS#PAYMENT_PENDING" else []}
+    resource.batch_get_item.return_value = {"Responses": {"test-table": [
+        {"order_id": "o1", "order_status": "PAYMENT_PENDING"},
+        {"order_id": "o2", "order_status": "PAYMENT_PENDING"}
+    ]}}
+    
+    stats = migrate_status_shards(resource, "test-table", 1, 4)
+    
+    assert stats["moved"] == 2
+    put_pks = {call[1]["Item"]["PK"] for call in batch.put_item.call_args_list}
+    assert put_pks == {status_partition_key(OrderStatus.PAYMENT_PENDING, order_id, 4) for order_id in ("o1", "o2")}
+    assert batch.delete_item.call_count == 2
+
+
+def test_drops_stale_copies_and_honours_dry_run(dynamodb):
+    resource, table, batch = dynamodb
+    table.query.side_effect = lambda **kwargs: {"Items": [legacy_item("o1")] if kwargs["ExpressionAttributeValues"][":pk"] == "STATUS#PAYMENT_PENDING" else []}
+    resource.batch_get_item.return_value = {"Responses": {"test-table": [{"order_id": "o1", "order_status": "PAYMENT_CONFIRMED"}]}}
+    
+    stats = migrate_status_shards(resource, "test-table", 1, 4, dry_run=True)
+    
+    assert stats == {"dropped": 1}
+    batch.put_item.assert_not_called()
+    batch.delete_item.assert_not_called()
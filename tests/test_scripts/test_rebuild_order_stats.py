@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import MagicMock
+from app.serverful.scripts.rebuild_order_stats import rebuild_order_stats
+
+
+@pytest.fixture
+def dynamodb():
+    dynamodb = MagicMock()
+    table = MagicMock()
+    dynamodb.Table.return_value = table
+    return dynamodb, table, table.batch_writer.return_value.__enter__.return_value
+
+
+def partitions(items_by_pk):
+    return lambda **kwargs: {"Items": [{"SK": sk} for sk in items_by_pk.get(kwargs["ExpressionAttributeValues"][":pk"], [])]}
+
+
+def test_counts_orders_per_status_and_day(dynamodb):
+    resource, table, batch = dynamodb
+    table.query.side_effect = partitions({
+        "STATUS#PAYMENT_PENDING": ["2024-01-01#ORDER#o1", "2024-01-02#ORDER#o2"],
+        "STATUS#FULFILLED": ["2024-01-01#ORDER#o3"]
+    })
+
+    counts = rebuild_order_stats(resource, "test-table", status_shards=1, stats_shards=1)
+
+    assert counts["TOTAL"] == {"PAYMENT_PENDING": 2, "FULFILLED": 1}
+    assert counts["2024-01-01"] == {"PAYMENT_PENDING": 1, "FULFILLED": 1}
+    items = {call[1]["Item"]["SK"]: call[1]["Item"] for call in batch.put_item.call_args_list}
+    assert set(items) == {"TOTAL", "DAY#2024-01-01", "DAY#2024-01-02"}
+    assert items["TOTAL"]["PAYMENT_PENDING"] == 2
+    assert items["DAY#2024-01-02"]["FULFILLED"] == 0
+    batch.delete_item.assert_not_called()
+
+
+def test_collapses_shards_and_honours_dry_run(dynamodb):
+    resource, table, batch = dynamodb
+    table.query.side_effect = partitions({"STATUS#FULFILLED": ["2024-01-01#ORDER#o3"]})
+
+    rebuild_order_stats(resource, "test-table", status_shards=1, stats_shards=2, previous_stats_shards=3, dry_run=True)
+    batch.put_item.assert_not_called()
+
+    rebuild_order_stats(resource, "test-table", status_shards=1, stats_shards=2, previous_stats_shards=3)
+
+    assert {(call[1]["Item"]["PK"], call[1]["Item"]["SK"]) for call in batch.put_item.call_args_list} == {
+        ("STATS#STATUS#0", "TOTAL"), ("STATS#STATUS#0", "DAY#2024-01-01")
+    }
+    deleted = {(call[1]["Key"]["PK"], call[1]["Key"]["SK"]) for call in batch.delete_item.call_args_list}
+    assert deleted == {
+        ("STATS#STATUS#1", "TOTAL"), ("STATS#STATUS#2", "TOTAL"), ("STATS#STATUS#1", "DAY#2024-01-01"), ("STATS#STATUS#2", "DAY#2024-01-01")
+    }
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from botocore.exceptions import ClientError
+from app.serverful.services.event_spool import EventSpool
+from app.serverful.services.sns_service import SnsService
+from app.serverful.models.models import NotificationEvent, NotificationEventType
+
+
+def make_event(n):
+    return NotificationEvent(
+        event_id=f"event{n}",
+        event_type=NotificationEventType.ORDER_CREATED,
+        order_id=f"order{n}",
+        user_id="user123",
+        occurred_at=1737806400
+    )
+
+
+def throttled():
+    return ClientError({"Error": {"Code": "Throttled", "Message": "Rate exceeded"}}, "Publish")
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return str(tmp_path / "sns-spool.jsonl")
+
+
+class TestEventSpool:
+    @pytest.mark.asyncio
+    async def test_replay_publishes_in_order_and_empties_spool(self, spool_path):
+        spool = EventSpool(spool_path)
+        for n in range(3):
+            await spool.append(make_event(n))
+        publish = AsyncMock()
+
+        assert await spool.replay_once(publish) is True
+
+        assert [call[0][0].event_id for call in publish.call_args_list] == ["event0", "event1", "event2"]
+        assert spool.depth == 0
+        assert await spool.replay_once(publish) is True
+        assert publish.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_events_survive_restart(self, spool_path):
+        spool = EventSpool(spool_path)
+        for n in range(3):
+            await spool.append(make_event(n))
+        publish = AsyncMock(side_effect=lambda event: _fail_for(event, "event1"))
+
+        assert await spool.replay_once(publish) is False
+        await spool.append(make_event(3))
+
+        reopened = EventSpool(spool_path)
+        delivered = AsyncMock()
+        await reopened.start(delivered)
+        await asyncio.sleep(0.05)
+        await reopened.stop()
+
+        assert [call[0][0].event_id for call in delivered.call_args_list] == ["event1", "event3"]
+        assert reopened.depth == 0
+
+    @pytest.mark.asyncio
+    async def test_unreadable_lines_are_dropped(self, spool_path):
+        spool = EventSpool(spool_path)
+        await spool.append(make_event(0))
+        with open(spool_path, "a") as spool_file:
+            spool_file.write('{"event_id": "torn\n')
+        publish = AsyncMock()
+
+        assert await spool.replay_once(publish) is True
+        assert publish.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_workers_sharing_a_spool_replay_each_event_once(self, spool_path):
+        first, second = EventSpool(spool_path), EventSpool(spool_path)
+        await first.append(make_event(0))
+        await second.append(make_event(1))
+        release = asyncio.Event()
+
+        async def slow_publish(event):
+            await release.wait()
+
+        first_publish, second_publish = AsyncMock(side_effect=slow_publish), AsyncMock()
+        replaying = asyncio.create_task(first.replay_once(first_publish))
+        await asyncio.sleep(0.05)
+        await second.append(make_event(2))
+
+        assert await second.replay_once(second_publish) is False
+        second_publish.assert_not_called()
+        release.set()
+        assert await replaying is True
+        assert await second.replay_once(second_publish) is True
+
+        assert [call[0][0].event_id for call in first_publish.call_args_list] == ["event0", "event1"]
+        assert [call[0][0].event_id for call in second_publish.call_args_list] == ["event2"]
+        assert second.depth == 0
+
+    @pytest.mark.asyncio
+    async def test_replayer_backs_off_until_sns_recovers(self, spool_path):
+        spool = EventSpool(spool_path, min_backoff_seconds=0.01, max_backoff_seconds=0.02)
+        publish = AsyncMock(side_effect=[throttled(), throttled(), None])
+        await spool.start(publish)
+
+        await spool.append(make_event(0))
+        await asyncio.sleep(0.2)
+        await spool.stop()
+
+        assert publish.call_count == 3
+        assert spool.depth == 0
+
+
+class TestSpooledPublishing:
+    @pytest.mark.asyncio
+    async def test_publish_failure_is_spooled_instead_of_raised(self, spool_path):
+        client = Mock()
+        client.publish.side_effect = throttled()
+        service = SnsService(sns_client=client, spool=EventSpool(spool_path))
+
+        await service.publish_event(make_event(0))
+
+        assert service.spool.depth == 1
+        client.publish.side_effect = None
+        client.publish.return_value = {"MessageId": "msg123"}
+        assert await service.spool.replay_once(service._publish) is True
+        assert client.publish.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batched_unexpected_error_is_spooled(self, spool_path):
+        client = Mock()
+        client.publish_batch.side_effect = TimeoutError("read timed out")
+        service = SnsService(sns_client=client, linger_seconds=0.01, spool=EventSpool(spool_path))
+        await service.start()
+
+        await asyncio.gather(*(service.publish_event(make_event(n)) for n in range(3)))
+
+        assert service.spool.depth == 3
+        await service.stop()
+
+
+def _fail_for(event, event_id):
+    if event.event_id == event_id:
+        raise throttled()
@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import json
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from app.serverful.models.models import NotificationEvent, NotificationEventType, Order, OrderItem, OrderStatus
+from app.serverful.repositories.order_repository import OrderRepository
+from app.serverful.services.invalidation_service import LocalInvalidationBus, SnsInvalidationBus
+from app.serverful.services.sns_service import encode_binary_event
+from app.serverful.utils.cache import TTLCache
+
+
+class TestLocalInvalidationBus:
+    @pytest.mark.asyncio
+    async def test_publish_evicts_order_from_every_subscribed_cache(self):
+        bus = LocalInvalidationBus()
+        repos = []
+        for _ in range(2):
+            dynamodb = MagicMock()
+            repo = OrderRepository(dynamodb, "test-table", cache=TTLCache("test_bus", 10, 3600), raw_client=MagicMock())
+            repo.cache.set(("order-123", False), "cached")
+            bus.subscribe(lambda order_id, user_id, repo=repo: repo.invalidate(order_id))
+            repos.append(repo)
+        
+        await bus.publish("order-123", "user-1")
+        
+        assert all(len(repo.cache) == 0 for repo in repos)
+
+
+class TestSnsInvalidationBus:
+    @pytest.fixture
+    def clients(self):
+        sns_client = MagicMock()
+        sqs_client = MagicMock()
+        sqs_client.create_queue.return_value = {"QueueUrl": "https://sqs/queue"}
+        sqs_client.get_queue_attributes.return_value = {"Attributes": {"QueueArn": "arn:aws:sqs:queue"}}
+        sns_client.subscribe.return_value = {"SubscriptionArn": "arn:aws:sns:topic:sub"}
+        return sns_client, sqs_client
+
+    @pytest.mark.asyncio
+    async def test_start_subscribes_private_queue_and_stop_removes_it(self, clients):
+        sns_client, sqs_client = clients
+        sqs_client.receive_message.return_value = {}
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic", wait_seconds=0)
+        
+        await bus.start()
+        await bus.stop()
+        
+        subscribe_kwargs = sns_client.subscribe.call_args[1]
+        assert subscribe_kwargs["Endpoint"] == "arn:aws:sqs:queue"
+        assert subscribe_kwargs["Attributes"] == {"RawMessageDelivery": "true"}
+        sns_client.unsubscribe.assert_called_once_with(SubscriptionArn="arn:aws:sns:topic:sub")
+        sqs_client.delete_queue.assert_called_once_with(QueueUrl="https://sqs/queue")
+
+    @pytest.mark.asyncio
+    async def test_poll_dispatches_raw_and_enveloped_events(self, clients):
+        sns_client, sqs_client = clients
+        event = {"event_type": "FULFILLED", "order_id": "order-1", "user_id": "user-1"}
+        sqs_client.receive_message.return_value = {"Messages": [
+            {"Body": json.dumps(event), "ReceiptHandle": "r1"},
+            {"Body": json.dumps({"Type": "Notification", "Message": json.dumps({**event, "order_id": "order-2"})}), "ReceiptHandle": "r2"},
+            {"Body": "not json", "ReceiptHandle": "r3"}
+        ]}
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic", wait_seconds=0)
+        bus.queue_url = "https://sqs/queue"
+        seen = []
+        bus.subscribe(lambda order_id, user_id: seen.append((order_id, user_id)))
+        
+        await bus.poll_once()
+        
+        assert seen == [("order-1", "user-1"), ("order-2", "user-1")]
+        assert len(sqs_client.delete_message_batch.call_args[1]["Entries"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_failing_message_is_deleted_and_polling_continues(self, clients):
+        sns_client, sqs_client = clients
+        truncated = base64.b64encode(b"\x01\x00").decode("ascii")
+        sqs_client.receive_message.side_effect = [
+            {"Messages": [
+                {"Body": truncated, "ReceiptHandle": "r1", "MessageAttributes": {"event_encoding": {"StringValue": "binary-v1", "DataType": "String"}}},
+                {"Body": json.dumps({"order_id": "order-1"}), "ReceiptHandle": "r2"}
+            ]},
+            RuntimeError("unexpected response"),
+            {"Messages": [{"Body": json.dumps({"order_id": "order-2"}), "ReceiptHandle": "r3"}]}
+        ]
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic", wait_seconds=0)
+        bus.queue_url = "https://sqs/queue"
+        seen = []
+
+        def evict(order_id, user_id):
+            if order_id == "order-1":
+                raise KeyError(order_id)
+            seen.append(order_id)
+
+        bus.subscribe(evict)
+        poller = asyncio.create_task(bus._poll())
+        for _ in range(200):
+            if seen:
+                break
+            await asyncio.sleep(0.01)
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+
+        assert seen == ["order-2"]
+        first_delete, second_delete = sqs_client.delete_message_batch.call_args_list[:2]
+        assert [entry["ReceiptHandle"] for entry in first_delete[1]["Entries"]] == ["r1", "r2"]
+        assert [entry["ReceiptHandle"] for entry in second_delete[1]["Entries"]] == ["r3"]
+
+    @pytest.mark.asyncio
+    async def test_poll_decodes_binary_events(self, clients):
+        sns_client, sqs_client = clients
+        event = NotificationEvent(
+            event_id="event-1", event_type=NotificationEventType.FULFILLED, order_id="order-1", user_id="user-1", occurred_at=1737806400
+        )
+        body = base64.b64encode(encode_binary_event(event)).decode("ascii")
+        sqs_client.receive_message.return_value = {"Messages": [
+            {"Body": body, "ReceiptHandle": "r1", "MessageAttributes": {"event_encoding": {"StringValue": "binary-v1", "DataType": "String"}}},
+            {"Body": json.dumps({
+                "Type": "Notification",
+                "Message": base64.b64encode(encode_binary_event(event.model_copy(update={"order_id": "order-2"}))).decode("ascii"),
+                "MessageAttributes": {"event_encoding": {"Type": "String", "Value": "binary-v1"}}
+            }), "ReceiptHandle": "r2"}
+        ]}
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic", wait_seconds=0)
+        bus.queue_url = "https://sqs/queue"
+        seen = []
+        bus.subscribe(lambda order_id, user_id: seen.append((order_id, user_id)))
+        
+        await bus.poll_once()
+        
+        assert seen == [("order-1", "user-1"), ("order-2", "user-1")]
+        assert sqs_client.receive_message.call_args[1]["MessageAttributeNames"] == ["event_encoding"]
+
+    @pytest.mark.asyncio
+    async def test_publish_is_left_to_the_order_event(self, clients):
+        sns_client, sqs_client = clients
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic")
+        seen = []
+        bus.subscribe(lambda order_id, user_id: seen.append(order_id))
+        
+        await bus.publish("order-1")
+        
+        assert seen == []
+        sns_client.publish.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_eviction_during_an_in_flight_read_keeps_the_old_order_out_of_the_cache(self, clients):
+        sns_client, sqs_client = clients
+        event = {"event_type": "FULFILLED", "order_id": "order-1", "user_id": "user-1"}
+        sqs_client.receive_message.return_value = {"Messages": [{"Body": json.dumps(event), "ReceiptHandle": "r1"}]}
+        bus = SnsInvalidationBus(sns_client, sqs_client, "arn:aws:sns:topic", wait_seconds=0)
+        bus.queue_url = "https://sqs/queue"
+        repo = OrderRepository(MagicMock(), "test-table", cache=TTLCache("test_bus", 10, 3600), raw_client=MagicMock())
+        bus.subscribe(lambda order_id, user_id: repo.invalidate(order_id))
+        stale = Order(
+            order_id="order-1",
+            user_id="user-1",
+            delivery_address="123 Main St, Springfield",
+            status=OrderStatus.PAYMENT_CONFIRMED,
+            items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=1, unit_price=Decimal("10.00"), subtotal=Decimal("10.00"))],
+            total_amount=Decimal("10.00")
+        )
+        read_started = asyncio.Event()
+        release_read = asyncio.Event()
+
+        async def slow_load(order_id, include_history):
+            read_started.set()
+            await release_read.wait()
+            return stale
+        repo._load_by_order_id = slow_load
+
+        read = asyncio.create_task(repo.get_by_order_id("order-1"))
+        await read_started.wait()
+        await bus.poll_once()
+        release_read.set()
+
+        assert (await read).status == OrderStatus.PAYMENT_CONFIRMED
+        assert len(repo.cache) == 0
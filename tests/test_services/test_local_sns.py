@@ -0,0 +1,56 @@
+import json
+import pytest
+from unittest.mock import Mock
+from fastapi import FastAPI
+from app.serverful.config.config import settings
+from app.serverful.lifespan import lifespan
+from app.serverful.models.models import NotificationEvent, NotificationEventType
+from app.serverful.services.invalidation_service import SnsInvalidationBus
+from app.serverful.services.local_sns import LocalSnsClient
+from app.serverful.services.sns_service import SnsService
+
+
+def make_event(n):
+    return NotificationEvent(
+        event_id=f"event{n}",
+        event_type=NotificationEventType.ORDER_CREATED,
+        order_id=f"order{n}",
+        user_id="user123",
+        occurred_at=1737806400
+    )
+
+
+class TestLocalSnsClient:
+    @pytest.mark.asyncio
+    async def test_keeps_direct_and_batched_publishes(self):
+        client = LocalSnsClient()
+        sns_service = SnsService(sns_client=client, linger_seconds=0.01)
+
+        await sns_service.publish_event(make_event(0))
+        await sns_service.start()
+        for n in range(1, 4):
+            await sns_service.publish_event(make_event(n))
+        await sns_service.stop()
+
+        assert [json.loads(message["Message"])["event_id"] for message in client.messages] == ["event0", "event1", "event2", "event3"]
+        assert all(message["TopicArn"] == settings.SNS_TOPIC_ARN and "Id" not in message for message in client.messages)
+
+
+class TestLocalLifespan:
+    @pytest.mark.asyncio
+    async def test_local_backends_start_without_aws(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "STORAGE_BACKEND", "memory")
+        monkeypatch.setattr(settings, "SNS_BACKEND", "local")
+        monkeypatch.setattr(settings, "CACHE_INVALIDATION_BACKEND", "sns")
+        monkeypatch.setattr(settings, "SNS_SPOOL_PATH", str(tmp_path / "sns-spool.jsonl"))
+        boto3_client = Mock(side_effect=AssertionError("no AWS client expected"))
+        monkeypatch.setattr("app.serverful.lifespan.boto3.client", boto3_client)
+        app = FastAPI()
+
+        async with lifespan(app):
+            await app.state.sns_service.publish_event(make_event(0))
+
+            assert isinstance(app.state.sns_client, LocalSnsClient)
+            assert len(app.state.sns_client.messages) == 1
+            assert not isinstance(app.state.invalidation_bus, SnsInvalidationBus)
+        boto3_client.assert_not_called()
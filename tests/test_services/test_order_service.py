@@ -1,4 +1,5 @@
 import pytest
+from datetime import date
 from unittest.mock import AsyncMock, MagicMock
 from decimal import Decimal
 from app.serverful.services.order_service import OrderService
@@ -110,37 +111,53 @@ class TestCreateOrder:
         assert exc_info.value.error_code == ErrorCode.USER_NOT_FOUND
 
 
-class TestCancelOrder:
+class TestCreateOrders:
     @pytest.mark.asyncio
-    async def test_cancel_order_success_payment_pending(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_PENDING
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
+    async def test_create_orders_reports_each_order(self, order_service, mock_order_repo, mock_user_repo, mock_sns_service, sample_user, create_order_request):
+        mock_user_repo.get_by_id.return_value = sample_user
+        mock_order_repo.create_many.return_value = [None, Exception("throttled")]
         
-        await order_service.cancel_order(sample_order.user_id, sample_order.order_id)
+        results = await order_service.create_orders(sample_user.user_id, [create_order_request, create_order_request])
         
-        mock_order_repo.get_by_user_and_order.assert_called_once_with(sample_order.user_id, sample_order.order_id)
-        mock_order_repo.update_status.assert_called_once()
-        call_args = mock_order_repo.update_status.call_args[0]
-        assert call_args[0].status == OrderStatus.ORDER_CANCELLED
-        assert call_args[1] == OrderStatus.PAYMENT_PENDING
+        orders = mock_order_repo.create_many.call_args[0][0]
+        assert [result.status for result in results] == ["created", "failed"]
+        assert results[0].order_id == orders[0].order_id
+        assert results[1].error == "throttled"
+        mock_sns_service.publish_event.assert_called_once()
+        assert mock_sns_service.publish_event.call_args[0][0].order_id == orders[0].order_id
 
     @pytest.mark.asyncio
-    async def test_cancel_order_success_payment_failed(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_FAILED
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
+    async def test_create_orders_user_not_found(self, order_service, mock_order_repo, mock_user_repo, create_order_request):
+        mock_user_repo.get_by_id.return_value = None
+        
+        with pytest.raises(ApplicationError) as exc_info:
+            await order_service.create_orders("123e4567-e89b-12d3-a456-426614174000", [create_order_request])
+        
+        assert exc_info.value.error_code == ErrorCode.USER_NOT_FOUND
+        mock_order_repo.create_many.assert_not_called()
+
+
+class TestCancelOrder:
+    @pytest.mark.asyncio
+    async def test_cancel_order_success(self, order_service, mock_order_repo, mock_sns_service, sample_order):
+        sample_order.status = OrderStatus.ORDER_CANCELLED
+        mock_order_repo.transition.return_value = sample_order
         
         await order_service.cancel_order(sample_order.user_id, sample_order.order_id)
         
-        mock_order_repo.update_status.assert_called_once()
-        call_args = mock_order_repo.update_status.call_args[0]
-        assert call_args[0].status == OrderStatus.ORDER_CANCELLED
-        assert call_args[1] == OrderStatus.PAYMENT_FAILED
+        mock_order_repo.transition.assert_called_once_with(
+            sample_order.order_id,
+            [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED],
+            OrderStatus.ORDER_CANCELLED,
+            "user",
+            user_id=sample_order.user_id,
+            event_type=None
+        )
+        mock_sns_service.publish_event.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_cancel_order_not_found(self, order_service, mock_order_repo):
-        mock_order_repo.get_by_user_and_order.return_value = None
+        mock_order_repo.transition.side_effect = ApplicationError(ErrorCode.ORDER_NOT_FOUND)
         
         with pytest.raises(ApplicationError) as exc_info:
             await order_service.cancel_order("123e4567-e89b-12d3-a456-426614174000", "order-123")
@@ -148,14 +165,14 @@ class TestCancelOrder:
         assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
 
     @pytest.mark.asyncio
-    async def test_cancel_order_invalid_status(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
+    async def test_cancel_order_invalid_status(self, order_service, mock_order_repo, mock_sns_service, sample_order):
+        mock_order_repo.transition.side_effect = ApplicationError(ErrorCode.INVALID_ORDER_STATUS)
         
         with pytest.raises(ApplicationError) as exc_info:
             await order_service.cancel_order(sample_order.user_id, sample_order.order_id)
         
         assert exc_info.value.error_code == ErrorCode.ORDER_CANNOT_BE_CANCELLED
+        mock_sns_service.publish_event.assert_not_called()
 
 
 class TestGetOrders:
@@ -166,7 +183,7 @@ class TestGetOrders:
         result = await order_service.get_order_by_id(sample_order.order_id)
         
         assert result == sample_order
-        mock_order_repo.get_by_order_id.assert_called_once_with(sample_order.order_id)
+        mock_order_repo.get_by_order_id.assert_called_once_with(sample_order.order_id, include_history=True)
 
     @pytest.mark.asyncio
     async def test_get_order_by_id_not_found(self, order_service, mock_order_repo):
@@ -177,6 +194,15 @@ class TestGetOrders:
         
         assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
 
+    @pytest.mark.asyncio
+    async def test_get_orders_by_ids_reports_missing(self, order_service, mock_order_repo, sample_order):
+        mock_order_repo.get_many.return_value = [sample_order]
+        
+        orders, missing = await order_service.get_orders_by_ids([sample_order.order_id, "order-404", "order-404"])
+        
+        assert orders == [sample_order]
+        assert missing == ["order-404"]
+
     @pytest.mark.asyncio
     async def test_get_order_success(self, order_service, mock_order_repo, sample_order):
         mock_order_repo.get_by_user_and_order.return_value = sample_order
@@ -184,7 +210,7 @@ class TestGetOrders:
         result = await order_service.get_order(sample_order.user_id, sample_order.order_id)
         
         assert result == sample_order
-        mock_order_repo.get_by_user_and_order.assert_called_once_with(sample_order.user_id, sample_order.order_id)
+        mock_order_repo.get_by_user_and_order.assert_called_once_with(sample_order.user_id, sample_order.order_id, include_history=True)
 
     @pytest.mark.asyncio
     async def test_get_order_not_found(self, order_service, mock_order_repo):
@@ -217,180 +243,236 @@ class TestGetOrders:
 
     @pytest.mark.asyncio
     async def test_get_user_orders(self, order_service, mock_order_repo, sample_order):
-        mock_order_repo.get_by_user.return_value = [sample_order]
+        mock_order_repo.get_by_user.return_value = ([sample_order], None)
         
-        result = await order_service.get_user_orders(sample_order.user_id)
+        orders, next_cursor = await order_service.get_user_orders(sample_order.user_id, 20)
         
-        assert len(result) == 1
-        assert result[0] == sample_order
-        mock_order_repo.get_by_user.assert_called_once_with(sample_order.user_id)
+        assert len(orders) == 1
+        assert orders[0] == sample_order
+        assert next_cursor is None
+        mock_order_repo.get_by_user.assert_called_once_with(sample_order.user_id, 20, None, summary=False)
 
     @pytest.mark.asyncio
-    async def test_get_orders_by_status_with_status(self, order_service, mock_order_repo, sample_order):
-        mock_order_repo.get_by_status.return_value = [sample_order]
+    async def test_get_user_orders_cursor_round_trip(self, order_service, mock_order_repo, sample_order):
+        last_key = {"PK": f"ORDERS#{sample_order.user_id}", "SK": f"ORDER#{sample_order.order_id}"}
+        mock_order_repo.get_by_user.return_value = ([sample_order], last_key)
         
-        result = await order_service.get_orders_by_status(OrderStatus.PAYMENT_PENDING)
+        _, next_cursor = await order_service.get_user_orders(sample_order.user_id, 1)
+        await order_service.get_user_orders(sample_order.user_id, 1, next_cursor)
         
-        assert len(result) == 1
-        assert result[0] == sample_order
-        mock_order_repo.get_by_status.assert_called_once_with(OrderStatus.PAYMENT_PENDING)
+        assert next_cursor is not None
+        assert mock_order_repo.get_by_user.call_args[0] == (sample_order.user_id, 1, last_key)
 
     @pytest.mark.asyncio
-    async def test_get_orders_by_status_without_status(self, order_service, mock_order_repo, sample_order):
-        mock_order_repo.get_all.return_value = [sample_order]
+    async def test_get_user_orders_tampered_cursor(self, order_service, mock_order_repo, sample_order):
+        mock_order_repo.get_by_user.return_value = ([sample_order], {"PK": "ORDERS#a", "SK": "ORDER#b"})
+        _, next_cursor = await order_service.get_user_orders(sample_order.user_id, 1)
+        payload, signature = next_cursor.split(".")
         
-        result = await order_service.get_orders_by_status(None)
+        with pytest.raises(ApplicationError) as exc_info:
+            await order_service.get_user_orders(sample_order.user_id, 1, f"{payload}x.{signature}")
         
-        assert len(result) == 1
-        assert result[0] == sample_order
-        mock_order_repo.get_all.assert_called_once()
-
+        assert exc_info.value.error_code == ErrorCode.INVALID_CURSOR
 
-class TestProcessPayment:
     @pytest.mark.asyncio
-    async def test_process_payment_success(self, order_service, mock_order_repo, mock_sns_service, sample_order, payment_request):
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
-        mock_sns_service.publish_event.return_value = None
-        
-        result = await order_service.process_payment(sample_order.user_id, sample_order.order_id, payment_request)
-        
-        assert result.status == OrderStatus.PAYMENT_CONFIRMED
-        assert result.payment_details is not None
-        assert result.payment_details.payment_method == "credit_card"
-        assert result.payment_details.payment_status == "success"
-        assert len(result.status_history) == 1
-        mock_order_repo.update_status.assert_called_once()
-        mock_sns_service.publish_event.assert_called_once()
+    async def test_cursor_is_rejected_by_other_listings(self, order_service, mock_order_repo, sample_order):
+        mock_order_repo.get_by_user.return_value = ([sample_order], {"PK": f"ORDERS#{sample_order.user_id}", "SK": "ORDER#b"})
+        mock_order_repo.get_all.return_value = ([sample_order], {"STATUS#FULFILLED": None})
+        mock_order_repo.get_by_status.return_value = ([sample_order], {"STATUS#FULFILLED": None})
+        _, user_cursor = await order_service.get_user_orders(sample_order.user_id, 1)
+        _, staff_cursor = await order_service.get_all_orders(1)
+        _, status_cursor = await order_service.get_orders_by_status(OrderStatus.FULFILLED, 1, date_from=date(2024, 3, 1))
+        
+        replays = [
+            order_service.get_user_orders("someone-else", 1, user_cursor),
+            order_service.get_user_orders(sample_order.user_id, 1, staff_cursor),
+            order_service.get_all_orders(1, user_cursor),
+            order_service.get_orders_by_status(OrderStatus.PAYMENT_FAILED, 1, status_cursor, date_from=date(2024, 3, 1)),
+            order_service.get_orders_by_status(OrderStatus.FULFILLED, 1, status_cursor)
+        ]
+        for replay in replays:
+            with pytest.raises(ApplicationError) as exc_info:
+                await replay
+            assert exc_info.value.error_code == ErrorCode.INVALID_CURSOR
+        
+        await order_service.get_orders_by_status(OrderStatus.FULFILLED, 1, status_cursor, date_from=date(2024, 3, 1))
+        assert mock_order_repo.get_by_status.call_args[0] == (OrderStatus.FULFILLED, 1, {"STATUS#FULFILLED": None})
 
     @pytest.mark.asyncio
-    async def test_process_payment_failed(self, order_service, mock_order_repo, mock_sns_service, sample_order):
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
-        mock_sns_service.publish_event.return_value = None
-        failed_payment = ProcessPaymentRequest(payment_method="credit_card", payment_status=PaymentStatus.FAIL)
+    async def test_get_orders_by_status_with_status(self, order_service, mock_order_repo, sample_order):
+        mock_order_repo.get_by_status.return_value = ([sample_order], None)
         
-        result = await order_service.process_payment(sample_order.user_id, sample_order.order_id, failed_payment)
+        orders, next_cursor = await order_service.get_orders_by_status(OrderStatus.PAYMENT_PENDING, 20)
         
-        assert result.status == OrderStatus.PAYMENT_FAILED
-        assert result.payment_details.payment_status == "fail"
+        assert len(orders) == 1
+        assert orders[0] == sample_order
+        assert next_cursor is None
+        mock_order_repo.get_by_status.assert_called_once_with(OrderStatus.PAYMENT_PENDING, 20, None, summary=False, date_from=None, date_to=None)
 
     @pytest.mark.asyncio
-    async def test_process_payment_order_not_found(self, order_service, mock_order_repo, payment_request):
-        mock_order_repo.get_by_user_and_order.return_value = None
-        
+    async def test_get_orders_by_status_rejects_reversed_date_range(self, order_service, mock_order_repo):
         with pytest.raises(ApplicationError) as exc_info:
-            await order_service.process_payment("123e4567-e89b-12d3-a456-426614174000", "order-123", payment_request)
+            await order_service.get_orders_by_status(OrderStatus.PAYMENT_FAILED, 20, date_from=date(2024, 3, 2), date_to=date(2024, 3, 1))
         
-        assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
+        assert exc_info.value.error_code == ErrorCode.INVALID_INPUT
+        mock_order_repo.get_by_status.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_process_payment_invalid_status(self, order_service, mock_order_repo, sample_order, payment_request):
-        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
-        mock_order_repo.get_by_user_and_order.return_value = sample_order
-        
+    async def test_get_orders_by_status_invalid_cursor(self, order_service, mock_order_repo):
         with pytest.raises(ApplicationError) as exc_info:
-            await order_service.process_payment(sample_order.user_id, sample_order.order_id, payment_request)
+            await order_service.get_orders_by_status(OrderStatus.PAYMENT_PENDING, 20, "not-a-cursor")
         
-        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
-
+        assert exc_info.value.error_code == ErrorCode.INVALID_CURSOR
+        mock_order_repo.get_by_status.assert_not_called()
 
-class TestFulfillment:
     @pytest.mark.asyncio
-    async def test_start_fulfilment_success(self, order_service, mock_order_repo, mock_sns_service, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
-        mock_order_repo.get_by_order_id.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
-        mock_sns_service.publish_event.return_value = None
+    async def test_get_all_orders(self, order_service, mock_order_repo, sample_order):
+        cursor_state = {"STATUS#PAYMENT_PENDING": {"PK": "STATUS#PAYMENT_PENDING", "SK": "2009-02-13#ORDER#order-123"}}
+        mock_order_repo.get_all.return_value = ([sample_order], cursor_state)
         
-        await order_service.start_fulfilment(sample_order.order_id)
+        orders, next_cursor = await order_service.get_all_orders(20)
+        await order_service.get_all_orders(20, next_cursor)
         
-        assert sample_order.status == OrderStatus.FULFILLMENT_IN_PROGRESS
-        assert len(sample_order.status_history) == 1
-        mock_order_repo.update_status.assert_called_once()
-        mock_sns_service.publish_event.assert_called_once()
+        assert orders == [sample_order]
+        assert mock_order_repo.get_all.call_args_list[0][0] == (20, None)
+        assert mock_order_repo.get_all.call_args_list[1][0] == (20, cursor_state)
 
     @pytest.mark.asyncio
-    async def test_start_fulfilment_order_not_found(self, order_service, mock_order_repo):
-        mock_order_repo.get_by_order_id.return_value = None
+    async def test_stream_all_orders(self, order_service, mock_order_repo, sample_order):
+        async def pages(page_size):
+            yield [sample_order]
+            yield [sample_order]
+        mock_order_repo.iter_all = pages
         
-        with pytest.raises(ApplicationError) as exc_info:
-            await order_service.start_fulfilment("order-123")
+        result = [orders async for orders in order_service.stream_all_orders(100)]
         
-        assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
+        assert result == [[sample_order], [sample_order]]
+
 
+class TestProcessPayment:
     @pytest.mark.asyncio
-    async def test_start_fulfilment_invalid_status(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_PENDING
-        mock_order_repo.get_by_order_id.return_value = sample_order
+    async def test_process_payment_success(self, order_service, mock_order_repo, mock_sns_service, sample_order, payment_request):
+        mock_order_repo.transition.return_value = sample_order
         
-        with pytest.raises(ApplicationError) as exc_info:
-            await order_service.start_fulfilment(sample_order.order_id)
+        result = await order_service.process_payment(sample_order.user_id, sample_order.order_id, payment_request)
         
-        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
+        assert result == sample_order
+        args, kwargs = mock_order_repo.transition.call_args
+        assert args == (sample_order.order_id, [OrderStatus.PAYMENT_PENDING, OrderStatus.PAYMENT_FAILED], OrderStatus.PAYMENT_CONFIRMED, "user")
+        assert kwargs["user_id"] == sample_order.user_id
+        assert kwargs["payment_details"].payment_method == "credit_card"
+        assert kwargs["payment_details"].payment_status == "success"
+        assert mock_sns_service.publish_event.call_args[0][0].event_type == NotificationEventType.PAYMENT_CONFIRMED
 
     @pytest.mark.asyncio
-    async def test_complete_fulfilment_success(self, order_service, mock_order_repo, mock_sns_service, sample_order):
-        sample_order.status = OrderStatus.FULFILLMENT_IN_PROGRESS
-        mock_order_repo.get_by_order_id.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
-        mock_sns_service.publish_event.return_value = None
+    async def test_process_payment_failed(self, order_service, mock_order_repo, mock_sns_service, sample_order):
+        mock_order_repo.transition.return_value = sample_order
+        failed_payment = ProcessPaymentRequest(payment_method="credit_card", payment_status=PaymentStatus.FAIL)
         
-        await order_service.complete_fulfilment(sample_order.order_id)
+        await order_service.process_payment(sample_order.user_id, sample_order.order_id, failed_payment)
         
-        assert sample_order.status == OrderStatus.FULFILLED
-        assert len(sample_order.status_history) == 1
-        mock_order_repo.update_status.assert_called_once()
-        mock_sns_service.publish_event.assert_called_once()
+        args, kwargs = mock_order_repo.transition.call_args
+        assert args[2] == OrderStatus.PAYMENT_FAILED
+        assert kwargs["payment_details"].payment_status == "fail"
+        assert mock_sns_service.publish_event.call_args[0][0].event_type == NotificationEventType.PAYMENT_FAILED
 
     @pytest.mark.asyncio
-    async def test_complete_fulfilment_order_not_found(self, order_service, mock_order_repo):
-        mock_order_repo.get_by_order_id.return_value = None
+    @pytest.mark.parametrize("error_code", [ErrorCode.ORDER_NOT_FOUND, ErrorCode.INVALID_ORDER_STATUS])
+    async def test_process_payment_transition_errors(self, order_service, mock_order_repo, mock_sns_service, payment_request, error_code):
+        mock_order_repo.transition.side_effect = ApplicationError(error_code)
         
         with pytest.raises(ApplicationError) as exc_info:
-            await order_service.complete_fulfilment("order-123")
+            await order_service.process_payment("123e4567-e89b-12d3-a456-426614174000", "order-123", payment_request)
         
-        assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
+        assert exc_info.value.error_code == error_code
+        mock_sns_service.publish_event.assert_not_called()
+
 
+class TestFulfillment:
     @pytest.mark.asyncio
-    async def test_complete_fulfilment_invalid_status(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
-        mock_order_repo.get_by_order_id.return_value = sample_order
+    @pytest.mark.parametrize("method,expected_from,to,event_type", [
+        ("start_fulfilment", OrderStatus.PAYMENT_CONFIRMED, OrderStatus.FULFILLMENT_IN_PROGRESS, NotificationEventType.FULFILLMENT_STARTED),
+        ("complete_fulfilment", OrderStatus.FULFILLMENT_IN_PROGRESS, OrderStatus.FULFILLED, NotificationEventType.FULFILLED),
+        ("cancel_fulfilment", OrderStatus.FULFILLMENT_IN_PROGRESS, OrderStatus.FULFILLMENT_FAILED, NotificationEventType.FULFILLMENT_CANCELLED),
+    ])
+    async def test_fulfilment_transitions(self, order_service, mock_order_repo, mock_sns_service, sample_order, method, expected_from, to, event_type):
+        sample_order.status = to
+        mock_order_repo.transition.return_value = sample_order
+        
+        await getattr(order_service, method)(sample_order.order_id)
+        
+        mock_order_repo.transition.assert_called_once_with(sample_order.order_id, [expected_from], to, "system", event_type=None)
+        event = mock_sns_service.publish_event.call_args[0][0]
+        assert event.event_type == event_type
+        assert event.user_id == sample_order.user_id
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method", ["start_fulfilment", "complete_fulfilment", "cancel_fulfilment"])
+    @pytest.mark.parametrize("error_code", [ErrorCode.ORDER_NOT_FOUND, ErrorCode.INVALID_ORDER_STATUS])
+    async def test_fulfilment_transition_errors(self, order_service, mock_order_repo, mock_sns_service, method, error_code):
+        mock_order_repo.transition.side_effect = ApplicationError(error_code)
         
         with pytest.raises(ApplicationError) as exc_info:
-            await order_service.complete_fulfilment(sample_order.order_id)
+            await getattr(order_service, method)("order-123")
         
-        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
+        assert exc_info.value.error_code == error_code
+        mock_sns_service.publish_event.assert_not_called()
+
+
+class TestOutboxDelivery:
+    @pytest.fixture
+    def outbox_service(self, mock_order_repo, mock_user_repo, mock_sns_service):
+        return OrderService(mock_order_repo, mock_user_repo, mock_sns_service, invalidation_bus=AsyncMock(), use_outbox=True)
 
     @pytest.mark.asyncio
-    async def test_cancel_fulfilment_success(self, order_service, mock_order_repo, mock_sns_service, sample_order):
-        sample_order.status = OrderStatus.FULFILLMENT_IN_PROGRESS
-        mock_order_repo.get_by_order_id.return_value = sample_order
-        mock_order_repo.update_status.return_value = None
-        mock_sns_service.publish_event.return_value = None
-        
-        await order_service.cancel_fulfilment(sample_order.order_id)
-        
-        assert sample_order.status == OrderStatus.FULFILLMENT_FAILED
-        assert len(sample_order.status_history) == 1
-        mock_order_repo.update_status.assert_called_once()
-        mock_sns_service.publish_event.assert_called_once()
+    async def test_create_order_writes_event_with_order(self, outbox_service, mock_order_repo, mock_user_repo, mock_sns_service, sample_user, create_order_request):
+        mock_user_repo.get_by_id.return_value = sample_user
+
+        await outbox_service.create_order(sample_user.user_id, create_order_request)
+
+        order, event_type, recipient = mock_order_repo.create.call_args[0]
+        assert event_type == NotificationEventType.ORDER_CREATED
+        assert recipient is None
+        mock_sns_service.publish_event.assert_not_called()
+        outbox_service.invalidation_bus.publish.assert_called_once_with(order.order_id, sample_user.user_id)
 
     @pytest.mark.asyncio
-    async def test_cancel_fulfilment_order_not_found(self, order_service, mock_order_repo):
-        mock_order_repo.get_by_order_id.return_value = None
-        
-        with pytest.raises(ApplicationError) as exc_info:
-            await order_service.cancel_fulfilment("order-123")
-        
-        assert exc_info.value.error_code == ErrorCode.ORDER_NOT_FOUND
+    async def test_fulfilment_writes_event_with_transition(self, outbox_service, mock_order_repo, mock_sns_service, sample_order):
+        sample_order.status = OrderStatus.FULFILLED
+        mock_order_repo.transition.return_value = sample_order
+
+        await outbox_service.complete_fulfilment(sample_order.order_id)
+
+        assert mock_order_repo.transition.call_args[1]["event_type"] == NotificationEventType.FULFILLED
+        mock_sns_service.publish_event.assert_not_called()
+        outbox_service.invalidation_bus.publish.assert_called_once_with(sample_order.order_id, sample_order.user_id)
+
+
+class TestEventSnapshots:
+    @pytest.fixture
+    def snapshot_service(self, mock_order_repo, mock_user_repo, mock_sns_service):
+        return OrderService(mock_order_repo, mock_user_repo, mock_sns_service, event_snapshots=True)
 
     @pytest.mark.asyncio
-    async def test_cancel_fulfilment_invalid_status(self, order_service, mock_order_repo, sample_order):
-        sample_order.status = OrderStatus.PAYMENT_CONFIRMED
-        mock_order_repo.get_by_order_id.return_value = sample_order
-        
-        with pytest.raises(ApplicationError) as exc_info:
-            await order_service.cancel_fulfilment(sample_order.order_id)
-        
-        assert exc_info.value.error_code == ErrorCode.INVALID_ORDER_STATUS
+    async def test_created_event_carries_order_and_recipient(self, snapshot_service, mock_user_repo, mock_sns_service, sample_user, create_order_request):
+        mock_user_repo.get_by_id.return_value = sample_user
+
+        await snapshot_service.create_order(sample_user.user_id, create_order_request)
+
+        event = mock_sns_service.publish_event.call_args[0][0]
+        assert event.recipient.email == sample_user.email
+        assert event.recipient.first_name == sample_user.first_name
+        assert event.order.order_status == OrderStatus.PAYMENT_PENDING
+        assert event.order.total_amount == Decimal("20.00")
+
+    @pytest.mark.asyncio
+    async def test_transition_event_carries_order_only(self, snapshot_service, mock_order_repo, mock_sns_service, sample_order):
+        sample_order.status = OrderStatus.FULFILLED
+        mock_order_repo.transition.return_value = sample_order
+
+        await snapshot_service.complete_fulfilment(sample_order.order_id)
+
+        event = mock_sns_service.publish_event.call_args[0][0]
+        assert event.order.order_status == OrderStatus.FULFILLED
+        assert event.order.items == sample_order.items
+        assert event.recipient is None
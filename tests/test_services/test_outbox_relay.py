@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from botocore.exceptions import ClientError
+from app.serverful.services.outbox_relay import OutboxRelay
+from app.serverful.models.models import NotificationEvent, NotificationEventType
+
+
+def make_event(event_id, occurred_at=1737806400):
+    return NotificationEvent(
+        event_id=event_id,
+        event_type=NotificationEventType.ORDER_CREATED,
+        order_id=f"order-{event_id}",
+        user_id="user123",
+        occurred_at=occurred_at
+    )
+
+
+@pytest.fixture
+def order_repo():
+    repo = MagicMock()
+    repo.outbox_shards = 1
+    repo.get_outbox_events = AsyncMock(return_value=[])
+    repo.delete_outbox_events = AsyncMock()
+    return repo
+
+
+@pytest.fixture
+def sns_service():
+    return AsyncMock()
+
+
+@pytest.fixture
+def relay(order_repo, sns_service):
+    return OutboxRelay(order_repo, sns_service, sweep_interval_seconds=60, sweep_age_seconds=30)
+
+
+class TestOutboxRelay:
+    @pytest.mark.asyncio
+    async def test_deliver_removes_only_published_events(self, relay, order_repo, sns_service):
+        events = [make_event("e1"), make_event("e2")]
+        sns_service.publish_event.side_effect = [None, ClientError({"Error": {"Code": "Throttled"}}, "Publish")]
+
+        delivered = await relay.deliver(events)
+
+        assert delivered == 1
+        order_repo.delete_outbox_events.assert_called_once_with([events[0]])
+
+    @pytest.mark.asyncio
+    async def test_sweep_reads_events_older_than_sweep_age(self, relay, order_repo, sns_service):
+        order_repo.get_outbox_events.return_value = [make_event("e1")]
+
+        with patch("app.serverful.services.outbox_relay.current_timestamp", return_value=1737806500):
+            swept = await relay.sweep_once()
+
+        assert swept == 1
+        order_repo.get_outbox_events.assert_called_once_with("OUTBOX", 1737806470, 100, start_after=None)
+        sns_service.publish_event.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_sweep_pages_past_events_that_keep_failing(self, relay, order_repo, sns_service):
+        failing = [make_event(f"e{n}") for n in range(100)]
+        stuck = [make_event("e100")]
+        order_repo.get_outbox_events.side_effect = [failing, stuck]
+        sns_service.publish_event.side_effect = lambda event: _fail_unless(event, "e100")
+
+        assert await relay.sweep_once() == 1
+        assert order_repo.get_outbox_events.call_args_list[1][1] == {"start_after": failing[-1]}
+        order_repo.delete_outbox_events.assert_called_once_with(stuck)
+
+    @pytest.mark.asyncio
+    async def test_submitted_events_are_delivered_by_stop(self, relay, order_repo, sns_service):
+        await relay.start()
+        relay.submit([make_event("e1"), make_event("e2")])
+
+        await relay.stop()
+
+        assert relay.queue_depth == 0
+        assert sns_service.publish_event.call_count == 2
+        delivered = [event for call in order_repo.delete_outbox_events.call_args_list for event in call[0][0]]
+        assert [event.event_id for event in delivered] == ["e1", "e2"]
+
+
+def _fail_unless(event, event_id):
+    if event.event_id != event_id:
+        raise ClientError({"Error": {"Code": "Throttled"}}, "Publish")
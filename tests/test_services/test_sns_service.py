@@ -1,8 +1,12 @@
+import asyncio
+import base64
+import json
 import pytest
+from decimal import Decimal
 from unittest.mock import Mock, patch, AsyncMock
 from botocore.exceptions import ClientError
-from app.serverful.services.sns_service import SnsService
-from app.serverful.models.models import NotificationEvent, NotificationEventType
+from app.serverful.services.sns_service import SnsService, decode_binary_event, encode_binary_event
+from app.serverful.models.models import EventRecipient, NotificationEvent, NotificationEventType, OrderItem, OrderSnapshot, OrderStatus
 
 
 class TestSnsService:
@@ -100,3 +104,200 @@ class TestSnsService:
             
             call_args = mock_sns_client.publish.call_args
             assert event_type.value in call_args.kwargs["Message"]
+
+
+class TestEnrichedEvents:
+    def make_event(self):
+        return NotificationEvent(
+            event_id="event123",
+            event_type=NotificationEventType.ORDER_CREATED,
+            order_id="order123",
+            user_id="user123",
+            occurred_at=1737806400,
+            order=OrderSnapshot(
+                order_status=OrderStatus.PAYMENT_PENDING,
+                items=[OrderItem(product_id="prod-1", product_name="Product 1", quantity=2, unit_price=Decimal("10.00"), subtotal=Decimal("20.00"))],
+                total_amount=Decimal("20.00"),
+                delivery_address="123 Main St, Springfield"
+            ),
+            recipient=EventRecipient(first_name="John", last_name="Doe", email="john@example.com")
+        )
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_published_with_event(self):
+        client = Mock()
+        client.publish.return_value = {"MessageId": "msg123"}
+        
+        await SnsService(sns_client=client).publish_event(self.make_event())
+        
+        message = json.loads(client.publish.call_args.kwargs["Message"])
+        assert message["recipient"]["email"] == "john@example.com"
+        assert message["order"]["order_status"] == "PAYMENT_PENDING"
+        assert message["order"]["items"][0]["unit_price"] == "10.00"
+        assert message["order"]["total_amount"] == "20.00"
+
+    @pytest.mark.asyncio
+    async def test_oversized_snapshot_falls_back_to_ids(self):
+        client = Mock()
+        client.publish.return_value = {"MessageId": "msg123"}
+        
+        await SnsService(sns_client=client, snapshot_max_bytes=256).publish_event(self.make_event())
+        
+        message = json.loads(client.publish.call_args.kwargs["Message"])
+        assert "order" not in message and "recipient" not in message
+        assert message["order_id"] == "order123"
+
+
+class TestBinaryEncoding:
+    def make_event(self, **overrides):
+        return NotificationEvent(**{
+            "event_id": "8f14e45f-ceea-467f-a0b9-2f1e0f4b6f8a",
+            "event_type": NotificationEventType.FULFILLMENT_CANCELLED,
+            "order_id": "order123",
+            "user_id": "123e4567-e89b-12d3-a456-426614174000",
+            "occurred_at": 1737806400,
+            **overrides
+        })
+
+    @pytest.mark.asyncio
+    async def test_binary_message_is_flagged_and_round_trips(self):
+        client = Mock()
+        client.publish.return_value = {"MessageId": "msg123"}
+        event = self.make_event()
+        
+        await SnsService(sns_client=client, encoding="binary-v1").publish_event(event)
+        
+        kwargs = client.publish.call_args.kwargs
+        assert kwargs["MessageAttributes"]["event_encoding"]["StringValue"] == "binary-v1"
+        assert kwargs["MessageAttributes"]["event_type"]["StringValue"] == "FULFILLMENT_CANCELED"
+        decoded = decode_binary_event(base64.b64decode(kwargs["Message"]))
+        assert decoded == {
+            "event_id": event.event_id,
+            "event_type": "FULFILLMENT_CANCELED",
+            "order_id": "order123",
+            "user_id": event.user_id,
+            "occurred_at": 1737806400
+        }
+        assert len(kwargs["Message"]) < len(json.dumps(decoded)) // 2
+
+    def test_non_uuid_ids_round_trip(self):
+        event = self.make_event(event_id="", user_id="user-\u00e9")
+        
+        decoded = decode_binary_event(encode_binary_event(event))
+        
+        assert decoded["event_id"] == ""
+        assert decoded["user_id"] == "user-\u00e9"
+
+    @pytest.mark.asyncio
+    async def test_events_with_snapshots_stay_json(self):
+        client = Mock()
+        client.publish.return_value = {"MessageId": "msg123"}
+        event = self.make_event(recipient=EventRecipient(first_name="John", last_name="Doe", email="john@example.com"))
+        
+        await SnsService(sns_client=client, encoding="binary-v1").publish_event(event)
+        
+        kwargs = client.publish.call_args.kwargs
+        assert "event_encoding" not in kwargs["MessageAttributes"]
+        assert json.loads(kwargs["Message"])["recipient"]["email"] == "john@example.com"
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"\x02\x00" + bytes(8) + b"\x00\x00\x00",
+        b"\x01\x00" + bytes(8) + b"\x05ab",
+        b"\x01\x00" + bytes(8) + b"\x00\x00\x00{}"
+    ])
+    def test_unreadable_data_raises_value_error(self, data):
+        with pytest.raises(ValueError):
+            decode_binary_event(data)
+
+
+class TestBatchedPublishing:
+    @pytest.fixture
+    def mock_sns_client(self):
+        client = Mock()
+        client.publish_batch.side_effect = lambda TopicArn, PublishBatchRequestEntries: {
+            "Successful": [{"Id": entry["Id"], "MessageId": f"msg-{entry['Id']}"} for entry in PublishBatchRequestEntries],
+            "Failed": []
+        }
+        return client
+
+    def make_event(self, n):
+        return NotificationEvent(
+            event_id=f"event{n}",
+            event_type=NotificationEventType.ORDER_CREATED,
+            order_id=f"order{n}",
+            user_id="user123",
+            occurred_at=1737806400
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_events_share_publish_batch_calls(self, mock_sns_client):
+        sns_service = SnsService(sns_client=mock_sns_client, linger_seconds=0.05)
+        await sns_service.start()
+        
+        await asyncio.gather(*(sns_service.publish_event(self.make_event(n)) for n in range(25)))
+        await sns_service.stop()
+        
+        sizes = [len(call.kwargs["PublishBatchRequestEntries"]) for call in mock_sns_client.publish_batch.call_args_list]
+        assert sizes == [10, 10, 5]
+        mock_sns_client.publish.assert_not_called()
+        entry = mock_sns_client.publish_batch.call_args_list[0].kwargs["PublishBatchRequestEntries"][0]
+        assert entry["Subject"] == "Order Event: ORDER_CREATED"
+        assert entry["MessageAttributes"]["order_id"]["StringValue"] == "order0"
+
+    @pytest.mark.asyncio
+    async def test_failed_entry_raises_only_for_its_event(self, mock_sns_client):
+        mock_sns_client.publish_batch.side_effect = lambda TopicArn, PublishBatchRequestEntries: {
+            "Successful": [{"Id": "0", "MessageId": "msg-0"}],
+            "Failed": [{"Id": "1", "Code": "InternalError", "Message": "boom", "SenderFault": False}]
+        }
+        sns_service = SnsService(sns_client=mock_sns_client, linger_seconds=0.05)
+        await sns_service.start()
+        
+        results = await asyncio.gather(
+            sns_service.publish_event(self.make_event(0)), sns_service.publish_event(self.make_event(1)), return_exceptions=True
+        )
+        await sns_service.stop()
+        
+        assert results[0] is None
+        assert isinstance(results[1], ClientError)
+        assert results[1].response["Error"]["Code"] == "InternalError"
+
+    @pytest.mark.asyncio
+    async def test_batch_call_error_fails_every_event(self, mock_sns_client):
+        mock_sns_client.publish_batch.side_effect = ClientError({"Error": {"Code": "NotFound", "Message": "Topic not found"}}, "PublishBatch")
+        sns_service = SnsService(sns_client=mock_sns_client, linger_seconds=0.01)
+        await sns_service.start()
+        
+        results = await asyncio.gather(*(sns_service.publish_event(self.make_event(n)) for n in range(3)), return_exceptions=True)
+        await sns_service.stop()
+        
+        assert all(isinstance(result, ClientError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_unexpected_batch_error_fails_every_event(self, mock_sns_client):
+        mock_sns_client.publish_batch.side_effect = RuntimeError("cannot schedule new futures after shutdown")
+        sns_service = SnsService(sns_client=mock_sns_client, linger_seconds=0.01)
+        await sns_service.start()
+        
+        results = await asyncio.wait_for(
+            asyncio.gather(*(sns_service.publish_event(self.make_event(n)) for n in range(3)), return_exceptions=True), timeout=5
+        )
+        await sns_service.stop()
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_queued_events_then_publishes_directly(self, mock_sns_client):
+        mock_sns_client.publish.return_value = {"MessageId": "msg-direct"}
+        sns_service = SnsService(sns_client=mock_sns_client, linger_seconds=10)
+        await sns_service.start()
+        
+        pending = asyncio.create_task(sns_service.publish_event(self.make_event(0)))
+        await asyncio.sleep(0)
+        await sns_service.stop()
+        await pending
+        await sns_service.publish_event(self.make_event(1))
+        
+        assert mock_sns_client.publish_batch.call_count == 1
+        mock_sns_client.publish.assert_called_once()
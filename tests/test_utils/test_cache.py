@@ -0,0 +1,48 @@
+from app.serverful.utils.cache import TTLCache
+from app.serverful.utils.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_returns_stored_value_until_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache("test_ttl", max_size=10, ttl_seconds=5, clock=clock)
+        cache.set("a", 1)
+        
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache("test_lru", max_size=2, ttl_seconds=60)
+        evictions = metrics.snapshot()["counters"].get("test_lru_cache_evictions", 0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert metrics.snapshot()["counters"]["test_lru_cache_evictions"] == evictions + 1
+
+    def test_counts_hits_and_misses(self):
+        cache = TTLCache("test_counts", max_size=2, ttl_seconds=60)
+        before = metrics.snapshot()["counters"]
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        cache.invalidate("a")
+        cache.get("a")
+        
+        counters = metrics.snapshot()["counters"]
+        assert counters["test_counts_cache_hits"] - before.get("test_counts_cache_hits", 0) == 1
+        assert counters["test_counts_cache_misses"] - before.get("test_counts_cache_misses", 0) == 2
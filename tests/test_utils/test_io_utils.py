@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.serverful.utils import io_utils
+from app.serverful.utils.io_utils import IOExecutor, configure_io_executor, run_io
+
+
+@pytest.fixture
+def io_executor():
+    executor = IOExecutor(max_workers=2)
+    configure_io_executor(executor)
+    yield executor
+    configure_io_executor(None)
+    executor.shutdown()
+
+
+class TestRunIO:
+    @pytest.mark.asyncio
+    async def test_awaits_coroutine_functions_directly(self):
+        fn = AsyncMock(return_value="result")
+        
+        result = await run_io(fn, 1, key="value")
+        
+        assert result == "result"
+        fn.assert_awaited_once_with(1, key="value")
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_uses_default_executor_when_unconfigured(self):
+        fn = MagicMock(return_value="result")
+        
+        assert io_utils._io_executor is None
+        assert await run_io(fn, key="value") == "result"
+        fn.assert_called_once_with(key="value")
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_uses_configured_executor(self, io_executor):
+        thread_names = []
+        
+        await run_io(lambda: thread_names.append(threading.current_thread().name))
+        
+        assert thread_names[0].startswith("aws-io")
+
+
+class TestIOExecutor:
+    @pytest.mark.asyncio
+    async def test_gauges_track_in_use_and_queued_calls(self, io_executor):
+        release = threading.Event()
+        calls = [asyncio.ensure_future(io_executor.run(release.wait)) for _ in range(5)]
+        
+        for _ in range(100):
+            if io_executor.in_use == 2:
+                break
+            await asyncio.sleep(0.01)
+        
+        assert io_executor.in_use == 2
+        assert io_executor.queue_depth == 3
+        
+        release.set()
+        await asyncio.gather(*calls)
+        
+        assert io_executor.in_use == 0
+        assert io_executor.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_release_worker(self, io_executor):
+        def fail():
+            raise ValueError("boom")
+        
+        with pytest.raises(ValueError):
+            await io_executor.run(fail)
+        
+        assert io_executor.in_use == 0
@@ -0,0 +1,20 @@
+from app.serverful.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def test_counters_accumulate(self):
+        registry = MetricsRegistry()
+        
+        registry.increment("cache_hits")
+        registry.increment("cache_hits", 2)
+        
+        assert registry.snapshot()["counters"] == {"cache_hits": 3}
+
+    def test_gauges_are_read_at_snapshot_time(self):
+        registry = MetricsRegistry()
+        depth = [1]
+        registry.register_gauge("queue_depth", lambda: depth[0])
+        
+        depth[0] = 7
+        
+        assert registry.snapshot()["gauges"] == {"queue_depth": 7}
@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from app.serverful.utils.metrics import metrics
+from app.serverful.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight("test_flight")
+        before = metrics.snapshot()["counters"].get("test_flight_coalesced", 0)
+        calls = 0
+        release = asyncio.Event()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"value": 1}
+
+        callers = [asyncio.ensure_future(flight.do("key", load, copy=dict)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+        release.set()
+        results = await asyncio.gather(*callers)
+        
+        assert calls == 1
+        assert all(result == {"value": 1} for result in results)
+        assert results[0] is not results[1]
+        assert flight.in_flight == 0
+        assert metrics.snapshot()["counters"]["test_flight_coalesced"] == before + 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_are_not_kept(self):
+        flight = SingleFlight("test_flight_errors")
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        flight = SingleFlight("test_flight_cancel")
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return 1
+
+        first = asyncio.ensure_future(flight.do("key", load))
+        second = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        
+        assert await second == 1
+
+    @pytest.mark.asyncio
+    async def test_forget_starts_a_fresh_call(self):
+        flight = SingleFlight("test_flight_forget")
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            call = calls
+            await asyncio.sleep(0)
+            return call
+
+        first = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        flight.forget(lambda key: key == "key")
+        second = await flight.do("key", load)
+        
+        assert await first == 1 and second == 2
+        assert flight.in_flight == 0